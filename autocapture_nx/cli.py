@@ -3,8 +3,12 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import json
 import sys
+import time
+from dataclasses import asdict
+from typing import Iterator
 
 from autocapture_nx.kernel.config import (
     ConfigPaths,
@@ -12,10 +16,12 @@ from autocapture_nx.kernel.config import (
     reset_user_config,
     restore_user_config,
 )
+from autocapture_nx.kernel import daemon
 from autocapture_nx.kernel.errors import AutocaptureError
 from autocapture_nx.kernel.loader import Kernel, default_config_paths
 from autocapture_nx.kernel.key_rotation import rotate_keys
-from autocapture_nx.kernel.query import run_query
+from autocapture_nx.kernel.query import run_query, trace_query
+from autocapture_nx.kernel.tracing import write_chrome_trace
 from autocapture_nx.plugin_system.registry import PluginRegistry
 
 
@@ -23,14 +29,34 @@ def _print_json(data: object) -> None:
     print(json.dumps(data, indent=2, sort_keys=True))
 
 
-def cmd_doctor(args: argparse.Namespace) -> int:
+@contextlib.contextmanager
+def _local_kernel(args: argparse.Namespace) -> Iterator[Kernel]:
+    """Boot a kernel for one command and shut its plugins down afterwards."""
     kernel = Kernel(default_config_paths(), safe_mode=args.safe_mode)
-    kernel.boot()
-    checks = kernel.doctor()
-    ok = all(check.ok for check in checks)
+    try:
+        kernel.boot()
+        yield kernel
+    finally:
+        kernel.shutdown()
+
+
+def _daemon_client(args: argparse.Namespace) -> daemon.DaemonClient | None:
+    if args.no_daemon:
+        return None
+    return daemon.connect(default_config_paths(), safe_mode=args.safe_mode)
+
+
+def cmd_doctor(args: argparse.Namespace) -> int:
+    client = _daemon_client(args)
+    if client is not None:
+        checks = client.request("doctor")
+    else:
+        with _local_kernel(args) as kernel:
+            checks = [asdict(check) for check in kernel.doctor()]
+    ok = all(check["ok"] for check in checks)
     for check in checks:
-        status = "OK" if check.ok else "FAIL"
-        print(f"{status} {check.name}: {check.detail}")
+        status = "OK" if check["ok"] else "FAIL"
+        print(f"{status} {check['name']}: {check['detail']}")
     return 0 if ok else 2
 
 
@@ -89,66 +115,147 @@ def cmd_plugins_approve(_args: argparse.Namespace) -> int:
 
 
 def cmd_run(args: argparse.Namespace) -> int:
-    kernel = Kernel(default_config_paths(), safe_mode=args.safe_mode)
-    system = kernel.boot()
-    capture = system.get("capture.source")
-    audio = system.get("capture.audio")
-    input_tracker = system.get("tracking.input")
-    window_meta = system.get("window.metadata")
-    capture.start()
-    audio.start()
-    input_tracker.start()
-    window_meta.start()
-    print("Capture running. Press Ctrl+C to stop.")
-    try:
-        import time
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        capture.stop()
-        audio.stop()
-        input_tracker.stop()
-        window_meta.stop()
-        return 0
+    with _local_kernel(args) as kernel:
+        system = kernel.system
+        capture = system.get("capture.source")
+        audio = system.get("capture.audio")
+        input_tracker = system.get("tracking.input")
+        window_meta = system.get("window.metadata")
+        # Serving the daemon socket lets other CLI commands (query, metrics,
+        # devtools profile) reach the capturing process; it also exports metrics
+        # and runs idle extraction. When `serve` already owns this data dir, leave
+        # its endpoint and extraction queue alone and only capture.
+        owner = daemon.running_daemon(system.config, kernel.safe_mode)
+        server = daemon.DaemonServer(kernel) if owner is None else None
+        capture.start()
+        audio.start()
+        input_tracker.start()
+        window_meta.start()
+        try:
+            if server is not None:
+                server.start()
+                print("Capture running. Press Ctrl+C to stop.")
+                server.serve_forever()
+            else:
+                print(f"Capture running; the daemon (pid {owner}) keeps serving requests. Press Ctrl+C to stop.")
+                while True:
+                    time.sleep(1)
+        except KeyboardInterrupt:
+            if server is not None:
+                server.close()
+        finally:
+            capture.stop()
+            audio.stop()
+            input_tracker.stop()
+            window_meta.stop()
+    return 0
 
 
 def cmd_devtools_diffusion(args: argparse.Namespace) -> int:
-    kernel = Kernel(default_config_paths(), safe_mode=args.safe_mode)
-    system = kernel.boot()
-    harness = system.get("devtools.diffusion")
-    result = harness.run(axis=args.axis, k_variants=args.k, dry_run=args.dry_run)
+    with _local_kernel(args) as kernel:
+        harness = kernel.system.get("devtools.diffusion")
+        result = harness.run(axis=args.axis, k_variants=args.k, dry_run=args.dry_run, max_parallel=args.jobs)
     _print_json(result)
     return 0
 
 
 def cmd_devtools_ast_ir(args: argparse.Namespace) -> int:
-    kernel = Kernel(default_config_paths(), safe_mode=args.safe_mode)
-    system = kernel.boot()
-    tool = system.get("devtools.ast_ir")
-    result = tool.run(scan_root=args.scan_root)
+    with _local_kernel(args) as kernel:
+        result = kernel.system.get("devtools.ast_ir").run(scan_root=args.scan_root)
+    _print_json(result)
+    return 0
+
+
+def cmd_devtools_profile(args: argparse.Namespace) -> int:
+    include_hosts = not args.no_hosts
+    client = _daemon_client(args)
+    if client is not None:
+        result = client.request(
+            "profile", seconds=args.seconds, interval_ms=args.interval_ms, include_hosts=include_hosts
+        )
+    else:
+        with _local_kernel(args) as kernel:
+            profiler = kernel.system.get("devtools.profiler")
+            result = profiler.profile(args.seconds, interval_ms=args.interval_ms, include_hosts=include_hosts)
     _print_json(result)
     return 0
 
 
 def cmd_query(args: argparse.Namespace) -> int:
-    kernel = Kernel(default_config_paths(), safe_mode=args.safe_mode)
-    system = kernel.boot()
-    result = run_query(system, args.text)
+    client = _daemon_client(args)
+    spans: list[dict] = []
+    if client is not None:
+        if args.trace:
+            traced = client.request("query_traced", text=args.text)
+            result, spans = traced["result"], traced["spans"]
+        else:
+            result = client.request("query", text=args.text)
+    else:
+        with _local_kernel(args) as kernel:
+            if args.trace:
+                result, spans = trace_query(kernel.system, args.text)
+            else:
+                result = run_query(kernel.system, args.text)
+    if args.trace:
+        write_chrome_trace(args.trace, spans)
     _print_json(result)
     return 0
 
 
 def cmd_keys_rotate(args: argparse.Namespace) -> int:
-    kernel = Kernel(default_config_paths(), safe_mode=args.safe_mode)
-    system = kernel.boot()
-    result = rotate_keys(system)
+    # A running daemon holds the keyring in memory, so rotation must happen there.
+    client = _daemon_client(args)
+    if client is not None:
+        result = client.request("keys_rotate")
+    else:
+        with _local_kernel(args) as kernel:
+            result = rotate_keys(kernel.system)
     _print_json(result)
     return 0
 
 
+def cmd_metrics(args: argparse.Namespace) -> int:
+    fmt = "prometheus" if args.prometheus else "json"
+    client = _daemon_client(args)
+    if client is not None:
+        result = client.request("metrics", reset=args.reset, format=fmt)
+    else:
+        with _local_kernel(args) as kernel:
+            metrics = kernel.system.get("observability.metrics")
+            result = metrics.prometheus_text() if args.prometheus else metrics.snapshot()
+    if args.prometheus:
+        print(result, end="")
+    else:
+        _print_json(result)
+    return 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    with _local_kernel(args) as kernel:
+        server = daemon.DaemonServer(kernel)
+        server.start()
+        print(f"Daemon listening on {server.address}. Press Ctrl+C to stop.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.close()
+    return 0
+
+
+def cmd_serve_stop(args: argparse.Namespace) -> int:
+    client = daemon.connect(default_config_paths(), safe_mode=args.safe_mode)
+    if client is None:
+        print("No daemon running")
+        return 0
+    client.request("shutdown")
+    print("Daemon stopped")
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="autocapture")
     parser.add_argument("--safe-mode", action="store_true", help="Boot in safe mode")
+    parser.add_argument("--no-daemon", action="store_true", help="Do not use a running daemon")
 
     sub = parser.add_subparsers(dest="command", required=True)
 
@@ -174,20 +281,38 @@ def build_parser() -> argparse.ArgumentParser:
     run_cmd = sub.add_parser("run")
     run_cmd.set_defaults(func=cmd_run)
 
+    serve_cmd = sub.add_parser("serve")
+    serve_cmd.set_defaults(func=cmd_serve)
+    serve_sub = serve_cmd.add_subparsers(dest="serve_cmd")
+    serve_stop = serve_sub.add_parser("stop")
+    serve_stop.set_defaults(func=cmd_serve_stop)
+
     query_cmd = sub.add_parser("query")
     query_cmd.add_argument("text")
+    query_cmd.add_argument("--trace", metavar="PATH", help="Write a Chrome trace-event JSON of this query")
     query_cmd.set_defaults(func=cmd_query)
 
+    metrics_cmd = sub.add_parser("metrics")
+    metrics_cmd.add_argument("--reset", action="store_true", help="Reset daemon counters after dumping")
+    metrics_cmd.add_argument("--prometheus", action="store_true", help="Print Prometheus text format")
+    metrics_cmd.set_defaults(func=cmd_metrics)
+
     devtools = sub.add_parser("devtools")
     devtools_sub = devtools.add_subparsers(dest="devtools_cmd", required=True)
     diffusion = devtools_sub.add_parser("diffusion")
     diffusion.add_argument("--axis", required=True)
     diffusion.add_argument("-k", type=int, default=1)
     diffusion.add_argument("--dry-run", action=argparse.BooleanOptionalAction, default=None)
+    diffusion.add_argument("-j", "--jobs", type=int, default=None, help="Variants scored concurrently (0 = half the CPUs)")
     diffusion.set_defaults(func=cmd_devtools_diffusion)
     ast_ir = devtools_sub.add_parser("ast-ir")
     ast_ir.add_argument("--scan-root", default="autocapture_nx")
     ast_ir.set_defaults(func=cmd_devtools_ast_ir)
+    profile = devtools_sub.add_parser("profile")
+    profile.add_argument("--seconds", type=float, default=10.0)
+    profile.add_argument("--interval-ms", type=float, default=None)
+    profile.add_argument("--no-hosts", action="store_true", help="Skip subprocess plugin hosts")
+    profile.set_defaults(func=cmd_devtools_profile)
 
     keys = sub.add_parser("keys")
     keys_sub = keys.add_subparsers(dest="keys_cmd", required=True)
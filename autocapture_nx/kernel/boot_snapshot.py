@@ -0,0 +1,150 @@
+"""Boot snapshot cache keyed on kernel input file fingerprints."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from autocapture_nx import __version__
+
+SNAPSHOT_VERSION = 2
+
+
+def _stat_entry(path: Path) -> list[Any]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return [path.as_posix(), None, None]
+    return [path.as_posix(), stat.st_mtime_ns, stat.st_size]
+
+
+def _walk_entries(root: Path) -> list[list[Any]]:
+    entries: list[list[Any]] = []
+    if not root.exists():
+        return [[root.as_posix(), None, None]]
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for name in sorted(filenames):
+            if name.endswith(".pyc"):
+                continue
+            entries.append(_stat_entry(Path(dirpath) / name))
+    return entries
+
+
+def fingerprint_inputs(files: Iterable[Path], roots: Iterable[Path] = (), salt: str = "") -> str:
+    """Fingerprint files and directory trees by path, mtime and size (no content reads)."""
+    entries: list[Any] = [salt]
+    entries.extend(_stat_entry(Path(p)) for p in files)
+    for root in roots:
+        entries.extend(_walk_entries(Path(root)))
+    digest = hashlib.sha256()
+    digest.update(json.dumps(entries, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def plugin_inputs(config: dict[str, Any]) -> tuple[list[Path], list[Path]]:
+    """Files and roots that determine the resolved plugin set for a config."""
+    plugins_cfg = config.get("plugins", {})
+    lockfile = Path(plugins_cfg.get("locks", {}).get("lockfile", "config/plugin_locks.json"))
+    roots = [Path("plugins") / "builtin"]
+    roots.extend(Path(extra) for extra in plugins_cfg.get("search_paths", []))
+    return [lockfile, Path("contracts/plugin_manifest.schema.json")], roots
+
+
+def _body_mac(body: dict[str, Any], key: bytes) -> str:
+    data = json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hmac.new(key, data, hashlib.sha256).hexdigest()
+
+
+@dataclass
+class BootSnapshot:
+    config_fingerprint: str
+    plugin_fingerprint: str
+    config: dict[str, Any]
+    manifests: list[dict[str, Any]]
+    locks: dict[str, dict[str, str]]
+    capability_map: dict[str, dict[str, list[str]]]
+    cold_boot_ms: int | None = None
+
+    def to_body(self) -> dict[str, Any]:
+        return {
+            "kernel_version": __version__,
+            "config_fingerprint": self.config_fingerprint,
+            "plugin_fingerprint": self.plugin_fingerprint,
+            "config": self.config,
+            "manifests": self.manifests,
+            "locks": self.locks,
+            "capability_map": self.capability_map,
+            "cold_boot_ms": self.cold_boot_ms,
+        }
+
+    @classmethod
+    def from_body(cls, body: dict[str, Any]) -> "BootSnapshot":
+        return cls(
+            config_fingerprint=body["config_fingerprint"],
+            plugin_fingerprint=body["plugin_fingerprint"],
+            config=body["config"],
+            manifests=body["manifests"],
+            locks=body["locks"],
+            capability_map=body["capability_map"],
+            cold_boot_ms=body.get("cold_boot_ms"),
+        )
+
+
+class BootSnapshotStore:
+    """Persists boot snapshots under an HMAC and validates them on load.
+
+    The key is derived from the keyring, so a process that can write the
+    snapshot but cannot read the keyring cannot forge one.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+
+    def load(self, config_fingerprint: str, key: bytes) -> BootSnapshot | None:
+        if not self.path.exists():
+            return None
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != SNAPSHOT_VERSION:
+            return None
+        body = data.get("body")
+        if not isinstance(body, dict) or not isinstance(data.get("mac"), str):
+            return None
+        if not hmac.compare_digest(data["mac"], _body_mac(body, key)):
+            return None
+        if body.get("kernel_version") != __version__:
+            return None
+        if body.get("config_fingerprint") != config_fingerprint:
+            return None
+        try:
+            snapshot = BootSnapshot.from_body(body)
+        except KeyError:
+            return None
+        files, roots = plugin_inputs(snapshot.config)
+        if fingerprint_inputs(files, roots) != snapshot.plugin_fingerprint:
+            return None
+        return snapshot
+
+    def save(self, snapshot: BootSnapshot, key: bytes) -> None:
+        body = snapshot.to_body()
+        payload = {"version": SNAPSHOT_VERSION, "mac": _body_mac(body, key), "body": body}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def invalidate(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -10,6 +10,7 @@ from pathlib import Path
 from typing import Any
 
 from .errors import ConfigError
+from .schema import SchemaIssue, compile_schema, load_compiled_schema
 
 
 @dataclass(frozen=True)
@@ -18,6 +19,7 @@ class ConfigPaths:
     user_path: Path
     schema_path: Path
     backup_dir: Path
+    snapshot_path: Path | None = None
 
 
 def _load_json(path: Path) -> dict[str, Any]:
@@ -38,89 +40,32 @@ def _deep_merge(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any
 
 
 class SchemaLiteValidator:
-    """Minimal schema validator supporting object/array/scalar types."""
+    """Minimal schema validator supporting object/array/scalar types.
+
+    Compiles the schema on every call and keeps nothing, so in-place edits to
+    a schema dict are always seen. File-backed schemas that are validated
+    repeatedly should go through `load_compiled_schema`, which caches by
+    path and content hash.
+    """
+
+    def errors(self, schema: dict[str, Any], data: Any, path: str = "$") -> list[SchemaIssue]:
+        return compile_schema(schema).errors(data, path)
 
     def validate(self, schema: dict[str, Any], data: Any, path: str = "$") -> None:
-        if "enum" in schema and data not in schema["enum"]:
-            raise ConfigError(f"{path}: value {data!r} not in enum {schema['enum']}")
-
-        expected_type = schema.get("type")
-        if expected_type:
-            self._validate_type(expected_type, data, path)
-
-        if expected_type == "object":
-            self._validate_object(schema, data, path)
-        elif expected_type == "array":
-            self._validate_array(schema, data, path)
-        elif expected_type in ("integer", "number"):
-            self._validate_number(schema, data, path)
-
-    def _validate_type(self, expected: str | list[str], data: Any, path: str) -> None:
-        type_map = {
-            "object": dict,
-            "array": list,
-            "string": str,
-            "integer": int,
-            "number": (int, float),
-            "boolean": bool,
-            "null": type(None),
-        }
-        if isinstance(expected, list):
-            for typ in expected:
-                try:
-                    self._validate_type(typ, data, path)
-                    return
-                except ConfigError:
-                    continue
-            raise ConfigError(f"{path}: expected one of {expected}, got {type(data).__name__}")
-        if expected not in type_map:
-            raise ConfigError(f"{path}: unsupported schema type {expected}")
-        if not isinstance(data, type_map[expected]):
-            raise ConfigError(f"{path}: expected {expected}, got {type(data).__name__}")
-        if expected == "integer" and isinstance(data, bool):
-            raise ConfigError(f"{path}: expected integer, got boolean")
-
-    def _validate_object(self, schema: dict[str, Any], data: dict[str, Any], path: str) -> None:
-        required = schema.get("required", [])
-        for key in required:
-            if key not in data:
-                raise ConfigError(f"{path}: missing required field {key}")
-        properties = schema.get("properties", {})
-        additional = schema.get("additionalProperties", True)
-        for key, value in data.items():
-            if key in properties:
-                self.validate(properties[key], value, f"{path}.{key}")
-            else:
-                if additional is False:
-                    raise ConfigError(f"{path}: unexpected field {key}")
-                if isinstance(additional, dict):
-                    self.validate(additional, value, f"{path}.{key}")
-
-    def _validate_array(self, schema: dict[str, Any], data: list[Any], path: str) -> None:
-        items = schema.get("items")
-        if items is None:
-            return
-        for idx, item in enumerate(data):
-            self.validate(items, item, f"{path}[{idx}]")
-
-    def _validate_number(self, schema: dict[str, Any], data: Any, path: str) -> None:
-        minimum = schema.get("minimum")
-        maximum = schema.get("maximum")
-        if minimum is not None and data < minimum:
-            raise ConfigError(f"{path}: value {data} below minimum {minimum}")
-        if maximum is not None and data > maximum:
-            raise ConfigError(f"{path}: value {data} above maximum {maximum}")
+        compile_schema(schema).validate(data, path)
 
 
 validator = SchemaLiteValidator()
 
 
 def validate_config(schema_path: Path, data: dict[str, Any]) -> None:
-    schema = _load_json(schema_path)
-    validator.validate(schema, data)
+    if not schema_path.exists():
+        raise ConfigError(f"Missing config file: {schema_path}")
+    load_compiled_schema(schema_path).validate(data)
 
 
-def load_config(paths: ConfigPaths, safe_mode: bool) -> dict[str, Any]:
+def merge_config(paths: ConfigPaths, safe_mode: bool) -> dict[str, Any]:
+    """Defaults merged with the user config (or safe-mode defaults), not yet validated."""
     defaults = _load_json(paths.default_path)
     if safe_mode:
         config = deepcopy(defaults)
@@ -128,6 +73,11 @@ def load_config(paths: ConfigPaths, safe_mode: bool) -> dict[str, Any]:
     else:
         user_config = _load_json(paths.user_path) if paths.user_path.exists() else {}
         config = _deep_merge(defaults, user_config)
+    return config
+
+
+def load_config(paths: ConfigPaths, safe_mode: bool) -> dict[str, Any]:
+    config = merge_config(paths, safe_mode)
     validate_config(paths.schema_path, config)
     return config
 
@@ -6,7 +6,7 @@ import base64
 import os
 import sys
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
@@ -87,3 +87,35 @@ def decrypt_bytes(key: bytes, blob: EncryptedBlob, aad: Optional[bytes] = None)
     nonce = base64.b64decode(blob.nonce_b64)
     ciphertext = base64.b64decode(blob.ciphertext_b64)
     return aes.decrypt(nonce, ciphertext, aad)
+
+
+class KeyringCipher:
+    """AES-GCM envelopes under a purpose key derived from the storage keyring.
+
+    ``unseal`` tries the blob's own key id first, then the active key, so data
+    sealed before a rotation stays readable until it is rewritten.
+    """
+
+    def __init__(self, keyring: Any, purpose: str) -> None:
+        self._keyring = keyring
+        self._purpose = purpose
+
+    def seal(self, payload: bytes) -> dict[str, Any]:
+        key_id, root = self._keyring.active_key()
+        return encrypt_bytes(derive_key(root, self._purpose), payload, key_id=key_id).__dict__
+
+    def unseal(self, data: dict[str, Any]) -> bytes | None:
+        blob = EncryptedBlob(**data)
+        roots = []
+        if blob.key_id:
+            try:
+                roots.append(self._keyring.key_for(blob.key_id))
+            except KeyError:
+                pass
+        roots.append(self._keyring.active_key()[1])
+        for root in roots:
+            try:
+                return decrypt_bytes(derive_key(root, self._purpose), blob)
+            except Exception:
+                continue
+        return None
@@ -0,0 +1,310 @@
+"""Resident daemon keeping a booted System alive behind local IPC."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import secrets
+import threading
+from dataclasses import asdict
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener, answer_challenge, deliver_challenge
+from pathlib import Path
+from typing import Any, Callable
+
+from autocapture_nx.kernel.config import ConfigPaths, load_config
+from autocapture_nx.kernel.errors import AutocaptureError, DaemonError
+from autocapture_nx.kernel.idle_drain import IdleDrainScheduler
+from autocapture_nx.kernel.key_rotation import rotate_keys
+from autocapture_nx.kernel.loader import Kernel
+from autocapture_nx.kernel.metrics import MetricsExporter
+from autocapture_nx.kernel.query import run_query, trace_query
+
+
+def _run_dir(config: dict[str, Any]) -> Path:
+    return Path(config.get("storage", {}).get("data_dir", "data")) / "run"
+
+
+def daemon_state_path(config: dict[str, Any], safe_mode: bool) -> Path:
+    name = "daemon_safe.json" if safe_mode else "daemon.json"
+    return _run_dir(config) / name
+
+
+def _daemon_address(config: dict[str, Any], safe_mode: bool) -> tuple[str, str]:
+    suffix = "_safe" if safe_mode else ""
+    if os.name == "nt":
+        run_dir = os.path.abspath(_run_dir(config))
+        tag = hashlib.sha256(run_dir.encode("utf-8")).hexdigest()[:16]
+        return rf"\\.\pipe\autocapture-{tag}{suffix}", "AF_PIPE"
+    return str(_run_dir(config) / f"autocapture{suffix}.sock"), "AF_UNIX"
+
+
+def _send(conn: Connection, payload: dict[str, Any]) -> None:
+    conn.send_bytes(json.dumps(payload).encode("utf-8"))
+
+
+def _recv(conn: Connection) -> dict[str, Any]:
+    return json.loads(conn.recv_bytes().decode("utf-8"))
+
+
+def _lock_instance(path: Path) -> int | None:
+    """Take a non-blocking exclusive lock on ``path``; the fd holds it until closed, or None if taken.
+
+    The OS drops the lock when the process dies, so a crashed daemon never
+    leaves a stale lock behind.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def running_daemon(config: dict[str, Any], safe_mode: bool) -> int | None:
+    """Pid of the daemon answering at the address in the state file, if any."""
+    try:
+        with open(daemon_state_path(config, safe_mode), "r", encoding="utf-8") as handle:
+            state = json.load(handle)
+        return int(DaemonClient(state).request("ping")["pid"])
+    except (OSError, EOFError, AuthenticationError, DaemonError, KeyError, TypeError, ValueError):
+        return None
+
+
+class DaemonServer:
+    """Serves CLI requests against one booted kernel.
+
+    The accept loop only accepts. The authentication handshake, the request
+    and the reply all run on a thread per connection, so a client that
+    stalls or fails authentication cannot block or stop the server. Anything
+    touching the System runs under a single lock because plugins are not
+    thread-safe.
+    """
+
+    def __init__(self, kernel: Kernel) -> None:
+        if kernel.system is None:
+            raise DaemonError("Kernel not booted")
+        self.kernel = kernel
+        self.system = kernel.system
+        self._config_fingerprint = kernel.config_fingerprint()
+        self._system_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.address, self.family = _daemon_address(self.system.config, kernel.safe_mode)
+        self.state_path = daemon_state_path(self.system.config, kernel.safe_mode)
+        self._authkey = secrets.token_bytes(32)
+        self._listener: Listener | None = None
+        self._instance_lock: int | None = None
+        self._exporter = MetricsExporter.from_config(self.system.get("observability.metrics"), self.system.config)
+        self._idle: IdleDrainScheduler | None = None
+        if self.system.config.get("processing", {}).get("idle", {}).get("enabled", True) and self.system.has("runtime.governor"):
+            self._idle = IdleDrainScheduler(self.system, system_lock=self._system_lock)
+        self._handlers: dict[str, Callable[[dict[str, Any]], Any]] = {
+            "ping": lambda _args: {"pid": os.getpid()},
+            "query": lambda args: run_query(self.system, args["text"]),
+            "query_traced": self._query_traced,
+            "doctor": lambda _args: [asdict(check) for check in self.kernel.doctor()],
+            "keys_rotate": lambda _args: rotate_keys(self.system),
+            "metrics": self._metrics,
+            "profile": self._profile,
+            "idle_status": self._idle_status,
+        }
+        # Commands that must not wait for (or block) the System lock.
+        self._unlocked = {"ping", "profile", "idle_status"}
+
+    def _query_traced(self, args: dict[str, Any]) -> dict[str, Any]:
+        result, spans = trace_query(self.system, args["text"])
+        return {"result": result, "spans": spans}
+
+    def _metrics(self, args: dict[str, Any]) -> dict[str, Any]:
+        metrics = self.system.get("observability.metrics")
+        snapshot = metrics.prometheus_text() if args.get("format") == "prometheus" else metrics.snapshot()
+        if args.get("reset"):
+            metrics.reset()
+        return snapshot
+
+    def _idle_status(self, _args: dict[str, Any]) -> dict[str, Any]:
+        if self._idle is None:
+            return {"enabled": False}
+        return {"enabled": True, "mode": self._idle.mode, "queued": len(self._idle.queue), **self._idle.stats}
+
+    def _profile(self, args: dict[str, Any]) -> dict[str, Any]:
+        profiler = self.system.get("devtools.profiler")
+        return profiler.profile(
+            float(args["seconds"]),
+            interval_ms=args.get("interval_ms"),
+            include_hosts=bool(args.get("include_hosts", True)),
+        )
+
+    def start(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        # Held for the daemon's lifetime, so only its owner may replace the socket and state file.
+        self._instance_lock = _lock_instance(self.state_path.with_suffix(".lock"))
+        if self._instance_lock is None:
+            pid = running_daemon(self.system.config, self.kernel.safe_mode)
+            owner = f" (pid {pid})" if pid is not None else ""
+            raise DaemonError(f"A daemon is already running for this data directory{owner}")
+        try:
+            if self.family == "AF_UNIX" and os.path.exists(self.address):
+                os.unlink(self.address)
+            # No authkey here: _serve_connection runs the handshake off the accept thread.
+            self._listener = Listener(self.address, family=self.family, backlog=64)
+        except BaseException:
+            self._release_instance_lock()
+            raise
+        state = {
+            "pid": os.getpid(),
+            "address": self.address,
+            "family": self.family,
+            "authkey": self._authkey.hex(),
+            "safe_mode": self.kernel.safe_mode,
+            "config_fingerprint": self._config_fingerprint,
+        }
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        # The state file holds the authkey: create it owner-only rather than chmod it afterwards.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(state, handle, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+        self._exporter.start()
+        if self._idle is not None:
+            self._idle.start()
+
+    def serve_forever(self) -> None:
+        if self._listener is None:
+            self.start()
+        assert self._listener is not None
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn = self._listener.accept()
+                except (OSError, EOFError, AuthenticationError):
+                    continue
+                if self._stop.is_set():
+                    conn.close()
+                    break
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def _serve_connection(self, conn: Connection) -> None:
+        with conn:
+            try:
+                deliver_challenge(conn, self._authkey)
+                answer_challenge(conn, self._authkey)
+                request = _recv(conn)
+            except (OSError, EOFError, AuthenticationError, ValueError):
+                return
+            try:
+                if request.get("command") == "shutdown":
+                    _send(conn, {"ok": True, "result": None})
+                    self.stop()
+                    return
+                _send(conn, self.handle(request))
+            except (OSError, EOFError):
+                pass
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        handler = self._handlers.get(request.get("command", ""))
+        if handler is None:
+            return {"ok": False, "error": f"unknown command {request.get('command')!r}"}
+        unlocked = request["command"] in self._unlocked
+        lock = contextlib.nullcontext() if unlocked else self._system_lock
+        # Suspend idle extraction before waiting for the lock, so its workers park and yield.
+        hold = self._idle.hold() if self._idle is not None and not unlocked else contextlib.nullcontext()
+        try:
+            with hold, lock:
+                result = handler(request.get("args", {}))
+        except AutocaptureError as exc:
+            return {"ok": False, "error": str(exc)}
+        except Exception as exc:
+            return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        return {"ok": True, "result": result}
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._listener is None:
+            return
+        # Wake the accept loop so it sees the stop flag.
+        try:
+            Client(self.address, family=self.family).close()
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self._stop.set()
+        self._exporter.stop()
+        if self._idle is not None:
+            self._idle.stop()
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+            self._listener = None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as handle:
+                owner = json.load(handle).get("pid")
+        except (OSError, ValueError):
+            owner = None
+        if owner == os.getpid():
+            try:
+                os.unlink(self.state_path)
+            except OSError:
+                pass
+        self._release_instance_lock()
+
+    def _release_instance_lock(self) -> None:
+        if self._instance_lock is not None:
+            os.close(self._instance_lock)
+            self._instance_lock = None
+
+
+class DaemonClient:
+    def __init__(self, state: dict[str, Any]) -> None:
+        self._address = state["address"]
+        self._family = state["family"]
+        self._authkey = bytes.fromhex(state["authkey"])
+
+    def request(self, command: str, **args: Any) -> Any:
+        with Client(self._address, family=self._family, authkey=self._authkey) as conn:
+            _send(conn, {"command": command, "args": args})
+            response = _recv(conn)
+        if not response.get("ok"):
+            raise DaemonError(response.get("error", "unknown daemon error"))
+        return response.get("result")
+
+
+def connect(config_paths: ConfigPaths, safe_mode: bool) -> DaemonClient | None:
+    """Return a client for a running daemon whose config matches, else None."""
+    try:
+        config = load_config(config_paths, safe_mode=safe_mode)
+    except AutocaptureError:
+        return None
+    state_path = daemon_state_path(config, safe_mode)
+    try:
+        with open(state_path, "r", encoding="utf-8") as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if bool(state.get("safe_mode")) != safe_mode:
+        return None
+    if state.get("config_fingerprint") != Kernel(config_paths, safe_mode=safe_mode).config_fingerprint():
+        return None
+    client = DaemonClient(state)
+    try:
+        client.request("ping")
+    except (OSError, EOFError, AuthenticationError, DaemonError, KeyError, ValueError):
+        return None
+    return client
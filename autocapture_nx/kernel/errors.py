@@ -23,3 +23,11 @@ class SafeModeError(AutocaptureError):
 
 class NetworkDisabledError(AutocaptureError):
     """Raised when network access is attempted while disabled."""
+
+
+class DaemonError(AutocaptureError):
+    """Raised when the resident daemon rejects or fails a request."""
+
+
+class ProfilerError(AutocaptureError):
+    """Raised when a profiling session cannot be started or stopped."""
@@ -0,0 +1,208 @@
+"""Persistent OCR/VLM result cache keyed by frame content."""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable
+
+from autocapture_nx.kernel.crypto import KeyringCipher
+from autocapture_nx.kernel.keyframes import dhash
+
+_MISSING = object()
+
+
+class ExtractionCache:
+    """The ``extraction.cache`` kernel capability.
+
+    Maps ``(engine id, frame digest)`` to extracted text, so a screen seen in
+    many segments is OCR'd or described once. The digest is the sha256 of the
+    frame bytes, or with ``key: dhash`` a 256-bit difference hash that also
+    matches re-encoded or nearly identical frames. Engine ids come from each
+    engine's ``model_id()``; engines without one are not cached.
+
+    Entries are kept in LRU order up to ``max_entries`` and appended to
+    ``<data_dir>/extraction/cache.jsonl`` as they are added, one AES-GCM
+    sealed line each when ``storage.encryption_required`` is set. The file is
+    compacted once it holds twice as many lines as live entries. If
+    encryption is required but no keyring is available the cache stays off
+    rather than write plaintext.
+    """
+
+    def __init__(
+        self,
+        config: dict[str, Any],
+        keyring: Callable[[], Any] = lambda: None,
+        metrics: Any = None,
+    ) -> None:
+        cfg = config.get("processing", {}).get("extraction_cache", {})
+        storage = config.get("storage", {})
+        self.enabled = bool(cfg.get("enabled", True))
+        self.key_mode = str(cfg.get("key", "sha256"))
+        self.max_entries = max(1, int(cfg.get("max_entries", 100000)))
+        self.path = os.path.join(storage.get("data_dir", "data"), "extraction", "cache.jsonl")
+        self._encrypt = bool(storage.get("encryption_required", False))
+        self._keyring = keyring
+        self._cipher: KeyringCipher | None = None
+        self._entries: collections.OrderedDict[str, str] = collections.OrderedDict()
+        self._engine_ids: dict[int, tuple[Any, str | None]] = {}
+        self._lines = 0
+        self._lock = threading.RLock()
+        self._opened = False
+        self.hits = 0
+        self.misses = 0
+        self._hit_counters: dict[str, Any] = {}
+        self._miss_counters: dict[str, Any] = {}
+        self._metrics = metrics
+        self._entries_gauge = metrics.gauge("autocapture_extraction_cache_entries", help="Frames in the OCR/VLM result cache") if metrics else None
+
+    def _open(self) -> bool:
+        if self._opened:
+            return self.enabled
+        self._opened = True
+        if not self.enabled:
+            return False
+        if self._encrypt:
+            keyring = self._keyring()
+            if keyring is None:
+                self.enabled = False
+                return False
+            self._cipher = KeyringCipher(keyring, "extraction_cache")
+        self._load()
+        return True
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                self._lines += 1
+                try:
+                    record = json.loads(line)
+                    if self._cipher is not None:
+                        payload = self._cipher.unseal(record)
+                        if payload is None:
+                            continue
+                        record = json.loads(payload)
+                    self._entries[record["k"]] = str(record["t"])
+                    self._entries.move_to_end(record["k"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+        self._evict()
+        self._set_gauge()
+
+    def _line(self, key: str) -> str:
+        record: dict[str, Any] = {"k": key, "t": self._entries[key]}
+        if self._cipher is not None:
+            record = self._cipher.seal(json.dumps(record).encode("utf-8"))
+        return json.dumps(record, sort_keys=True) + "\n"
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _set_gauge(self) -> None:
+        if self._entries_gauge is not None:
+            self._entries_gauge.set(len(self._entries))
+
+    def _count(self, kind: str, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self._metrics is None:
+            return
+        counters = self._hit_counters if hit else self._miss_counters
+        if kind not in counters:
+            name = "autocapture_extraction_cache_hits_total" if hit else "autocapture_extraction_cache_misses_total"
+            counters[kind] = self._metrics.counter(name, labels={"kind": kind}, help="OCR/VLM result cache lookups")
+        counters[kind].inc()
+
+    def engine_id(self, kind: str, engine: Any) -> str | None:
+        """``kind:model_id()`` for ``engine``, resolved once per engine object."""
+        with self._lock:
+            cached = self._engine_ids.get(id(engine), _MISSING)
+        if cached is not _MISSING and cached[0] is engine:  # type: ignore[index]
+            return cached[1]  # type: ignore[index]
+        try:
+            model_id = getattr(engine, "model_id", None)
+            resolved = f"{kind}:{model_id()}" if callable(model_id) else None
+        except Exception:
+            resolved = None
+        with self._lock:
+            self._engine_ids[id(engine)] = (engine, resolved)
+        return resolved
+
+    def digest(self, frame: bytes) -> str:
+        if self.key_mode == "dhash":
+            try:
+                return "dhash16:" + dhash(frame, size=16)
+            except Exception:
+                pass
+        return "sha256:" + hashlib.sha256(frame).hexdigest()
+
+    def get(self, kind: str, engine: Any, frame: bytes) -> str | None:
+        """Cached text for ``frame`` from ``engine``, or None."""
+        engine_id = self.engine_id(kind, engine)
+        if engine_id is None:
+            return None
+        with self._lock:
+            if not self._open():
+                return None
+            key = f"{engine_id}|{self.digest(frame)}"
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            self._count(kind, text is not None)
+            return text
+
+    def put(self, kind: str, engine: Any, frame: bytes, text: str) -> None:
+        engine_id = self.engine_id(kind, engine)
+        if engine_id is None:
+            return
+        with self._lock:
+            if not self._open():
+                return
+            key = f"{engine_id}|{self.digest(frame)}"
+            if self._entries.get(key) == text:
+                return
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            self._evict()
+            if self._lines >= 2 * self.max_entries:
+                self._compact()
+            else:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(self._line(key))
+                self._lines += 1
+            self._set_gauge()
+
+    def _compact(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.writelines(self._line(key) for key in self._entries)
+        os.replace(tmp_path, self.path)
+        self._lines = len(self._entries)
+
+    def rewrite(self) -> int:
+        """Re-seal every entry under the active key (key rotation)."""
+        with self._lock:
+            if not self._open():
+                return 0
+            self._compact()
+            return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
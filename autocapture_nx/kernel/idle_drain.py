@@ -0,0 +1,437 @@
+"""Background extraction of captured segments while the user is idle."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from autocapture_nx.kernel.keyframes import KeyframeConfig
+from autocapture_nx.kernel.query import (
+    merge_extractions,
+    needs_extraction,
+    ocr_frames,
+    segment_frames,
+    vlm_frames,
+)
+from autocapture_nx.kernel.model_manager import notify_mode
+from autocapture_nx.kernel.storage_bulk import chunks, get_many
+from autocapture_nx.kernel.time_window import parse_ts
+
+_REFILL_BATCH = 256
+_INDEX_BATCH = 32
+
+
+class _Suspended(Exception):
+    """Raised inside a worker when the scheduler is suspended mid-segment."""
+
+
+class ExtractionQueue:
+    """Persistent FIFO of record ids that still need OCR/VLM text.
+
+    The checkpoint is a small JSON file of record ids (already visible as
+    metadata file names) rewritten atomically. Claimed ids are checkpointed
+    as pending, so a crash re-runs at most the segments in flight; those are
+    cheap to skip because their metadata already carries ``text_source``.
+    Checkpoints are serialized, so concurrent callers never share a temp file
+    and an older snapshot never replaces a newer one.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._pending: list[str] = []
+        self._in_flight: list[str] = []
+        self._attempts: dict[str, int] = {}
+        self._dropped: set[str] = set()
+        self.done = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                state = json.load(handle)
+        except (OSError, ValueError):
+            return
+        self._pending = [str(record_id) for record_id in state.get("pending", [])]
+        self._attempts = {str(k): int(v) for k, v in state.get("attempts", {}).items()}
+        self._dropped = {str(record_id) for record_id in state.get("dropped", [])}
+        self.done = int(state.get("done", 0))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._in_flight)
+
+    def refill(self, metadata) -> int:
+        """Queue records that need extraction and are not queued yet, newest first."""
+        candidates: list[tuple[str, str]] = []
+        with self._lock:
+            known = set(self._pending) | set(self._in_flight) | self._dropped
+        unknown = [record_id for record_id in getattr(metadata, "keys", lambda: [])() if record_id not in known]
+        for batch in chunks(unknown, _REFILL_BATCH):
+            for record_id, record in get_many(metadata, batch, {}).items():
+                record = record or {}
+                if not needs_extraction(record):
+                    continue
+                ts = parse_ts(record.get("ts_utc"))
+                candidates.append((ts.isoformat() if ts else "", record_id))
+        candidates.sort(reverse=True)
+        with self._lock:
+            self._pending.extend(record_id for _, record_id in candidates)
+        return len(candidates)
+
+    def claim(self) -> str | None:
+        with self._lock:
+            if not self._pending:
+                return None
+            record_id = self._pending.pop(0)
+            self._in_flight.append(record_id)
+            return record_id
+
+    def complete(self, record_id: str) -> None:
+        with self._lock:
+            self._in_flight.remove(record_id)
+            self._attempts.pop(record_id, None)
+            self.done += 1
+
+    def release(self, record_id: str) -> None:
+        """Return an interrupted claim to the front of the queue."""
+        with self._lock:
+            self._in_flight.remove(record_id)
+            self._pending.insert(0, record_id)
+
+    def fail(self, record_id: str, max_attempts: int) -> bool:
+        """Requeue a failed claim at the back; drop it for good after ``max_attempts``. Returns True if dropped."""
+        with self._lock:
+            self._in_flight.remove(record_id)
+            attempts = self._attempts.get(record_id, 0) + 1
+            if attempts >= max_attempts:
+                self._attempts.pop(record_id, None)
+                self._dropped.add(record_id)
+                return True
+            self._attempts[record_id] = attempts
+            self._pending.append(record_id)
+            return False
+
+    def checkpoint(self) -> None:
+        with self._checkpoint_lock:
+            with self._lock:
+                state = {
+                    "pending": self._in_flight + self._pending,
+                    "attempts": dict(self._attempts),
+                    "dropped": sorted(self._dropped),
+                    "done": self.done,
+                }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(state, handle, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def input_signals(system) -> Callable[[], dict[str, Any]]:
+    """Governor signals from ``tracking.input``; without it the user is treated as active."""
+    active_window = int(system.config.get("runtime", {}).get("active_window_s", 3))
+    tracker = system.get("tracking.input") if system.has("tracking.input") else None
+
+    def signals() -> dict[str, Any]:
+        if tracker is None:
+            return {"user_active": True, "idle_seconds": 0}
+        try:
+            idle = float(tracker.idle_seconds())
+        except Exception:
+            return {"user_active": True, "idle_seconds": 0}
+        idle_seconds = int(min(idle, 10**9))
+        return {"user_active": idle_seconds < active_window, "idle_seconds": idle_seconds}
+
+    return signals
+
+
+class IdleDrainScheduler:
+    """Drains the extraction queue while ``runtime.governor`` reports ``IDLE_DRAIN``.
+
+    A control thread polls the governor every ``processing.idle.poll_ms``.
+    ``max_concurrency_cpu`` worker threads decode segments and run OCR;
+    at most ``max_concurrency_gpu`` of them are inside the VLM at once
+    (0 means OCR only). On any other mode the scheduler suspends: no new
+    segment is claimed, and when ``runtime.mode_enforcement.suspend_workers``
+    is set, in-flight segments are abandoned at the next stage boundary and
+    requeued. A model call already running is not interrupted, so
+    ``suspend()`` reports whether every worker parked within
+    ``suspend_deadline_ms``. ``hold()`` forces ``USER_QUERY`` for the
+    duration of a query. Results are written under ``system_lock``.
+    """
+
+    def __init__(
+        self,
+        system,
+        signals: Callable[[], dict[str, Any]] | None = None,
+        system_lock: threading.Lock | None = None,
+    ) -> None:
+        self.system = system
+        idle_cfg = system.config.get("processing", {}).get("idle", {})
+        enforcement = system.config.get("runtime", {}).get("mode_enforcement", {})
+        self.cpu_workers = max(1, int(idle_cfg.get("max_concurrency_cpu", 2)))
+        self.gpu_slots = max(0, int(idle_cfg.get("max_concurrency_gpu", 1)))
+        self.poll_s = max(1, int(idle_cfg.get("poll_ms", 50))) / 1000
+        self.checkpoint_every = max(1, int(idle_cfg.get("checkpoint_every", 16)))
+        self.max_attempts = max(1, int(idle_cfg.get("max_attempts", 3)))
+        self.refill_interval_s = max(0, int(idle_cfg.get("refill_interval_s", 60)))
+        self.suspend_workers = bool(enforcement.get("suspend_workers", True))
+        self.suspend_deadline_s = int(enforcement.get("suspend_deadline_ms", 100)) / 1000
+        self.keyframes = KeyframeConfig.from_config(system.config)
+        data_dir = system.config.get("storage", {}).get("data_dir", "data")
+        self.queue = ExtractionQueue(Path(data_dir) / "run" / "extract_queue.json")
+        self._signals = signals or input_signals(system)
+        self._system_lock = system_lock or threading.Lock()
+        self._gpu = threading.BoundedSemaphore(self.gpu_slots) if self.gpu_slots else None
+        self._running = threading.Event()
+        self._stop = threading.Event()
+        self._state_lock = threading.Condition()
+        self._active = 0
+        self._holds = 0
+        self._since_checkpoint = 0
+        self._last_refill: float | None = None
+        self._last_index: float | None = None
+        self._index_backlog = True
+        self._threads: list[threading.Thread] = []
+        self.mode = "ACTIVE_CAPTURE_ONLY"
+        self.stats: dict[str, Any] = {
+            "extracted": 0,
+            "empty": 0,
+            "failed": 0,
+            "dropped": 0,
+            "indexed": 0,
+            "checkpoint_errors": 0,
+            "suspends": 0,
+            "suspend_overruns": 0,
+            "last_suspend_ms": 0.0,
+        }
+
+    # control -------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._control_loop, name="idle-drain-control", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._worker_loop, name=f"idle-drain-{idx}", daemon=True) for idx in range(self.cpu_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        if not self._threads:
+            return
+        self._stop.set()
+        self.suspend()
+        for thread in self._threads:
+            thread.join(timeout=max(1.0, self.suspend_deadline_s * 10))
+        self._threads = []
+        self._checkpoint(force=True)
+
+    def step(self) -> str:
+        """Ask the governor for the current mode and resume or suspend accordingly."""
+        with self._state_lock:
+            held = self._holds > 0
+        signals = dict(self._signals())
+        if held:
+            signals["query_intent"] = True
+        mode = self.system.get("runtime.governor").next_mode(signals)
+        changed = mode != self.mode
+        if mode == "IDLE_DRAIN":
+            self._maybe_refill()
+            self._maybe_index()
+            self.mode = mode
+            self._running.set()
+        else:
+            self.mode = mode
+            if self._running.is_set():
+                self.suspend()
+        if changed:
+            self._notify_models(mode)
+        return mode
+
+    def _notify_models(self, mode: str) -> None:
+        """Tell GPU-backed plugins about the new mode, so the VLM can release VRAM."""
+        if not self.system.has("vision.extractor"):
+            return
+        try:
+            status = notify_mode(self.system.get("vision.extractor"), mode)
+        except Exception:
+            return
+        if status is not None:
+            self.stats["vlm"] = status
+
+    def suspend(self) -> bool:
+        """Stop claiming work and wait up to the suspend deadline for workers to park."""
+        self._running.clear()
+        start = time.monotonic()
+        deadline = start + self.suspend_deadline_s
+        with self._state_lock:
+            # Without suspend_workers, in-flight segments are left to finish on their own.
+            while self.suspend_workers and self._active and time.monotonic() < deadline:
+                self._state_lock.wait(timeout=max(0.001, deadline - time.monotonic()))
+            parked = self._active == 0
+            self.stats["suspends"] += 1
+            self.stats["last_suspend_ms"] = round((time.monotonic() - start) * 1000, 3)
+            if not parked:
+                self.stats["suspend_overruns"] += 1
+        self._checkpoint(force=True)
+        return parked
+
+    @contextlib.contextmanager
+    def hold(self) -> Iterator[None]:
+        """Keep the scheduler suspended (``USER_QUERY``) while the block runs."""
+        with self._state_lock:
+            self._holds += 1
+        try:
+            self.suspend()
+            yield
+        finally:
+            with self._state_lock:
+                self._holds -= 1
+
+    def _control_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except Exception:
+                self._running.clear()
+            self._stop.wait(self.poll_s)
+
+    def _maybe_refill(self) -> None:
+        now = time.monotonic()
+        if self._last_refill is not None and (len(self.queue) or now - self._last_refill < self.refill_interval_s):
+            return
+        self._last_refill = now
+        self.queue.refill(self.system.get("storage.metadata"))
+
+    def _maybe_index(self) -> None:
+        """Embed stored records that have text but no vector yet, ``_INDEX_BATCH`` per poll.
+
+        Extracted segments are indexed as they are written; this picks up
+        everything else (window titles, records written with text). Once a
+        pass finds no backlog, the next waits ``refill_interval_s``.
+        """
+        if not self.system.has("retrieval.vector"):
+            return
+        now = time.monotonic()
+        if not self._index_backlog and self._last_index is not None and now - self._last_index < self.refill_interval_s:
+            return
+        self._last_index = now
+        with self._system_lock:
+            indexed = int(self.system.get("retrieval.vector").index_pending(limit=_INDEX_BATCH))
+        self._index_backlog = indexed >= _INDEX_BATCH
+        with self._state_lock:
+            self.stats["indexed"] += indexed
+
+    def _checkpoint(self, force: bool = False) -> None:
+        with self._state_lock:
+            due = force or self._since_checkpoint >= self.checkpoint_every
+            if due:
+                self._since_checkpoint = 0
+        if not due:
+            return
+        if self.system.has("retrieval.vector"):
+            with self._system_lock:
+                self.system.get("retrieval.vector").flush()
+        self.queue.checkpoint()
+
+    # workers -------------------------------------------------------------
+
+    def _count(self, key: str) -> None:
+        with self._state_lock:
+            self.stats[key] += 1
+
+    def _check(self) -> None:
+        if self.suspend_workers and not self._running.is_set():
+            raise _Suspended()
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            if not self._running.wait(timeout=self.poll_s):
+                continue
+            with self._state_lock:
+                if not self._running.is_set():
+                    continue
+                self._active += 1
+            record_id = None
+            try:
+                record_id = self.queue.claim()
+                if record_id is None:
+                    self._stop.wait(self.poll_s)
+                    continue
+                self._process(record_id)
+                self.queue.complete(record_id)
+                with self._state_lock:
+                    self._since_checkpoint += 1
+            except _Suspended:
+                if record_id is not None:
+                    self.queue.release(record_id)
+            except Exception:
+                if record_id is not None:
+                    self._count("failed")
+                    if self.queue.fail(record_id, self.max_attempts):
+                        self._count("dropped")
+            finally:
+                with self._state_lock:
+                    self._active -= 1
+                    self._state_lock.notify_all()
+            try:
+                self._checkpoint()
+            except Exception:
+                # A failed checkpoint (disk full, index flush error) must not end the worker;
+                # the next one rewrites the whole state.
+                self._count("checkpoint_errors")
+
+    def _acquire_gpu(self) -> bool:
+        if self._gpu is None:
+            return False
+        while not self._gpu.acquire(timeout=self.poll_s):
+            self._check()
+        return True
+
+    def _process(self, record_id: str) -> None:
+        metadata = self.system.get("storage.metadata")
+        record = metadata.get(record_id, {}) or {}
+        if not needs_extraction(record):
+            return
+        self._check()
+        frames = segment_frames(self.system.get("storage.media"), record_id, self.keyframes)
+        if not frames:
+            return
+        ocr = self.system.get("ocr.engine")
+        cache = self.system.get("extraction.cache") if self.system.has("extraction.cache") else None
+        parts: list[tuple[str, str] | None] = [None] * len(frames)
+        self._check()
+        if self._acquire_gpu():
+            try:
+                texts = vlm_frames(self.system.get("vision.extractor"), [frame for _name, frame in frames], cache)
+                parts = [None if text is None else (text, "vlm") for text in texts]
+            finally:
+                self._gpu.release()
+        self._check()
+        # Frames the VLM did not handle (or all of them, without a GPU slot) are OCR'd in one batch.
+        pending = [idx for idx, part in enumerate(parts) if part is None]
+        for idx, text in zip(pending, ocr_frames(ocr, [frames[idx][1] for idx in pending], cache)):
+            parts[idx] = (text, "ocr")
+        self._check()
+        text, source = merge_extractions([part for part in parts if part is not None])
+        with self._system_lock:
+            record = metadata.get(record_id, {}) or {}
+            if not needs_extraction(record):
+                return
+            record["text"] = text
+            record["text_source"] = source
+            record["keyframes"] = [name for name, _frame in frames]
+            metadata.put(record_id, record)
+            if text and self.system.has("retrieval.vector"):
+                self.system.get("retrieval.vector").index_record(record_id, record, flush=False)
+        self._count("extracted" if text else "empty")
@@ -29,6 +29,10 @@ def rotate_keys(system) -> dict[str, Any]:
     entity = system.get("storage.entity_map")
     if hasattr(entity, "rotate"):
         rotated["entity_map"] = entity.rotate(entity_key)
+    if system.has("retrieval.vector"):
+        rotated["vector_index"] = system.get("retrieval.vector").rotate()
+    if system.has("extraction.cache"):
+        rotated["extraction_cache"] = system.get("extraction.cache").rewrite()
 
     policy_snapshot_hash = sha256_text(dumps(system.config))
     ts = datetime.now(timezone.utc).isoformat()
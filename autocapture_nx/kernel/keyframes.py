@@ -0,0 +1,107 @@
+"""Keyframe selection for segment extraction.
+
+Segments are zips of ``frame_<n>.jpg`` members. Instead of extracting only the
+first member, frames are decoded at thumbnail size and compared with the last
+selected keyframe; a frame whose mean absolute difference reaches
+``min_change_pct`` starts a new scene. At most ``max_per_segment`` keyframes
+are kept: the first frame plus the largest scene changes, in capture order.
+"""
+
+from __future__ import annotations
+
+import io
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import Any
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def frame_order(names: list[str]) -> list[str]:
+    """Sort member names naturally, so ``frame_10`` follows ``frame_9``."""
+
+    def key(name: str) -> list[Any]:
+        return [int(part) if part.isdigit() else part for part in _DIGITS.split(name)]
+
+    return sorted(names, key=key)
+
+
+@dataclass(frozen=True)
+class KeyframeConfig:
+    max_per_segment: int = 4
+    min_change_pct: int = 8
+    thumb_px: int = 32
+    max_scan_frames: int = 240
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "KeyframeConfig":
+        cfg = config.get("processing", {}).get("keyframes", {})
+        return cls(
+            max_per_segment=max(1, int(cfg.get("max_per_segment", cls.max_per_segment))),
+            min_change_pct=int(cfg.get("min_change_pct", cls.min_change_pct)),
+            thumb_px=max(4, int(cfg.get("thumb_px", cls.thumb_px))),
+            max_scan_frames=max(1, int(cfg.get("max_scan_frames", cls.max_scan_frames))),
+        )
+
+
+def _thumbnail(data: bytes, size: int):
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    # JPEG draft mode decodes at 1/2..1/8 scale straight from the DCT coefficients.
+    image.draft("L", (size * 4, size * 4))
+    return image.convert("L").resize((size, size), Image.BILINEAR)
+
+
+def _change_pct(a, b) -> float:
+    from PIL import ImageChops, ImageStat
+
+    return ImageStat.Stat(ImageChops.difference(a, b)).mean[0] * 100 / 255
+
+
+def dhash(data: bytes, size: int = 8) -> str:
+    """Difference hash (``size``² bits): near-identical screens (cursor blink, re-encoding) hash alike."""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    image.draft("L", ((size + 1) * 8, size * 8))
+    pixels = image.convert("L").resize((size + 1, size), Image.BILINEAR).tobytes()
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left, right = pixels[row * (size + 1) + col], pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{size * size // 4}x}"
+
+
+def select_keyframes(zf: zipfile.ZipFile, config: KeyframeConfig) -> list[str]:
+    """Return the member names to extract, in capture order."""
+    names = frame_order(zf.namelist())
+    if len(names) <= 1 or config.max_per_segment == 1:
+        return names[:1]
+    stride = -(-len(names) // config.max_scan_frames)
+    scanned = names[::stride]
+    try:
+        last = _thumbnail(zf.read(scanned[0]), config.thumb_px)
+    except Exception:
+        # Not a decodable image (or Pillow is missing): fall back to the first frame.
+        return names[:1]
+    changes: list[tuple[float, int]] = []
+    for idx in range(1, len(scanned)):
+        try:
+            thumb = _thumbnail(zf.read(scanned[idx]), config.thumb_px)
+        except Exception:
+            continue
+        score = _change_pct(last, thumb)
+        if score >= config.min_change_pct:
+            changes.append((score, idx))
+            last = thumb
+    kept = sorted(changes, key=lambda item: (-item[0], item[1]))[: config.max_per_segment - 1]
+    return [scanned[0]] + [scanned[idx] for idx in sorted(idx for _, idx in kept)]
+
+
+def segment_keyframes(blob: bytes, config: KeyframeConfig) -> list[tuple[str, bytes]]:
+    """Open a segment zip and return ``(name, frame bytes)`` for its keyframes."""
+    with zipfile.ZipFile(io.BytesIO(blob)) as zf:
+        return [(name, zf.read(name)) for name in select_keyframes(zf, config)]
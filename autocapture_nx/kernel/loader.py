@@ -2,13 +2,29 @@
 
 from __future__ import annotations
 
+import os
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from autocapture_nx.kernel.config import ConfigPaths, load_config, validate_config
-from autocapture_nx.kernel.errors import ConfigError
-from autocapture_nx.plugin_system.registry import PluginRegistry
+from autocapture_nx.kernel.boot_snapshot import (
+    BootSnapshot,
+    BootSnapshotStore,
+    fingerprint_inputs,
+    plugin_inputs,
+)
+from autocapture_nx.kernel.config import ConfigPaths, load_config, merge_config, validate_config
+from autocapture_nx.kernel.crypto import derive_key
+from autocapture_nx.kernel.errors import AutocaptureError, ConfigError, PluginError
+from autocapture_nx.kernel.extraction_cache import ExtractionCache
+from autocapture_nx.kernel.keyring import KeyRing
+from autocapture_nx.kernel.metrics import MetricsRegistry
+from autocapture_nx.kernel.profiler import Profiler
+from autocapture_nx.kernel.query_cache import QueryCache
+from autocapture_nx.kernel.rerank import RerankStage
+from autocapture_nx.kernel.tracing import configure_tracing
+from autocapture_nx.plugin_system.registry import CapabilityRegistry, PluginRegistry
 
 from .system import System
 
@@ -20,27 +36,181 @@ class DoctorCheck:
     detail: str
 
 
+@dataclass
+class BootStats:
+    mode: str
+    boot_ms: int
+    cold_boot_ms: int | None
+
+
 class Kernel:
-    def __init__(self, config_paths: ConfigPaths, safe_mode: bool = False) -> None:
+    def __init__(self, config_paths: ConfigPaths, safe_mode: bool = False, use_snapshot: bool = True) -> None:
         self.config_paths = config_paths
         self.safe_mode = safe_mode
         self.config: dict[str, Any] = {}
         self.system: System | None = None
+        self.boot_stats: BootStats | None = None
+        self._snapshots: BootSnapshotStore | None = None
+        if use_snapshot and config_paths.snapshot_path is not None:
+            path = Path(config_paths.snapshot_path)
+            if safe_mode:
+                path = path.with_name(f"{path.stem}_safe{path.suffix}")
+            self._snapshots = BootSnapshotStore(path)
+
+    def config_fingerprint(self) -> str:
+        files = [self.config_paths.default_path, self.config_paths.schema_path]
+        if not self.safe_mode:
+            files.append(self.config_paths.user_path)
+        return fingerprint_inputs(files, salt=f"safe_mode={self.safe_mode}")
 
     def boot(self) -> System:
-        self.config = load_config(self.config_paths, safe_mode=self.safe_mode)
+        started = time.perf_counter()
+        # Unvalidated: a warm boot only needs the keyring path; a cold boot validates it once.
+        raw_config = merge_config(self.config_paths, safe_mode=self.safe_mode) if self._snapshots else None
+        config_fingerprint = self.config_fingerprint() if self._snapshots else ""
+        key = self._snapshot_key(raw_config) if raw_config is not None else None
+        snapshot = self._snapshots.load(config_fingerprint, key) if self._snapshots and key else None
+        if snapshot is not None:
+            system = self._boot_warm(snapshot)
+            if system is not None:
+                self.system = system
+                boot_ms = int((time.perf_counter() - started) * 1000)
+                self.boot_stats = BootStats("warm", boot_ms, snapshot.cold_boot_ms)
+                configure_tracing(self.config)
+                return self.system
+
+        registry, resolved = self._boot_cold(raw_config)
+        boot_ms = int((time.perf_counter() - started) * 1000)
+        self.boot_stats = BootStats("cold", boot_ms, boot_ms)
+        if raw_config is not None:
+            # On first boot the keyring only exists once the storage plugin has created it.
+            key = key or self._snapshot_key(raw_config)
+            if key is not None:
+                self._save_snapshot(self._snapshots, key, config_fingerprint, registry, resolved, boot_ms)
+        configure_tracing(self.config)
+        return self.system
+
+    def shutdown(self) -> None:
+        """Close every plugin, last loaded first, so buffers, pools and models are released.
+
+        Safe to call more than once; a plugin that fails to close does not
+        stop the others.
+        """
+        system, self.system = self.system, None
+        if system is None:
+            return
+        for plugin in reversed(system.plugins):
+            close = getattr(plugin.instance, "close", None)
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception:
+                continue
+
+    def _boot_cold(
+        self, raw_config: dict[str, Any] | None = None
+    ) -> tuple[PluginRegistry, list[tuple[Path, dict[str, Any]]]]:
+        if raw_config is None:
+            self.config = load_config(self.config_paths, safe_mode=self.safe_mode)
+        else:
+            validate_config(self.config_paths.schema_path, raw_config)
+            self.config = raw_config
         registry = PluginRegistry(self.config, safe_mode=self.safe_mode)
-        plugins, capabilities = registry.load_plugins()
+        resolved = registry.resolve_plugins()
+        plugins, capabilities = registry.load_plugins(resolved, capabilities=self._kernel_capabilities(registry))
 
         updated = self._apply_meta_plugins(self.config, plugins)
         if updated != self.config:
             validate_config(self.config_paths.schema_path, updated)
             self.config = updated
             registry = PluginRegistry(self.config, safe_mode=self.safe_mode)
-            plugins, capabilities = registry.load_plugins()
+            resolved = registry.resolve_plugins()
+            plugins, capabilities = registry.load_plugins(resolved, capabilities=self._kernel_capabilities(registry))
 
         self.system = System(config=self.config, plugins=plugins, capabilities=capabilities)
-        return self.system
+        return registry, resolved
+
+    def _kernel_capabilities(self, registry: PluginRegistry) -> CapabilityRegistry:
+        """Capability registry pre-populated with the kernel's own services."""
+        metrics_cfg = self.config.get("observability", {}).get("metrics", {})
+        metrics = MetricsRegistry(enabled=bool(metrics_cfg.get("enabled", False)))
+        capabilities = CapabilityRegistry(metrics)
+        capabilities.register_kernel("observability.metrics", metrics)
+        capabilities.register_kernel("devtools.profiler", Profiler(self.config, hosts=lambda: list(registry.hosts)))
+        capabilities.register_kernel(
+            "retrieval.rerank",
+            RerankStage(self.config, lambda: capabilities.get("reranker") if capabilities.has("reranker") else None),
+        )
+        capabilities.register_kernel("query.cache", QueryCache(self.config))
+        capabilities.register_kernel(
+            "extraction.cache",
+            ExtractionCache(
+                self.config,
+                lambda: capabilities.get("storage.keyring") if capabilities.has("storage.keyring") else None,
+                metrics,
+            ),
+        )
+        return capabilities
+
+    def _snapshot_key(self, raw_config: dict[str, Any]) -> bytes | None:
+        """HMAC key for boot snapshots, derived from the active keyring key.
+
+        Reads an existing keyring only; creating or migrating one is left to
+        the storage plugin, so without a keyring there is no snapshot.
+        """
+        try:
+            keyring_path = raw_config.get("storage", {}).get("crypto", {}).get("keyring_path", "data/vault/keyring.json")
+            if not os.path.exists(keyring_path):
+                return None
+            _key_id, root = KeyRing.load(keyring_path).active_key()
+        except (AutocaptureError, OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+        return derive_key(root, "boot_snapshot")
+
+    def _boot_warm(self, snapshot: BootSnapshot) -> System | None:
+        # Config, manifests and the capability map come from the authenticated
+        # snapshot and meta plugins already ran. Plugin artifacts are still
+        # re-hashed against the lockfile, since mtime and size can be forged;
+        # a mismatch falls back to a cold boot, which reports it.
+        self.config = snapshot.config
+        registry = PluginRegistry(self.config, safe_mode=self.safe_mode)
+        resolved = [(Path(item["path"]), item["manifest"]) for item in snapshot.manifests]
+        try:
+            registry.verify_locks(resolved)
+        except (PluginError, OSError, ValueError):
+            return None
+        plugins, capabilities = registry.load_plugins(
+            resolved,
+            capability_map=snapshot.capability_map,
+            capabilities=self._kernel_capabilities(registry),
+        )
+        return System(config=self.config, plugins=plugins, capabilities=capabilities)
+
+    def _save_snapshot(
+        self,
+        store: BootSnapshotStore,
+        key: bytes,
+        config_fingerprint: str,
+        registry: PluginRegistry,
+        resolved: list[tuple[Path, dict[str, Any]]],
+        boot_ms: int,
+    ) -> None:
+        files, roots = plugin_inputs(self.config)
+        snapshot = BootSnapshot(
+            config_fingerprint=config_fingerprint,
+            plugin_fingerprint=fingerprint_inputs(files, roots),
+            config=self.config,
+            manifests=[{"path": path.as_posix(), "manifest": manifest} for path, manifest in resolved],
+            locks=registry.lock_results,
+            capability_map=registry.capability_map,
+            cold_boot_ms=boot_ms,
+        )
+        try:
+            store.save(snapshot, key)
+        except OSError:
+            # A read-only config dir only costs the warm path.
+            pass
 
     def _apply_meta_plugins(self, config: dict[str, Any], plugins: list) -> dict[str, Any]:
         updated = dict(config)
@@ -132,6 +302,13 @@ class Kernel:
                     detail="ok",
                 )
             )
+        if self.boot_stats is not None:
+            stats = self.boot_stats
+            detail = f"{stats.mode} boot {stats.boot_ms}ms"
+            if stats.mode == "warm":
+                cold = f"{stats.cold_boot_ms}ms" if stats.cold_boot_ms is not None else "unknown"
+                detail += f" (cold {cold})"
+            checks.append(DoctorCheck(name="boot_snapshot", ok=True, detail=detail))
         return checks
 
 
@@ -141,4 +318,5 @@ def default_config_paths() -> ConfigPaths:
         user_path=Path("config/user.json"),
         schema_path=Path("contracts/config_schema.json"),
         backup_dir=Path("config/backup"),
+        snapshot_path=Path("config/cache/boot_snapshot.json"),
     )
@@ -0,0 +1,435 @@
+"""Fixed-memory latency histograms and per-capability call statistics."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+# Values below 2 * _SUB_BUCKETS get exact buckets; above that every power of
+# two is split into _SUB_BUCKETS buckets (relative error <= 1/_SUB_BUCKETS).
+_SUB_BUCKETS = 16
+_SUB_BITS = _SUB_BUCKETS.bit_length()  # bits kept when bucketing large values
+_MAX_EXPONENT = 40  # ~12.7 days in microseconds; larger values clamp
+_BUCKETS = 2 * _SUB_BUCKETS + _MAX_EXPONENT * _SUB_BUCKETS
+
+
+def _bucket_index(value: int) -> int:
+    if value < 2 * _SUB_BUCKETS:
+        return value if value > 0 else 0
+    shift = value.bit_length() - _SUB_BITS
+    if shift > _MAX_EXPONENT:
+        return _BUCKETS - 1
+    return 2 * _SUB_BUCKETS + (shift - 1) * _SUB_BUCKETS + ((value >> shift) - _SUB_BUCKETS)
+
+
+def _bucket_upper(index: int) -> int:
+    if index < 2 * _SUB_BUCKETS:
+        return index
+    shift, offset = divmod(index - 2 * _SUB_BUCKETS, _SUB_BUCKETS)
+    shift += 1
+    return ((_SUB_BUCKETS + offset + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of integer microsecond values.
+
+    Memory is bounded by a fixed bucket count regardless of how many values
+    are recorded; percentiles are accurate to roughly 6%.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        self.counts[_bucket_index(value)] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, pct: float) -> int:
+        if self.count == 0:
+            return 0
+        target = max(1, int(round(self.count * pct / 100.0)))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            if not bucket:
+                continue
+            seen += bucket
+            if seen >= target:
+                if index == _BUCKETS - 1:
+                    return self.max
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": (self.total / self.count) if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class CallStats:
+    __slots__ = ("calls", "errors", "latency_us", "_lock")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.latency_us = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_us: int, failed: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.errors += 1
+            self.latency_us.record(elapsed_us)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.latency_us = LatencyHistogram()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "total_us": self.latency_us.total,
+                "latency_us": self.latency_us.snapshot(),
+            }
+
+
+class CapabilityMetrics:
+    """Call counts, error counts and latency per ``capability.method``.
+
+    Registered as the ``observability.metrics`` capability. When disabled the
+    capability registry installs no instrumentation at all.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._stats: dict[str, CallStats] = {}
+        self._lock = threading.Lock()
+
+    def stats(self, key: str) -> CallStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(key, CallStats())
+        return stats
+
+    def timed(self, key: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        stats = self.stats(key)
+        clock = time.perf_counter_ns
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            started = clock()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                stats.record((clock() - started) // 1000, failed)
+
+        return call
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            items = list(self._stats.items())
+        calls = {key: stats.snapshot() for key, stats in items}
+        return {"enabled": self.enabled, "calls": dict(sorted(calls.items()))}
+
+    def reset(self) -> None:
+        # Wrappers hold their CallStats, so reset in place rather than dropping them.
+        with self._lock:
+            items = list(self._stats.values())
+        for stats in items:
+            stats.reset()
+
+
+def _label_key(labels: dict[str, str] | None) -> tuple[tuple[str, str], ...]:
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _render_labels(labels: tuple[tuple[str, str], ...], extra: tuple[tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in items) + "}"
+
+
+def _series_name(name: str, labels: tuple[tuple[str, str], ...]) -> str:
+    return name + _render_labels(labels)
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int | float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def set(self, value: int | float) -> None:
+        self.value = value
+
+
+class Histogram:
+    __slots__ = ("_hist", "_lock")
+
+    def __init__(self) -> None:
+        self._hist = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def observe(self, value: int | float) -> None:
+        with self._lock:
+            self._hist.record(int(value))
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return self._hist.snapshot() | {"sum": self._hist.total}
+
+
+_QUANTILES = (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99"))
+
+
+class MetricsRegistry(CapabilityMetrics):
+    """Counters, gauges and histograms alongside per-capability call stats.
+
+    Plugins obtain it through the ``observability.metrics`` capability (see
+    ``plugin_metrics``). Metric objects are created once per name + labels and
+    are cheap to update from hot loops.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        super().__init__(enabled)
+        self._series: dict[str, dict[tuple[tuple[str, str], ...], Any]] = {}
+        self._kinds: dict[str, str] = {}
+        self._help: dict[str, str] = {}
+
+    def _metric(self, kind: str, factory, name: str, labels: dict[str, str] | None, help_text: str):
+        key = _label_key(labels)
+        series = self._series.get(name)
+        if series is not None:
+            metric = series.get(key)
+            if metric is not None:
+                return metric
+        with self._lock:
+            known = self._kinds.setdefault(name, kind)
+            if known != kind:
+                raise ValueError(f"metric {name} already registered as {known}")
+            if help_text:
+                self._help.setdefault(name, help_text)
+            return self._series.setdefault(name, {}).setdefault(key, factory())
+
+    def counter(self, name: str, labels: dict[str, str] | None = None, help: str = "") -> Counter:
+        return self._metric("counter", Counter, name, labels, help)
+
+    def gauge(self, name: str, labels: dict[str, str] | None = None, help: str = "") -> Gauge:
+        return self._metric("gauge", Gauge, name, labels, help)
+
+    def histogram(self, name: str, labels: dict[str, str] | None = None, help: str = "") -> Histogram:
+        return self._metric("histogram", Histogram, name, labels, help)
+
+    def _items(self) -> list[tuple[str, str, list[tuple[tuple[tuple[str, str], ...], Any]]]]:
+        with self._lock:
+            return [
+                (name, self._kinds[name], list(series.items()))
+                for name, series in sorted(self._series.items())
+            ]
+
+    def snapshot(self) -> dict[str, Any]:
+        snap = super().snapshot()
+        counters: dict[str, Any] = {}
+        gauges: dict[str, Any] = {}
+        histograms: dict[str, Any] = {}
+        for name, kind, series in self._items():
+            for labels, metric in series:
+                key = _series_name(name, labels)
+                if kind == "counter":
+                    counters[key] = metric.value
+                elif kind == "gauge":
+                    gauges[key] = metric.value
+                else:
+                    histograms[key] = metric.snapshot()
+        snap.update({"counters": counters, "gauges": gauges, "histograms": histograms})
+        return snap
+
+    def prometheus_text(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for name, kind, series in self._items():
+            if self._help.get(name):
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {'summary' if kind == 'histogram' else kind}")
+            for labels, metric in series:
+                if kind == "histogram":
+                    snap = metric.snapshot()
+                    for quantile, field in _QUANTILES:
+                        lines.append(f"{name}{_render_labels(labels, (('quantile', quantile),))} {snap[field]}")
+                    lines.append(f"{name}_sum{_render_labels(labels)} {snap['sum']}")
+                    lines.append(f"{name}_count{_render_labels(labels)} {snap['count']}")
+                else:
+                    lines.append(f"{name}{_render_labels(labels)} {metric.value}")
+        calls = CapabilityMetrics.snapshot(self)["calls"]
+        if calls:
+            lines.append("# TYPE autocapture_capability_calls_total counter")
+            lines.extend(
+                f"autocapture_capability_calls_total{_render_labels((('method', key),))} {stats['calls']}"
+                for key, stats in calls.items()
+            )
+            lines.append("# TYPE autocapture_capability_errors_total counter")
+            lines.extend(
+                f"autocapture_capability_errors_total{_render_labels((('method', key),))} {stats['errors']}"
+                for key, stats in calls.items()
+            )
+            lines.append("# TYPE autocapture_capability_latency_us summary")
+            for key, stats in calls.items():
+                latency = stats["latency_us"]
+                for quantile, field in _QUANTILES:
+                    labels = (("method", key), ("quantile", quantile))
+                    lines.append(f"autocapture_capability_latency_us{_render_labels(labels)} {latency[field]}")
+                lines.append(f"autocapture_capability_latency_us_sum{_render_labels((('method', key),))} {stats['total_us']}")
+                lines.append(f"autocapture_capability_latency_us_count{_render_labels((('method', key),))} {stats['calls']}")
+        return "\n".join(lines) + "\n"
+
+
+def plugin_metrics(context: Any) -> MetricsRegistry:
+    """Return the kernel metrics registry for a plugin context.
+
+    Plugins that cannot reach it (e.g. subprocess-hosted ones) get a detached
+    registry so instrumentation code needs no special cases.
+    """
+    try:
+        metrics = context.get_capability("observability.metrics")
+    except Exception:
+        metrics = None
+    return metrics if isinstance(metrics, MetricsRegistry) else MetricsRegistry(enabled=False)
+
+
+class MetricsExporter:
+    """Periodically writes a rolling JSONL history and a Prometheus text file.
+
+    Files live under ``<data_dir>/metrics``: ``history.jsonl`` (rotated to
+    ``history.1.jsonl`` past ``history_max_bytes``) and ``metrics.prom``.
+    Nothing is served over the network.
+    """
+
+    def __init__(self, registry: MetricsRegistry, data_dir: str, interval_s: float, history_max_bytes: int) -> None:
+        self.registry = registry
+        self.data_dir = data_dir
+        self.interval_s = interval_s
+        self.history_max_bytes = history_max_bytes
+        self.metrics_dir = Path(data_dir) / "metrics"
+        self.history_path = self.metrics_dir / "history.jsonl"
+        self.prometheus_path = self.metrics_dir / "metrics.prom"
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_config(cls, registry: MetricsRegistry, config: dict[str, Any]) -> "MetricsExporter":
+        metrics_cfg = config.get("observability", {}).get("metrics", {})
+        return cls(
+            registry,
+            config.get("storage", {}).get("data_dir", "data"),
+            float(metrics_cfg.get("export_interval_s", 60)),
+            int(metrics_cfg.get("history_max_bytes", 1_048_576)),
+        )
+
+    def _sample(self) -> None:
+        try:
+            free = shutil.disk_usage(self.data_dir).free
+        except OSError:
+            return
+        self.registry.gauge("autocapture_disk_free_bytes", help="Free bytes on the data_dir volume").set(free)
+
+    def export_once(self) -> None:
+        self._sample()
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        snap = self.registry.snapshot()
+        calls = {
+            key: [stats["calls"], stats["errors"], stats["latency_us"]["p50"], stats["latency_us"]["p99"]]
+            for key, stats in snap["calls"].items()
+        }
+        histograms = {
+            key: [hist["count"], hist["sum"], hist["p50"], hist["p99"]] for key, hist in snap["histograms"].items()
+        }
+        record = {
+            "ts": round(time.time(), 3),
+            "counters": snap["counters"],
+            "gauges": snap["gauges"],
+            "histograms": histograms,
+            "calls": calls,
+        }
+        line = json.dumps(record, separators=(",", ":"), sort_keys=True) + "\n"
+        try:
+            if self.history_path.stat().st_size + len(line) > self.history_max_bytes:
+                os.replace(self.history_path, self.history_path.with_name("history.1.jsonl"))
+        except FileNotFoundError:
+            pass
+        with self.history_path.open("a", encoding="utf-8") as handle:
+            handle.write(line)
+        tmp_path = self.prometheus_path.with_suffix(".prom.tmp")
+        tmp_path.write_text(self.registry.prometheus_text(), encoding="utf-8")
+        os.replace(tmp_path, self.prometheus_path)
+
+    def start(self) -> None:
+        if self.interval_s <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.export_once()
+            except OSError:
+                continue
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.export_once()
+        except OSError:
+            pass
@@ -0,0 +1,201 @@
+"""Model residency and request coalescing for GPU-backed plugins."""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Iterator
+
+RELEASE_MODES = frozenset({"ACTIVE_CAPTURE_ONLY"})
+
+
+class ModelManager:
+    """Loads a model on first use and releases it on governor mode changes.
+
+    ``use()`` pins the model for one inference call, loading it if needed.
+    ``set_mode(mode)`` releases it on ``ACTIVE_CAPTURE_ONLY`` when
+    ``runtime.gpu.release_vram_on_active`` is set: calls in flight get
+    ``release_vram_deadline_ms`` to finish, and if one overruns the model is
+    dropped as soon as it returns. A later call loads it again, so a query
+    issued while the user is active still works, it just pays the load.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Any],
+        unload: Callable[[Any], None] | None = None,
+        release_on_active: bool = True,
+        release_deadline_ms: int = 250,
+    ) -> None:
+        self._load = load
+        self._unload = unload
+        self.release_on_active = release_on_active
+        self.release_deadline_s = max(0, release_deadline_ms) / 1000
+        self._model: Any = None
+        self._in_use = 0
+        self._release_pending = False
+        self._cond = threading.Condition()
+        self._load_lock = threading.Lock()
+        self.mode: str | None = None
+        self.stats: dict[str, Any] = {"loads": 0, "unloads": 0, "release_overruns": 0, "last_release_ms": 0.0}
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @contextlib.contextmanager
+    def use(self) -> Iterator[Any]:
+        with self._load_lock:
+            with self._cond:
+                # A new call cancels a deferred release: someone needs the model again.
+                self._release_pending = False
+                model = self._model
+                if model is not None:
+                    self._in_use += 1
+            if model is None:
+                model = self._load()
+                with self._cond:
+                    self._model = model
+                    self._in_use += 1
+                    self.stats["loads"] += 1
+        try:
+            yield model
+        finally:
+            with self._cond:
+                self._in_use -= 1
+                drop = self._release_pending and self._in_use == 0
+                self._cond.notify_all()
+            if drop:
+                self._drop()
+
+    def set_mode(self, mode: str) -> dict[str, Any]:
+        """Record a governor mode; release the model if the mode calls for it."""
+        self.mode = mode
+        if self.release_on_active and mode in RELEASE_MODES:
+            self.release()
+        return self.status()
+
+    def release(self) -> bool:
+        """Unload the model, waiting up to the deadline for in-flight calls.
+
+        Returns False when a call overran the deadline; the model is then
+        unloaded when that call returns.
+        """
+        start = time.monotonic()
+        deadline = start + self.release_deadline_s
+        with self._cond:
+            if self._model is None:
+                return True
+            while self._in_use and time.monotonic() < deadline:
+                self._cond.wait(timeout=max(0.001, deadline - time.monotonic()))
+            released = self._in_use == 0
+            if not released:
+                self._release_pending = True
+                self.stats["release_overruns"] += 1
+        if released:
+            self._drop()
+        self.stats["last_release_ms"] = round((time.monotonic() - start) * 1000, 3)
+        return released
+
+    def _drop(self) -> None:
+        with self._cond:
+            if self._model is None or self._in_use:
+                return
+            model, self._model = self._model, None
+            self._release_pending = False
+            self.stats["unloads"] += 1
+        if self._unload is not None:
+            self._unload(model)
+
+    def status(self) -> dict[str, Any]:
+        return {"mode": self.mode, "loaded": self.loaded, **self.stats}
+
+
+class BatchQueue:
+    """Coalesces concurrent requests into batches for one worker thread.
+
+    ``submit(items)`` blocks until every item has a result. The worker takes
+    up to ``max_batch`` pending items across all callers, waiting at most
+    ``wait_ms`` after the first arrives for the batch to fill, and hands them
+    to ``run_batch`` (which returns one result per item). An exception from
+    ``run_batch`` is raised to every caller in that batch.
+    """
+
+    def __init__(self, run_batch: Callable[[list[Any]], list[Any]], max_batch: int = 8, wait_ms: int = 5, name: str = "batch") -> None:
+        self._run_batch = run_batch
+        self.max_batch = max(1, max_batch)
+        self.wait_s = max(0, wait_ms) / 1000
+        self._name = name
+        self._pending: list[tuple[Any, Future]] = []
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self.batches = 0
+
+    def submit(self, items: list[Any]) -> list[Any]:
+        futures: list[Future] = [Future() for _ in items]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self._name} queue closed")
+            self._pending.extend(zip(items, futures))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name=self._name, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return [future.result() for future in futures]
+
+    def _next_batch(self) -> list[tuple[Any, Future]] | None:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            deadline = time.monotonic() + self.wait_s
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+            batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch :]
+            return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self.batches += 1
+            try:
+                results = self._run_batch([item for item, _future in batch])
+            except Exception as exc:
+                for _item, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_item, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self) -> None:
+        """Finish queued requests, then stop the worker."""
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            self._cond.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+
+def notify_mode(capability: Any, mode: str) -> dict[str, Any] | None:
+    """Forward a governor mode to ``capability.set_mode`` if it has one.
+
+    A subprocess-hosted plugin whose host has not started has nothing
+    loaded, so it is not started just to be told to release.
+    """
+    host = getattr(capability, "host", None)
+    if host is not None and not getattr(host, "started", True):
+        return None
+    set_mode = getattr(capability, "set_mode", None)
+    if set_mode is None:
+        return None
+    return set_mode(mode)
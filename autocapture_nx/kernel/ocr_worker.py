@@ -0,0 +1,99 @@
+"""OCR job run in ``ocr.engine`` pool workers.
+
+Kept in an importable module (not the plugin file, which the host loads by
+path) so ``ProcessPoolExecutor`` can pickle ``ocr_job`` on every platform.
+Each job decodes one image, converts it to grayscale, downsizes it so its
+longest side is at most ``max_side_px`` and runs the engine on it. Word boxes
+are reported in the original image's pixel coordinates.
+"""
+
+from __future__ import annotations
+
+import io
+from typing import Any
+
+ENGINES = ("tesseract", "stand_in")
+
+
+def require_engine(engine: str) -> None:
+    """Raise ``RuntimeError`` if ``engine`` cannot run in this environment."""
+    if engine not in ENGINES:
+        raise RuntimeError(f"Unknown OCR engine: {engine}")
+    try:
+        from PIL import Image  # noqa: F401
+
+        if engine == "tesseract":
+            import pytesseract  # noqa: F401
+    except Exception as exc:
+        raise RuntimeError(f"Missing OCR dependency: {exc}")
+
+
+def preprocess(image_bytes: bytes, max_side_px: int) -> tuple[Any, dict[str, Any], float]:
+    """Return ``(grayscale image, source info, scale)`` where scale maps back to source pixels."""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_bytes))
+    info = dict(image.info)
+    width, height = image.size
+    longest = max(width, height)
+    if max_side_px and longest > max_side_px:
+        # JPEG draft mode lets the decoder skip most of the work for large downscales.
+        image.draft("L", (max(1, width * max_side_px // longest), max(1, height * max_side_px // longest)))
+    gray = image.convert("L")
+    if max_side_px and max(gray.size) > max_side_px:
+        ratio = max_side_px / max(gray.size)
+        gray = gray.resize((max(1, round(gray.width * ratio)), max(1, round(gray.height * ratio))), Image.BILINEAR)
+    return gray, {"width": width, "height": height, "text": info.get("ocr_text", "")}, width / gray.width
+
+
+def _tesseract_words(gray: Any, scale: float) -> list[dict[str, Any]]:
+    import pytesseract
+
+    data = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT)
+    words = []
+    for idx, text in enumerate(data["text"]):
+        text = str(text).strip()
+        if not text:
+            continue
+        left, top = data["left"][idx], data["top"][idx]
+        right, bottom = left + data["width"][idx], top + data["height"][idx]
+        words.append(
+            {
+                "text": text,
+                "box": [round(left * scale), round(top * scale), round(right * scale), round(bottom * scale)],
+                "conf": float(data["conf"][idx]),
+                "line": [data["block_num"][idx], data["par_num"][idx], data["line_num"][idx]],
+            }
+        )
+    return words
+
+
+def _stand_in_words(source: dict[str, Any]) -> list[dict[str, Any]]:
+    """Deterministic stand-in: reads the PNG ``ocr_text`` chunk and lays words out in one row."""
+    tokens = str(source.get("text", "")).split()
+    if not tokens:
+        return []
+    cell = source["width"] // len(tokens)
+    return [
+        {"text": token, "box": [idx * cell, 0, (idx + 1) * cell, source["height"]], "conf": 100.0, "line": [0, 0, 0]}
+        for idx, token in enumerate(tokens)
+    ]
+
+
+def ocr_job(job: tuple[bytes, str, int]) -> dict[str, Any]:
+    """Run one image through preprocessing and ``engine``; bad images yield an ``error`` entry."""
+    image_bytes, engine, max_side_px = job
+    try:
+        gray, source, scale = preprocess(image_bytes, max_side_px)
+    except Exception as exc:
+        return {"text": "", "words": [], "error": f"Invalid OCR image bytes: {exc}"}
+    words = _tesseract_words(gray, scale) if engine == "tesseract" else _stand_in_words(source)
+    lines: dict[tuple[int, ...], list[str]] = {}
+    for word in words:
+        lines.setdefault(tuple(word["line"]), []).append(word["text"])
+    return {
+        "text": "\n".join(" ".join(line) for line in lines.values()),
+        "words": words,
+        "width": source["width"],
+        "height": source["height"],
+    }
@@ -0,0 +1,202 @@
+"""Wall-clock stack sampling profiler with collapsed-stack (flamegraph) output."""
+
+from __future__ import annotations
+
+import collections
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Callable, Iterable
+
+from autocapture_nx.kernel.errors import ProfilerError
+
+_MAX_DEPTH = 256
+
+
+def _frame_label(code: CodeType, cache: dict[CodeType, str]) -> str:
+    label = cache.get(code)
+    if label is None:
+        path = Path(code.co_filename)
+        name = getattr(code, "co_qualname", code.co_name)
+        label = f"{name} ({path.parent.name}/{path.name})"
+        cache[code] = label
+    return label
+
+
+class StackSampler:
+    """Samples every thread's Python stack at a fixed wall-clock interval.
+
+    Blocked and sleeping threads are sampled too, so the output shows where
+    time is spent rather than where CPU is burned. Samples are aggregated as
+    collapsed stacks (``thread;outer;...;inner`` -> count) while running, so
+    memory grows with the number of distinct stacks, not with duration.
+    """
+
+    def __init__(self, interval_s: float = 0.01, ignore_threads: Iterable[int] = ()) -> None:
+        self.interval_s = interval_s
+        self.samples = 0
+        self._ignore = set(ignore_threads)
+        self._counts: collections.Counter[str] = collections.Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for tid, frame in sys._current_frames().items():
+            if tid == own or tid in self._ignore:
+                continue
+            stack: list[str] = []
+            current: FrameType | None = frame
+            while current is not None and len(stack) < _MAX_DEPTH:
+                stack.append(_frame_label(current.f_code, self._labels))
+                current = current.f_back
+            stack.append(names.get(tid, f"thread-{tid}"))
+            stack.reverse()
+            self._counts[";".join(stack)] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.sample()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="autocapture-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> dict[str, int]:
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._thread = None
+        return dict(self._counts)
+
+
+def write_collapsed(path: str | Path, counts: dict[str, int]) -> Path:
+    """Write ``stack count`` lines as consumed by flamegraph.pl / speedscope / inferno."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with target.open("w", encoding="utf-8") as handle:
+        for stack, count in sorted(counts.items()):
+            handle.write(f"{stack} {count}\n")
+    return target
+
+
+class Profiler:
+    """The ``devtools.profiler`` kernel capability.
+
+    Profiles this process and, optionally, every subprocess plugin host that
+    is already running; hosts sample themselves and return their stacks over
+    the plugin pipe when the session stops.
+    """
+
+    def __init__(
+        self,
+        config: dict[str, Any],
+        hosts: Callable[[], Iterable[Any]] = lambda: (),
+        run_root: str | Path = Path("tools") / "hypervisor" / "runs",
+    ) -> None:
+        cfg = config.get("devtools", {}).get("profiler", {})
+        self.default_interval_ms = float(cfg.get("interval_ms", 10))
+        self.max_seconds = float(cfg.get("max_seconds", 600))
+        self.run_root = Path(run_root)
+        self._hosts = hosts
+        self._lock = threading.Lock()
+        self._sampler: StackSampler | None = None
+        self._session: dict[str, Any] = {}
+        self._profiled_hosts: list[Any] = []
+        self._started = 0.0
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {"running": self._sampler is not None, **self._session}
+
+    def start(self, interval_ms: float | None = None, include_hosts: bool = True) -> dict[str, Any]:
+        return self._start(interval_ms, include_hosts, ())
+
+    def _start(self, interval_ms: float | None, include_hosts: bool, ignore_threads: Iterable[int]) -> dict[str, Any]:
+        interval_ms = self.default_interval_ms if interval_ms is None else float(interval_ms)
+        if interval_ms <= 0:
+            raise ProfilerError("interval_ms must be positive")
+        with self._lock:
+            if self._sampler is not None:
+                raise ProfilerError("Profiler already running")
+            # Microseconds plus the pid keep back-to-back and cross-process sessions apart.
+            run_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}-{os.getpid()}"
+            self._session = {
+                "run_id": run_id,
+                "run_dir": str(self.run_root / run_id),
+                "interval_ms": interval_ms,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self._profiled_hosts = []
+            if include_hosts:
+                try:
+                    for host in self._hosts():
+                        if host.started:
+                            host.profile_start(interval_ms / 1000)
+                            self._profiled_hosts.append(host)
+                except Exception:
+                    for host in self._profiled_hosts:
+                        host.profile_stop()
+                    self._profiled_hosts = []
+                    raise
+            self._sampler = StackSampler(interval_ms / 1000, ignore_threads)
+            self._sampler.start()
+            self._started = time.monotonic()
+            return dict(self._session)
+
+    def stop(self) -> dict[str, Any]:
+        with self._lock:
+            sampler = self._sampler
+            if sampler is None:
+                raise ProfilerError("Profiler not running")
+            self._sampler = None
+            processes = {"kernel": (os.getpid(), sampler.stop(), sampler.samples)}
+            for host in self._profiled_hosts:
+                result = host.profile_stop()
+                processes[host.plugin_id] = (result["pid"], result["stacks"], result["samples"])
+            self._profiled_hosts = []
+            session = dict(self._session)
+            self._session = {}
+        merged: dict[str, int] = {}
+        for label, (_pid, stacks, _samples) in processes.items():
+            for stack, count in stacks.items():
+                merged[f"{label};{stack}"] = count
+        run_dir = Path(session["run_dir"])
+        collapsed = write_collapsed(run_dir / "profile.collapsed", merged)
+        summary = {
+            **session,
+            "duration_s": round(time.monotonic() - self._started, 3),
+            "collapsed": str(collapsed),
+            "processes": {
+                label: {"pid": pid, "samples": samples, "stacks": len(stacks)}
+                for label, (pid, stacks, samples) in processes.items()
+            },
+        }
+        with open(run_dir / "profile.json", "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2, sort_keys=True)
+        return summary
+
+    def profile(self, seconds: float, interval_ms: float | None = None, include_hosts: bool = True) -> dict[str, Any]:
+        """Sample for ``seconds`` and write ``tools/hypervisor/runs/<run_id>/profile.collapsed``."""
+        if not 0 < seconds <= self.max_seconds:
+            raise ProfilerError(f"seconds must be in (0, {self.max_seconds:g}]")
+        # The calling thread only waits; keep it out of the samples.
+        self._start(interval_ms, include_hosts, (threading.get_ident(),))
+        time.sleep(seconds)
+        return self.stop()
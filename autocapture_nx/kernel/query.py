@@ -2,93 +2,304 @@
 
 from __future__ import annotations
 
-import io
-import zipfile
-from datetime import datetime
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from datetime import datetime, timedelta
 from typing import Any
 
+from autocapture_nx.kernel.keyframes import KeyframeConfig, segment_keyframes
+from autocapture_nx.kernel.storage_bulk import chunks, get_many, put_many
+from autocapture_nx.kernel.time_window import parse_ts, within_window
+from autocapture_nx.kernel.tracing import get_tracer, span
 
-def _parse_ts(ts: str | None) -> datetime | None:
-    if not ts:
-        return None
-    if ts.endswith("Z"):
-        ts = ts[:-1] + "+00:00"
-    try:
-        return datetime.fromisoformat(ts)
-    except ValueError:
-        return None
+_CANDIDATE_BATCH = 256
 
 
-def _within_window(ts: str | None, window: dict[str, Any] | None) -> bool:
-    if not window:
-        return True
-    start = _parse_ts(window.get("start"))
-    end = _parse_ts(window.get("end"))
-    current = _parse_ts(ts)
-    if current is None:
-        return False
-    if start and current < start:
-        return False
-    if end and current > end:
+def _clamp_window(window: dict[str, Any] | None, max_minutes: int) -> dict[str, Any] | None:
+    """Shrink ``window`` to its most recent ``max_minutes`` (anchored on whichever bound is set)."""
+    if not window or max_minutes <= 0:
+        return window
+    start = parse_ts(window.get("start"))
+    end = parse_ts(window.get("end"))
+    span_limit = timedelta(minutes=max_minutes)
+    if end is not None and (start is None or end - start > span_limit):
+        return {**window, "start": (end - span_limit).isoformat()}
+    if start is not None and end is None:
+        return {**window, "end": (start + span_limit).isoformat()}
+    return window
+
+
+def _extraction_candidates(metadata, time_window: dict[str, Any] | None, max_minutes: int) -> list[str]:
+    """Records without extracted text, newest first, within the on-query window cap.
+
+    Without a query window the cap is measured back from the newest candidate;
+    undated records are then eligible after every dated one.
+    """
+    window = _clamp_window(time_window, max_minutes)
+    dated: list[tuple[datetime, str]] = []
+    undated: list[str] = []
+    for batch in chunks(list(getattr(metadata, "keys", lambda: [])()), _CANDIDATE_BATCH):
+        for record_id, record in get_many(metadata, batch, {}).items():
+            record = record or {}
+            if not needs_extraction(record):
+                continue
+            if not within_window(record.get("ts_utc"), window):
+                continue
+            ts = parse_ts(record.get("ts_utc"))
+            if ts is None:
+                undated.append(record_id)
+            else:
+                dated.append((ts, record_id))
+    dated.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    if time_window is None and dated and max_minutes > 0:
+        floor = dated[0][0] - timedelta(minutes=max_minutes)
+        dated = [item for item in dated if item[0] >= floor]
+    return [record_id for _, record_id in dated] + sorted(undated)
+
+
+def needs_extraction(record: dict[str, Any]) -> bool:
+    """True for capture segments with no extracted text and no recorded extraction attempt."""
+    if record.get("record_type", "evidence.capture.segment") != "evidence.capture.segment":
         return False
-    return True
+    return not record.get("text") and "text_source" not in record
+
+
+def segment_frames(media, record_id: str, keyframes: KeyframeConfig) -> list[tuple[str, bytes]]:
+    """Decrypt a segment and return ``(name, bytes)`` for its selected keyframes."""
+    blob = media.get(record_id)
+    if not blob:
+        return []
+    return segment_keyframes(blob, keyframes)
+
 
+def vlm_frames(vlm, frames: list[bytes], cache=None) -> list[str | None]:
+    """Describe ``frames`` in one ``extract_batch`` call when the VLM supports it.
+
+    ``None`` marks a frame the VLM could not handle; callers OCR those.
+    """
+    texts: list[str | None] = [cache.get("vlm", vlm, frame) if cache is not None else None for frame in frames]
+    misses = list(dict.fromkeys(frame for frame, text in zip(frames, texts) if text is None))
+    found: dict[bytes, str] = {}
+    batch = getattr(vlm, "extract_batch", None)
+    if misses and batch is not None:
+        try:
+            results = batch(misses)["results"]
+        except Exception:
+            results = []
+        for frame, result in zip(misses, results):
+            if "error" not in result:
+                found[frame] = result.get("text", "")
+    else:
+        for frame in misses:
+            try:
+                found[frame] = vlm.extract(frame).get("text", "")
+            except Exception:
+                continue
+    if cache is not None:
+        for frame, text in found.items():
+            cache.put("vlm", vlm, frame, text)
+    return [found.get(frame) if text is None else text for frame, text in zip(frames, texts)]
+
+
+def ocr_frames(ocr, frames: list[bytes], cache=None) -> list[str]:
+    """OCR ``frames`` in one ``extract_batch`` call when the engine supports it."""
+    texts: list[str | None] = [cache.get("ocr", ocr, frame) if cache is not None else None for frame in frames]
+    misses = list(dict.fromkeys(frames[idx] for idx, text in enumerate(texts) if text is None))
+    if not misses:
+        return texts  # type: ignore[return-value]
+    batch = getattr(ocr, "extract_batch", None)
+    if batch is None:
+        fresh = [ocr.extract(frame).get("text", "") for frame in misses]
+    else:
+        fresh = [result.get("text", "") for result in batch(misses)["results"]]
+    found = dict(zip(misses, fresh))
+    if cache is not None:
+        for frame, text in found.items():
+            cache.put("ocr", ocr, frame, text)
+    return [found[frame] if text is None else text for frame, text in zip(frames, texts)]
+
+
+def merge_extractions(parts: list[tuple[str, str]]) -> tuple[str, str]:
+    """Join per-keyframe ``(text, source)`` pairs, dropping repeated screens' text."""
+    texts: list[str] = []
+    for text, _source in parts:
+        if text and text not in texts:
+            texts.append(text)
+    return "\n".join(texts), "+".join(sorted({source for _text, source in parts}))
+
+
+def _extract_one(
+    media, vlm, ocr, record_id: str, keyframes: KeyframeConfig, cache=None
+) -> tuple[str, str, list[str]] | None:
+    frames = segment_frames(media, record_id, keyframes)
+    if not frames:
+        return None
+    parts: list[tuple[str, str] | None] = [
+        None if text is None else (text, "vlm") for text in vlm_frames(vlm, [frame for _name, frame in frames], cache)
+    ]
+    fallback = [idx for idx, part in enumerate(parts) if part is None]
+    for idx, text in zip(fallback, ocr_frames(ocr, [frames[idx][1] for idx in fallback], cache)):
+        parts[idx] = (text, "ocr")
+    text, source = merge_extractions([part for part in parts if part is not None])
+    return text, source, [name for name, _frame in frames]
+
+
+def extract_on_demand(
+    system,
+    time_window: dict[str, Any] | None,
+    limit: int | None = None,
+    budget_ms: int | None = None,
+) -> dict[str, Any]:
+    """Extract text for unprocessed segments in ``time_window`` on a bounded thread pool.
+
+    At most ``processing.on_query.max_segments`` segments (or ``limit``) are
+    submitted to ``max_workers`` threads. When the deadline
+    (``extract_budget_pct`` of ``performance.query_latency_ms`` unless
+    ``budget_ms`` is given) passes, queued segments are cancelled and the
+    ones already running are waited for, so no extraction outlives the call
+    (and the caller's locks). Those are counted as ``late``. Everything
+    extracted is persisted with one ``put_many``.
+    """
+    cfg = system.config.get("processing", {}).get("on_query", {})
+    max_workers = max(1, int(cfg.get("max_workers", 4)))
+    if limit is None:
+        limit = int(cfg.get("max_segments", 5))
+    if budget_ms is None:
+        latency_ms = int(system.config.get("performance", {}).get("query_latency_ms", 2000))
+        budget_ms = latency_ms * int(cfg.get("extract_budget_pct", 50)) // 100
+    deadline = time.monotonic() + budget_ms / 1000
 
-def extract_on_demand(system, time_window: dict[str, Any] | None, limit: int = 5) -> int:
     media = system.get("storage.media")
     metadata = system.get("storage.metadata")
     ocr = system.get("ocr.engine")
     vlm = system.get("vision.extractor")
+    vector = system.get("retrieval.vector") if system.has("retrieval.vector") else None
+    cache = system.get("extraction.cache") if system.has("extraction.cache") else None
 
-    processed = 0
-    for record_id in getattr(metadata, "keys", lambda: [])():
-        record = metadata.get(record_id, {})
-        if not _within_window(record.get("ts_utc"), time_window):
-            continue
-        if record.get("text"):
-            continue
-        blob = media.get(record_id)
-        if not blob:
-            continue
-        text = ""
+    candidates = _extraction_candidates(metadata, time_window, int(cfg.get("max_window_minutes", 120)))[:limit]
+    info: dict[str, Any] = {
+        "candidates": len(candidates),
+        "processed": 0,
+        "empty": 0,
+        "failed": 0,
+        "late": 0,
+        "timed_out": False,
+    }
+    if not candidates:
+        return info
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(candidates)), thread_name_prefix="extract")
+    keyframes = KeyframeConfig.from_config(system.config)
+    futures = {pool.submit(_extract_one, media, vlm, ocr, record_id, keyframes, cache): record_id for record_id in candidates}
+    extracted_by_id: dict[str, tuple[str, str, list[str]]] = {}
+    collected: set[Future] = set()
+
+    def collect(future: Future) -> None:
+        collected.add(future)
         try:
-            with zipfile.ZipFile(io.BytesIO(blob)) as zf:
-                names = sorted(zf.namelist())
-                if not names:
-                    continue
-                frame = zf.read(names[0])
-            try:
-                text = vlm.extract(frame).get("text", "")
-            except Exception:
-                text = ocr.extract(frame).get("text", "")
+            extracted = future.result()
         except Exception:
+            extracted = None
+        if extracted is None:
+            info["failed"] += 1
+        else:
+            extracted_by_id[futures[future]] = extracted
+
+    try:
+        for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+            collect(future)
+    except FuturesTimeout:
+        info["timed_out"] = True
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    for future in futures:
+        if future not in collected and not future.cancelled():
+            info["late"] += 1
+            collect(future)
+    # Persist empty results too, so later queries skip segments with no text.
+    records = get_many(metadata, extracted_by_id, {})
+    for record_id, (text, source, names) in extracted_by_id.items():
+        record = records[record_id] or {}
+        record["text"] = text
+        record["text_source"] = source
+        record["keyframes"] = names
+        records[record_id] = record
+    put_many(metadata, records)
+    for record_id, record in records.items():
+        if not record["text"]:
+            info["empty"] += 1
             continue
-        if text:
-            record["text"] = text
-            metadata.put(record_id, record)
-            processed += 1
-        if processed >= limit:
-            break
-    return processed
+        if vector is not None:
+            vector.index_record(record_id, record, flush=False)
+        info["processed"] += 1
+    if vector is not None and info["processed"]:
+        vector.flush()
+    return info
+
+
+def result_texts(metadata, results: list[dict[str, Any]]) -> tuple[dict[str, str], int]:
+    """Text per result id, and how many records had to be fetched.
+
+    Results that carry ``text`` from retrieval are used as is; the rest are
+    read in one ``get_many``, so each record is touched at most once.
+    """
+    texts = {result["record_id"]: str(result["text"] or "") for result in results if "text" in result}
+    missing = [result["record_id"] for result in results if result["record_id"] not in texts]
+    fetched = get_many(metadata, missing, {})
+    for record_id, record in fetched.items():
+        texts[record_id] = str((record or {}).get("text", "") or "")
+    return texts, len(fetched)
 
 
 def run_query(system, query: str) -> dict[str, Any]:
+    with span("query"):
+        return _run_query(system, query)
+
+
+def _run_query(system, query: str) -> dict[str, Any]:
     parser = system.get("time.intent_parser")
-    retrieval = system.get("retrieval.strategy")
+    # Hybrid vector + lexical retrieval when available, plain lexical otherwise.
+    retrieval = system.get("retrieval.vector") if system.has("retrieval.vector") else system.get("retrieval.strategy")
     answer = system.get("answer.builder")
 
-    intent = parser.parse(query)
+    with span("query.parse"):
+        intent = parser.parse(query)
     time_window = intent.get("time_window")
-    results = retrieval.search(query, time_window=time_window)
-    if not results and system.config.get("processing", {}).get("on_query", {}).get("allow_decode_extract", True):
-        extract_on_demand(system, time_window)
+    metadata = system.get("storage.metadata")
+    cache = system.get("query.cache") if system.has("query.cache") else None
+    version = None
+    if cache is not None:
+        with span("query.cache") as cache_span:
+            # Read the version first: writes that land while the query runs must invalidate it.
+            version = cache.version(metadata)
+            cached = cache.get(query, time_window, metadata)
+            cache_span.set("hit", cached is not None)
+        if cached is not None:
+            return {"intent": intent, **cached}
+    with span("query.retrieve") as retrieve_span:
         results = retrieval.search(query, time_window=time_window)
+        retrieve_span.set("results", len(results))
+    if not results and system.config.get("processing", {}).get("on_query", {}).get("allow_decode_extract", True):
+        with span("query.extract") as extract_span:
+            for key, value in extract_on_demand(system, time_window).items():
+                extract_span.set(key, value)
+        with span("query.retrieve", after_extract=True) as retrieve_span:
+            results = retrieval.search(query, time_window=time_window)
+            retrieve_span.set("results", len(results))
+
+    with span("query.metadata", records=len(results)) as metadata_span:
+        texts, fetched = result_texts(metadata, results)
+        metadata_span.set("fetched", fetched)
+
+    rerank = system.get("retrieval.rerank") if system.has("retrieval.rerank") else None
+    if rerank is not None and results:
+        with span("query.rerank") as rerank_span:
+            results, info = rerank.rerank(query, results, lambda record_id: texts.get(record_id, ""))
+            for key, value in info.items():
+                rerank_span.set(key, value)
 
     claims = []
-    metadata = system.get("storage.metadata")
     for result in results:
-        record = metadata.get(result["record_id"], {})
-        text = record.get("text", "")
+        text = texts.get(result["record_id"], "")
         claims.append(
             {
                 "text": text or f"Matched record {result['record_id']}",
@@ -102,5 +313,16 @@ def run_query(system, query: str) -> dict[str, Any]:
                 ],
             }
         )
-    answer_obj = answer.build(claims)
+    with span("query.answer"):
+        answer_obj = answer.build(claims)
+    if cache is not None:
+        cache.put(query, time_window, version, {"results": results, "answer": answer_obj})
     return {"intent": intent, "results": results, "answer": answer_obj}
+
+
+def trace_query(system, query: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Run a query with tracing forced on and return (result, spans of its trace)."""
+    tracer = get_tracer()
+    with tracer.span("query.traced", force=True) as root:
+        result = run_query(system, query)
+    return result, tracer.spans(root.trace_id)
@@ -0,0 +1,114 @@
+"""Query result cache invalidated by ``storage.metadata`` write versions."""
+
+from __future__ import annotations
+
+import collections
+import copy
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from autocapture_nx.kernel.storage_bulk import get_many
+from autocapture_nx.kernel.time_window import parse_ts, within_window
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+
+@dataclass
+class _Entry:
+    version: int
+    result: dict[str, Any]
+
+
+class QueryCache:
+    """The ``query.cache`` kernel capability.
+
+    Caches ``run_query`` results keyed by the normalized query text and the
+    resolved time window, in an LRU of ``retrieval.query_cache.max_entries``.
+    Each entry remembers the metadata store's ``version()`` when the query
+    started. Open windows (no window, or one that ends in the future) are
+    recomputed after any write. A closed window stays cached unless one of
+    the records written since (``changes_since``) falls inside it or has no
+    timestamp, e.g. when extraction fills in text for an old segment. Stores
+    without ``version()`` are not cached.
+    """
+
+    def __init__(self, config: dict[str, Any], clock: Callable[[], datetime] | None = None) -> None:
+        cfg = config.get("retrieval", {}).get("query_cache", {})
+        self.enabled = bool(cfg.get("enabled", True))
+        self.max_entries = max(1, int(cfg.get("max_entries", 256)))
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._entries: collections.OrderedDict[tuple[str, str | None, str | None], _Entry] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, window: dict[str, Any] | None) -> tuple[str, str | None, str | None]:
+        window = window or {}
+        return normalize_query(query), window.get("start"), window.get("end")
+
+    def version(self, metadata) -> int | None:
+        """The store's write version, or None if it has none (caching disabled)."""
+        if not self.enabled:
+            return None
+        version = getattr(metadata, "version", None)
+        return int(version()) if callable(version) else None
+
+    def _open(self, window: dict[str, Any] | None) -> bool:
+        end = parse_ts((window or {}).get("end"))
+        return end is None or end > self._clock()
+
+    def _still_valid(self, entry: _Entry, window: dict[str, Any] | None, metadata, current: int) -> bool:
+        if entry.version == current:
+            return True
+        if self._open(window):
+            return False
+        changes = metadata.changes_since(entry.version) if hasattr(metadata, "changes_since") else None
+        if changes is None:
+            return False
+        for record in get_many(metadata, changes, {}).values():
+            ts = (record or {}).get("ts_utc")
+            if ts is None or within_window(ts, window):
+                return False
+        return True
+
+    def get(self, query: str, window: dict[str, Any] | None, metadata) -> dict[str, Any] | None:
+        current = self.version(metadata)
+        if current is None:
+            return None
+        key = self.key(query, window)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and self._still_valid(entry, window, metadata, current):
+            with self._lock:
+                entry.version = current
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return copy.deepcopy(entry.result)
+        with self._lock:
+            if entry is not None and self._entries.get(key) is entry:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def put(self, query: str, window: dict[str, Any] | None, version: int | None, result: dict[str, Any]) -> None:
+        """Store ``result`` as of ``version`` (read before the query ran)."""
+        if version is None:
+            return
+        key = self.key(query, window)
+        with self._lock:
+            self._entries[key] = _Entry(version, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"enabled": self.enabled, "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
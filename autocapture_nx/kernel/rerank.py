@@ -0,0 +1,121 @@
+"""Query-time reranking stage with a candidate cap, score cache and deadline."""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import threading
+import time
+from typing import Any, Callable
+
+
+# How reranker plugins word model-load failures ("Missing reranker dependency",
+# "Failed to load reranker model ..."); subprocess hosts pass only the message on.
+_LOAD_FAILURE_PREFIXES = ("Missing ", "Failed to load ")
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _is_load_failure(exc: Exception) -> bool:
+    return isinstance(exc, ImportError) or str(exc).startswith(_LOAD_FAILURE_PREFIXES)
+
+
+class RerankStage:
+    """The ``retrieval.rerank`` kernel capability.
+
+    Reorders the top ``top_n`` retrieval results by cross-encoder score from
+    the ``reranker`` capability. Pairs are scored in ``batch_size``
+    micro-batches, best-ranked first, and scores are cached in an LRU keyed
+    by (model, query hash, text hash). The deadline is checked between
+    batches: when it passes, the scored prefix is reordered and the rest keep
+    their retrieval order (a batch already sent to the model is not
+    interrupted). A reranker that cannot load its model (missing
+    dependency or model files) disables the stage for the life of the
+    process; any other failure, such as a host IPC timeout, only ends
+    scoring for that query, which keeps the prefix scored so far.
+    """
+
+    def __init__(self, config: dict[str, Any], reranker: Callable[[], Any] = lambda: None) -> None:
+        cfg = config.get("retrieval", {}).get("rerank", {})
+        self.enabled = bool(cfg.get("enabled", True))
+        self.top_n = int(cfg.get("top_n", 50))
+        self.batch_size = int(cfg.get("batch_size", 16))
+        self.budget_ms = int(cfg.get("budget_ms", 500))
+        self.cache_entries = int(cfg.get("cache_entries", 4096))
+        self._reranker = reranker
+        self._lock = threading.Lock()
+        self._cache: collections.OrderedDict[tuple[str, str, str], float] = collections.OrderedDict()
+        self._model_id: str | None = None
+        self.unavailable: str | None = None
+
+    def _cached(self, key: tuple[str, str, str]) -> float | None:
+        score = self._cache.get(key)
+        if score is not None:
+            self._cache.move_to_end(key)
+        return score
+
+    def _store(self, key: tuple[str, str, str], score: float) -> None:
+        self._cache[key] = score
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+    def rerank(
+        self,
+        query: str,
+        results: list[dict[str, Any]],
+        text_for: Callable[[str], str],
+        budget_ms: int | None = None,
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """Return ``(results, info)``; ``text_for(record_id)`` is called for the top ``top_n`` only."""
+        info: dict[str, Any] = {"candidates": 0, "scored": 0, "cached": 0, "timed_out": False}
+        if not self.enabled or self.unavailable or not results:
+            return results, info
+        reranker = self._reranker()
+        if reranker is None:
+            return results, info
+        deadline = time.monotonic() + (self.budget_ms if budget_ms is None else budget_ms) / 1000
+        head, tail = results[: self.top_n], results[self.top_n :]
+        info["candidates"] = len(head)
+        query_hash = _sha(query)
+        texts = [text_for(result["record_id"]) or "" for result in head]
+        scores: list[float | None] = [None] * len(head)
+        with self._lock:
+            pending: list[int] = []
+            for idx, text in enumerate(texts):
+                cached = self._cached((self._model_id, query_hash, _sha(text))) if self._model_id else None
+                if cached is None:
+                    pending.append(idx)
+                else:
+                    scores[idx] = cached
+                    info["cached"] += 1
+        for start in range(0, len(pending), self.batch_size):
+            if time.monotonic() >= deadline:
+                info["timed_out"] = True
+                break
+            batch = pending[start : start + self.batch_size]
+            try:
+                scored = reranker.score_batch(query, [texts[idx] for idx in batch])
+            except Exception as exc:
+                if _is_load_failure(exc):
+                    self.unavailable = str(exc)
+                info["error"] = str(exc)
+                break
+            with self._lock:
+                self._model_id = str(scored["model_id"])
+                for idx, score in zip(batch, scored["scores"]):
+                    scores[idx] = float(score)
+                    self._store((self._model_id, query_hash, _sha(texts[idx])), float(score))
+            info["scored"] += len(batch)
+
+        # Pending pairs are scored best-ranked first, so after a deadline the scored
+        # candidates form a prefix. Only that prefix is reordered; the rest keep
+        # their retrieval order even if some of them had cached scores.
+        cut = next((idx for idx, score in enumerate(scores) if score is None), len(head))
+        if cut == 0:
+            return results, info
+        ranked = sorted(range(cut), key=lambda idx: (-scores[idx], idx))
+        reordered = [{**head[idx], "rerank_score": round(scores[idx], 6)} for idx in ranked]
+        return reordered + head[cut:] + tail, info
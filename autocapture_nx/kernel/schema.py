@@ -0,0 +1,223 @@
+"""Schema-lite compiler producing cached, closure-based validators."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from .errors import ConfigError
+
+
+@dataclass(frozen=True)
+class SchemaIssue:
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+# A compiled node appends issues for `data` at `path` into the list.
+Check = Callable[[Any, str, list], None]
+
+_TYPE_MAP: dict[str, type | tuple[type, ...]] = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _type_test(expected: str | list[str]) -> tuple[tuple[type, ...], bool, str]:
+    """Return (isinstance types, reject_bool, label) for a schema `type` entry."""
+    if isinstance(expected, list):
+        types: list[type] = []
+        for typ in expected:
+            if typ not in _TYPE_MAP:
+                raise ConfigError(f"unsupported schema type {typ}")
+            py_type = _TYPE_MAP[typ]
+            types.extend(py_type if isinstance(py_type, tuple) else (py_type,))
+        # bool is only acceptable when a union names a type that admits it.
+        reject_bool = not any(typ in ("boolean", "number") for typ in expected)
+        return tuple(types), reject_bool, f"one of {list(expected)}"
+    if expected not in _TYPE_MAP:
+        raise ConfigError(f"unsupported schema type {expected}")
+    py_type = _TYPE_MAP[expected]
+    return (py_type if isinstance(py_type, tuple) else (py_type,)), expected == "integer", expected
+
+
+def _type_issue(label: str, data: Any, path: str, issues: list) -> None:
+    if label == "integer" and isinstance(data, bool):
+        issues.append(SchemaIssue(path, "expected integer, got boolean"))
+    else:
+        issues.append(SchemaIssue(path, f"expected {label}, got {type(data).__name__}"))
+
+
+def _compile_object(schema: dict[str, Any]) -> Check:
+    required = tuple(schema.get("required", []))
+    properties = {key: _compile_node(sub) for key, sub in schema.get("properties", {}).items()}
+    additional = schema.get("additionalProperties", True)
+    additional_check = _compile_node(additional) if isinstance(additional, dict) else None
+    reject_additional = additional is False
+
+    def check_object(data: Any, path: str, issues: list) -> None:
+        if not isinstance(data, dict):
+            _type_issue("object", data, path, issues)
+            return
+        for key in required:
+            if key not in data:
+                issues.append(SchemaIssue(path, f"missing required field {key}"))
+        for key, value in data.items():
+            check = properties.get(key)
+            if check is not None:
+                check(value, f"{path}.{key}", issues)
+            elif reject_additional:
+                issues.append(SchemaIssue(path, f"unexpected field {key}"))
+            elif additional_check is not None:
+                additional_check(value, f"{path}.{key}", issues)
+
+    return check_object
+
+
+def _compile_array(schema: dict[str, Any]) -> Check:
+    items = schema.get("items")
+    item_check = _compile_node(items) if items is not None else None
+
+    def check_array(data: Any, path: str, issues: list) -> None:
+        if not isinstance(data, list):
+            _type_issue("array", data, path, issues)
+            return
+        if item_check is None:
+            return
+        for idx, item in enumerate(data):
+            item_check(item, f"{path}[{idx}]", issues)
+
+    return check_array
+
+
+def _compile_scalar(schema: dict[str, Any]) -> Check:
+    expected = schema.get("type")
+    enum = schema.get("enum")
+    minimum = schema.get("minimum") if expected in ("integer", "number") else None
+    maximum = schema.get("maximum") if expected in ("integer", "number") else None
+    if expected:
+        types, reject_bool, label = _type_test(expected)
+    else:
+        types, reject_bool, label = (object,), False, ""
+
+    if enum is None and minimum is None and maximum is None:
+        if not expected:
+            return lambda _data, _path, _issues: None
+
+        def check_type(data: Any, path: str, issues: list) -> None:
+            if not isinstance(data, types) or (reject_bool and isinstance(data, bool)):
+                _type_issue(label, data, path, issues)
+
+        return check_type
+
+    def check_scalar(data: Any, path: str, issues: list) -> None:
+        if enum is not None and data not in enum:
+            issues.append(SchemaIssue(path, f"value {data!r} not in enum {enum}"))
+            return
+        if not isinstance(data, types) or (reject_bool and isinstance(data, bool)):
+            _type_issue(label, data, path, issues)
+            return
+        if minimum is not None and data < minimum:
+            issues.append(SchemaIssue(path, f"value {data} below minimum {minimum}"))
+        if maximum is not None and data > maximum:
+            issues.append(SchemaIssue(path, f"value {data} above maximum {maximum}"))
+
+    return check_scalar
+
+
+def _compile_node(schema: dict[str, Any]) -> Check:
+    """Compile one schema node into a specialised closure."""
+    expected = schema.get("type")
+    if expected == "object":
+        body = _compile_object(schema)
+    elif expected == "array":
+        body = _compile_array(schema)
+    else:
+        return _compile_scalar(schema)
+    enum = schema.get("enum")
+    if enum is None:
+        return body
+
+    def check_enum(data: Any, path: str, issues: list) -> None:
+        if data not in enum:
+            issues.append(SchemaIssue(path, f"value {data!r} not in enum {enum}"))
+            return
+        body(data, path, issues)
+
+    return check_enum
+
+
+class CompiledSchema:
+    """Validator compiled once from a schema-lite document."""
+
+    def __init__(self, schema: dict[str, Any], schema_hash: str | None = None) -> None:
+        self.schema = schema
+        self.schema_hash = schema_hash
+        self._root = _compile_node(schema)
+
+    def errors(self, data: Any, path: str = "$") -> list[SchemaIssue]:
+        issues: list[SchemaIssue] = []
+        self._root(data, path, issues)
+        return issues
+
+    def is_valid(self, data: Any) -> bool:
+        return not self.errors(data)
+
+    def validate(self, data: Any, path: str = "$") -> None:
+        issues = self.errors(data, path)
+        if issues:
+            raise ConfigError(str(issues[0]))
+
+
+def compile_schema(schema: dict[str, Any]) -> CompiledSchema:
+    return CompiledSchema(schema)
+
+
+_cache_lock = threading.Lock()
+_compiled_by_hash: dict[str, CompiledSchema] = {}
+_path_index: dict[str, tuple[int, int, str]] = {}
+
+
+def load_compiled_schema(path: str | Path) -> CompiledSchema:
+    """Return a compiled validator for a schema file, cached by path and content hash."""
+    schema_path = Path(path)
+    try:
+        stat = schema_path.stat()
+    except FileNotFoundError as exc:
+        raise ConfigError(f"Missing schema file: {schema_path}") from exc
+    key = os.path.abspath(schema_path)
+    with _cache_lock:
+        indexed = _path_index.get(key)
+        if indexed and indexed[:2] == (stat.st_mtime_ns, stat.st_size):
+            compiled = _compiled_by_hash.get(indexed[2])
+            if compiled is not None:
+                return compiled
+    raw = schema_path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    with _cache_lock:
+        compiled = _compiled_by_hash.get(digest)
+    if compiled is None:
+        compiled = CompiledSchema(json.loads(raw.decode("utf-8")), schema_hash=digest)
+    with _cache_lock:
+        compiled = _compiled_by_hash.setdefault(digest, compiled)
+        _path_index[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return compiled
+
+
+def clear_schema_cache() -> None:
+    with _cache_lock:
+        _compiled_by_hash.clear()
+        _path_index.clear()
@@ -0,0 +1,50 @@
+"""Batched access to ``storage.*`` capabilities, with a per-record fallback."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, Mapping
+
+
+def get_many(store, record_ids: Iterable[str], default: Any = None) -> dict[str, Any]:
+    """``{record_id: value}`` for ``record_ids`` (duplicates collapsed).
+
+    Uses the store's ``get_many`` when it has one (batched I/O and
+    decryption), otherwise one ``get`` per record.
+    """
+    ids = list(dict.fromkeys(record_ids))
+    if not ids:
+        return {}
+    bulk = getattr(store, "get_many", None)
+    if bulk is not None:
+        return bulk(ids, default)
+    return {record_id: store.get(record_id, default) for record_id in ids}
+
+
+def put_many(store, records: Mapping[str, Any] | Iterable[tuple[str, Any]]) -> int:
+    """Write ``records`` and return how many were written.
+
+    Uses the store's ``put_many`` when it has one (one transaction, or
+    all-or-nothing staging, depending on the backend), otherwise one ``put``
+    per record with no atomicity across records.
+    """
+    records = dict(records)
+    if not records:
+        return 0
+    bulk = getattr(store, "put_many", None)
+    if bulk is not None:
+        bulk(records)
+    else:
+        for record_id, value in records.items():
+            store.put(record_id, value)
+    return len(records)
+
+
+def chunks(items: Iterable[str], size: int) -> Iterator[list[str]]:
+    batch: list[str] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -14,5 +14,8 @@ class System:
     plugins: list[LoadedPlugin]
     capabilities: CapabilityRegistry
 
+    def has(self, capability: str) -> bool:
+        return self.capabilities.has(capability)
+
     def get(self, capability: str) -> Any:
         return self.capabilities.get(capability)
@@ -0,0 +1,37 @@
+"""UTC timestamp parsing and query time-window checks."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+
+def parse_ts(ts: str | None) -> datetime | None:
+    """Parse an ISO-8601 timestamp (``Z`` suffix allowed); None if missing or malformed."""
+    if not ts:
+        return None
+    if ts.endswith("Z"):
+        ts = ts[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(ts)
+    except ValueError:
+        return None
+
+
+def within_window(ts: str | None, window: dict[str, Any] | None) -> bool:
+    """Whether ``ts`` falls inside ``window``'s optional ``start``/``end`` bounds.
+
+    With no window every record matches; with one, undated records never do.
+    """
+    if not window:
+        return True
+    start = parse_ts(window.get("start"))
+    end = parse_ts(window.get("end"))
+    current = parse_ts(ts)
+    if current is None:
+        return False
+    if start and current < start:
+        return False
+    if end and current > end:
+        return False
+    return True
@@ -0,0 +1,191 @@
+"""Lightweight tracing spans with a ring buffer and Chrome trace export."""
+
+from __future__ import annotations
+
+import collections
+import contextvars
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("autocapture_span", default=None)
+
+
+def _new_id(nbytes: int = 8) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    """One timed operation; use as a context manager.
+
+    Times come from ``time.perf_counter_ns``, a monotonic clock that is shared
+    across processes on supported platforms, so spans from plugin host
+    processes line up with the parent's.
+    """
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attrs", "start_ns", "end_ns", "pid", "tid", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: str | None, attrs: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start_ns = 0
+        self.end_ns = 0
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        self._token: contextvars.Token | None = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, _exc, _tb) -> None:
+        self.end_ns = time.perf_counter_ns()
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.record(self.to_dict())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ns": self.end_ns - self.start_ns,
+            "pid": self.pid,
+            "tid": self.tid,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+    trace_id = None
+    span_id = None
+
+    def set(self, _key: str, _value: Any) -> None:
+        return None
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """Records finished spans into a bounded in-memory ring buffer.
+
+    When disabled, spans are only recorded beneath an explicitly forced root,
+    so ordinary calls cost a context variable lookup.
+    """
+
+    def __init__(self, enabled: bool = False, ring_size: int = 4096) -> None:
+        self.enabled = enabled
+        self._spans: collections.deque[dict[str, Any]] = collections.deque(maxlen=ring_size)
+
+    def configure(self, enabled: bool, ring_size: int) -> None:
+        self.enabled = enabled
+        if ring_size != self._spans.maxlen:
+            self._spans = collections.deque(self._spans, maxlen=ring_size)
+
+    def span(self, name: str, force: bool = False, **attrs: Any) -> Span | _NoopSpan:
+        parent = _current_span.get()
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, attrs)
+        if self.enabled or force:
+            return Span(self, name, _new_id(16), None, attrs)
+        return _NOOP
+
+    def remote_span(self, name: str, context: dict[str, Any] | None, **attrs: Any) -> Span | _NoopSpan:
+        """Continue a trace propagated from another process (see ``current_context``)."""
+        if not context:
+            return _NOOP
+        return Span(self, name, context["trace_id"], context.get("parent_id"), attrs)
+
+    def record(self, span: dict[str, Any]) -> None:
+        self._spans.append(span)
+
+    def ingest(self, spans: Iterable[dict[str, Any]]) -> None:
+        for span in spans:
+            self._spans.append(span)
+
+    def spans(self, trace_id: str | None = None) -> list[dict[str, Any]]:
+        items = list(self._spans)
+        if trace_id is None:
+            return items
+        return [span for span in items if span["trace_id"] == trace_id]
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+def current_context() -> dict[str, Any] | None:
+    """Serializable trace context for propagating the active span over IPC."""
+    span = _current_span.get()
+    if span is None:
+        return None
+    return {"trace_id": span.trace_id, "parent_id": span.span_id}
+
+
+def chrome_trace(spans: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Convert spans to the Chrome trace-event format (chrome://tracing, Perfetto)."""
+    events = []
+    for span in sorted(spans, key=lambda item: item["start_ns"]):
+        args = {"trace_id": span["trace_id"], "span_id": span["span_id"], "parent_id": span["parent_id"]}
+        args.update(span.get("attrs", {}))
+        events.append(
+            {
+                "name": span["name"],
+                "cat": "autocapture",
+                "ph": "X",
+                "ts": span["start_ns"] / 1000,
+                "dur": span["duration_ns"] / 1000,
+                "pid": span["pid"],
+                "tid": span["tid"],
+                "args": args,
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path: str | Path, spans: Iterable[dict[str, Any]]) -> Path:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with target.open("w", encoding="utf-8") as handle:
+        json.dump(chrome_trace(spans), handle, default=str)
+    return target
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def configure_tracing(config: dict[str, Any]) -> Tracer:
+    tracing_cfg = config.get("observability", {}).get("tracing", {})
+    _tracer.configure(bool(tracing_cfg.get("enabled", False)), int(tracing_cfg.get("ring_size", 4096)))
+    return _tracer
+
+
+def span(name: str, **attrs: Any) -> Span | _NoopSpan:
+    return _tracer.span(name, **attrs)
@@ -0,0 +1,39 @@
+"""Write versions for ``storage.metadata`` stores."""
+
+from __future__ import annotations
+
+import collections
+import threading
+
+
+class WriteLog:
+    """A monotonic write version plus a bounded log of the keys written.
+
+    Stores bump it on every ``put`` and expose ``version()`` and
+    ``changes_since(version)``, so readers such as the query cache can tell
+    whether anything changed, and if so which records.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self._version = 0
+        self._log: collections.deque[tuple[int, str]] = collections.deque(maxlen=max(1, max_entries))
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self, key: str) -> int:
+        with self._lock:
+            self._version += 1
+            self._log.append((self._version, key))
+            return self._version
+
+    def changes_since(self, version: int) -> list[str] | None:
+        """Keys written after ``version``; None if the log no longer reaches back that far."""
+        with self._lock:
+            if version >= self._version:
+                return []
+            if not self._log or self._log[0][0] > version + 1:
+                return None
+            return list(dict.fromkeys(key for written, key in self._log if written > version))
@@ -7,11 +7,13 @@ import json
 import os
 import subprocess
 import sys
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 from autocapture_nx.kernel.errors import PermissionError, PluginError
+from autocapture_nx.kernel.tracing import current_context, get_tracer, span
 from autocapture_nx.windows.win_sandbox import assign_job_object
 
 
@@ -20,7 +22,7 @@ def _encode(obj: Any) -> Any:
         import base64
 
         return {"__bytes__": base64.b64encode(obj).decode("ascii")}
-    if isinstance(obj, list):
+    if isinstance(obj, (list, tuple)):
         return [_encode(v) for v in obj]
     if isinstance(obj, dict):
         return {k: _encode(v) for k, v in obj.items()}
@@ -41,7 +43,7 @@ def _decode(obj: Any) -> Any:
 
 @dataclass
 class RemoteCapability:
-    host: "PluginProcess"
+    host: "SubprocessPlugin"
     name: str
     methods: list[str]
 
@@ -77,6 +79,7 @@ class PluginProcess:
         self._stdin = self._proc.stdin
         self._stdout = self._proc.stdout
         self._req_id = 0
+        self._lock = threading.Lock()
         self._stdin.write(json.dumps(config) + "\n")
         self._stdin.flush()
 
@@ -86,10 +89,15 @@ class PluginProcess:
             return
         try:
             if proc.poll() is None:
+                # Closing stdin asks the host to close its plugin and exit; terminate if it does not.
                 try:
-                    proc.terminate()
+                    self._stdin.close()
+                    proc.wait(timeout=2)
                 except Exception:
-                    pass
+                    try:
+                        proc.terminate()
+                    except Exception:
+                        pass
                 try:
                     proc.wait(timeout=2)
                 except Exception:
@@ -111,21 +119,35 @@ class PluginProcess:
             self._proc = None
 
     def _request(self, payload: dict[str, Any]) -> Any:
-        self._req_id += 1
-        payload["id"] = self._req_id
-        self._stdin.write(json.dumps(payload) + "\n")
-        self._stdin.flush()
-        line = self._stdout.readline()
+        return self._exchange(payload).get("result")
+
+    def _exchange(self, payload: dict[str, Any]) -> dict[str, Any]:
+        # One request/response pair on the pipe at a time; callers may share a host.
+        with self._lock:
+            self._req_id += 1
+            payload["id"] = self._req_id
+            self._stdin.write(json.dumps(payload) + "\n")
+            self._stdin.flush()
+            line = self._stdout.readline()
         if not line:
             raise PluginError("Plugin host closed")
         response = json.loads(line)
+        spans = response.get("spans")
+        if spans:
+            get_tracer().ingest(spans)
         if not response.get("ok"):
             raise PluginError(response.get("error", "unknown error"))
-        return response.get("result")
+        return response
 
     def capabilities(self) -> dict[str, list[str]]:
         return self._request({"method": "capabilities"})
 
+    def profile_start(self, interval_s: float) -> None:
+        self._request({"method": "profile_start", "interval_s": interval_s})
+
+    def profile_stop(self) -> dict[str, Any]:
+        return self._request({"method": "profile_stop"})
+
     def call(self, capability: str, function: str, args: list[Any], kwargs: dict[str, Any]) -> Any:
         payload = {
             "method": "call",
@@ -135,7 +157,11 @@ class PluginProcess:
             "kwargs": _encode(kwargs),
         }
         try:
-            return _decode(self._request(payload))
+            with span(f"ipc:{capability}.{function}"):
+                trace = current_context()
+                if trace is not None:
+                    payload["trace"] = trace
+                return _decode(self._request(payload))
         except PluginError as exc:
             if "Network access is denied" in str(exc):
                 raise PermissionError(str(exc)) from exc
@@ -143,17 +169,67 @@ class PluginProcess:
 
 
 class SubprocessPlugin:
-    def __init__(self, plugin_path: Path, callable_name: str, plugin_id: str, network_allowed: bool, config: dict[str, Any]):
-        self._host = PluginProcess(plugin_path, callable_name, plugin_id, network_allowed, config)
+    """Plugin hosted in a child process.
+
+    When the method map is already known (e.g. from a boot snapshot) the host
+    process is started lazily on the first call instead of at boot.
+    """
+
+    def __init__(
+        self,
+        plugin_path: Path,
+        callable_name: str,
+        plugin_id: str,
+        network_allowed: bool,
+        config: dict[str, Any],
+        methods: dict[str, list[str]] | None = None,
+    ):
+        self.plugin_id = plugin_id
+        self._host_args = (plugin_path, callable_name, plugin_id, network_allowed, config)
+        self._host: PluginProcess | None = None
+        self._host_lock = threading.Lock()
+        self._closed = False
         atexit.register(self.close)
+        if methods is None:
+            methods = self._ensure_host().capabilities()
         self._caps: dict[str, RemoteCapability] = {}
-        for name, methods in self._host.capabilities().items():
-            self._caps[name] = RemoteCapability(self._host, name, methods)
+        for name, cap_methods in methods.items():
+            self._caps[name] = RemoteCapability(self, name, list(cap_methods))
+
+    def _ensure_host(self) -> PluginProcess:
+        host = self._host
+        if host is not None:
+            return host
+        with self._host_lock:
+            if self._host is None:
+                if self._closed:
+                    raise PluginError("Plugin host closed")
+                self._host = PluginProcess(*self._host_args)
+            return self._host
+
+    @property
+    def started(self) -> bool:
+        return self._host is not None
+
+    def call(self, capability: str, function: str, args: list[Any], kwargs: dict[str, Any]) -> Any:
+        return self._ensure_host().call(capability, function, args, kwargs)
 
     def capabilities(self) -> dict[str, Any]:
         return self._caps
 
+    def profile_start(self, interval_s: float) -> None:
+        """Start the stack sampler inside the host process (see ``kernel.profiler``)."""
+        self._ensure_host().profile_start(interval_s)
+
+    def profile_stop(self) -> dict[str, Any]:
+        """Stop the host's sampler; returns ``{"pid", "samples", "stacks"}``."""
+        return self._ensure_host().profile_stop()
+
+    def method_map(self) -> dict[str, list[str]]:
+        return {name: list(cap.methods) for name, cap in self._caps.items()}
+
     def close(self) -> None:
+        self._closed = True
         if getattr(self, "_host", None) is None:
             return
         try:
@@ -4,9 +4,12 @@ from __future__ import annotations
 
 import importlib.util
 import json
+import os
 import sys
 from typing import Any
 
+from autocapture_nx.kernel.profiler import StackSampler
+from autocapture_nx.kernel.tracing import get_tracer
 from autocapture_nx.plugin_system.api import PluginContext
 from autocapture_nx.plugin_system.runtime import network_guard
 
@@ -28,7 +31,7 @@ def _encode(obj: Any) -> Any:
         import base64
 
         return {"__bytes__": base64.b64encode(obj).decode("ascii")}
-    if isinstance(obj, list):
+    if isinstance(obj, (list, tuple)):
         return [_encode(v) for v in obj]
     if isinstance(obj, dict):
         return {k: _encode(v) for k, v in obj.items()}
@@ -55,6 +58,18 @@ def main() -> None:
         caps = instance.capabilities()
 
     cap_map = {name: cap for name, cap in caps.items()}
+    try:
+        _serve(cap_map, plugin_id, network_allowed)
+    finally:
+        # stdin closed: the kernel is shutting down, so let the plugin release its pools and models.
+        close = getattr(instance, "close", None)
+        if close is not None:
+            close()
+
+
+def _serve(cap_map: dict[str, Any], plugin_id: str, network_allowed: bool) -> None:
+    tracer = get_tracer()
+    sampler: StackSampler | None = None
 
     while True:
         line = sys.stdin.readline()
@@ -71,14 +86,33 @@ def main() -> None:
                 func = getattr(cap, request["function"])
                 args = _decode(request.get("args", []))
                 kwargs = _decode(request.get("kwargs", {}))
-                with network_guard(network_allowed):
-                    result = func(*args, **kwargs)
+                trace = request.get("trace")
+                with tracer.remote_span(
+                    f"host:{request['capability']}.{request['function']}", trace, plugin_id=plugin_id
+                ):
+                    with network_guard(network_allowed):
+                        result = func(*args, **kwargs)
                 result = _encode(result)
+            elif method == "profile_start":
+                if sampler is None:
+                    sampler = StackSampler(float(request.get("interval_s", 0.01)))
+                    sampler.start()
+                result = None
+            elif method == "profile_stop":
+                if sampler is None:
+                    raise ValueError("profiler not running")
+                stacks = sampler.stop()
+                result = {"pid": os.getpid(), "samples": sampler.samples, "stacks": stacks}
+                sampler = None
             else:
                 raise ValueError("unknown method")
             response = {"id": req_id, "ok": True, "result": result}
         except Exception as exc:
             response = {"id": req_id, "ok": False, "error": str(exc)}
+        spans = tracer.spans()
+        if spans:
+            response["spans"] = spans
+            tracer.clear()
         sys.stdout.write(json.dumps(response) + "\n")
         sys.stdout.flush()
 
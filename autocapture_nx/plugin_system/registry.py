@@ -8,13 +8,14 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from autocapture_nx.kernel.config import SchemaLiteValidator
 from autocapture_nx.kernel.errors import PluginError
 from autocapture_nx.kernel.hashing import sha256_directory, sha256_file
+from autocapture_nx.kernel.metrics import CapabilityMetrics
+from autocapture_nx.kernel.schema import load_compiled_schema
 
 from .api import PluginContext
 from .host import SubprocessPlugin
-from .runtime import network_guard
+from .runtime import deny_network, network_guard
 
 
 @dataclass
@@ -26,33 +27,76 @@ class LoadedPlugin:
 
 
 class CapabilityProxy:
-    def __init__(self, target: Any, network_allowed: bool) -> None:
+    """Applies the network policy (and optional call metrics) to a capability.
+
+    Each method wrapper is built on first access and stored in the instance
+    ``__dict__``, so later lookups are plain attribute hits that never reach
+    ``__getattr__`` again.
+    """
+
+    __slots__ = ("_target", "_network_allowed", "_metrics", "_name", "__dict__")
+
+    def __init__(
+        self,
+        target: Any,
+        network_allowed: bool = False,
+        metrics: CapabilityMetrics | None = None,
+        name: str = "",
+    ) -> None:
         self._target = target
         self._network_allowed = network_allowed
+        self._metrics = metrics
+        self._name = name
 
     def __call__(self, *args, **kwargs):
-        if not callable(self._target):
-            raise TypeError("Capability is not callable")
-        with network_guard(self._network_allowed):
-            return self._target(*args, **kwargs)
+        call = self.__dict__.get("__call__")
+        if call is None:
+            if not callable(self._target):
+                raise TypeError("Capability is not callable")
+            call = self.__dict__["__call__"] = self._wrap(self._name, self._target)
+        return call(*args, **kwargs)
+
+    def _wrap(self, key: str, func: Any) -> Any:
+        if not self._network_allowed:
+            func = deny_network(func)
+        if self._metrics is not None:
+            func = self._metrics.timed(key, func)
+        return func
 
     def __getattr__(self, name: str) -> Any:
         attr = getattr(self._target, name)
-        if callable(attr):
-            def wrapped(*args, **kwargs):
-                with network_guard(self._network_allowed):
-                    return attr(*args, **kwargs)
-
-            return wrapped
-        return attr
+        if not callable(attr):
+            return attr
+        wrapped = self._wrap(f"{self._name}.{name}" if self._name else name, attr)
+        setattr(self, name, wrapped)
+        return wrapped
 
 
 class CapabilityRegistry:
-    def __init__(self) -> None:
+    def __init__(self, metrics: CapabilityMetrics | None = None) -> None:
         self._capabilities: dict[str, Any] = {}
+        self._metrics = metrics if metrics is not None and metrics.enabled else None
+
+    def register(self, capability: str, impl: Any, network_allowed: bool, guarded: bool | None = None) -> None:
+        """Register impl, proxied only when calls need the network guard or metrics.
+
+        Network-allowed plugins and subprocess-hosted plugins (whose host
+        process applies the guard) are bound directly with no per-call cost.
+        """
+        if guarded is None:
+            guarded = not network_allowed
+        if self._metrics is not None:
+            impl = CapabilityProxy(impl, not guarded, self._metrics, capability)
+        elif guarded:
+            impl = CapabilityProxy(impl, False)
+        self._capabilities[capability] = impl
 
-    def register(self, capability: str, impl: Any, network_allowed: bool) -> None:
-        self._capabilities[capability] = CapabilityProxy(impl, network_allowed)
+    def register_kernel(self, capability: str, impl: Any) -> None:
+        """Register a kernel-provided capability as-is (no guard, no metrics)."""
+        self._capabilities[capability] = impl
+
+    def has(self, capability: str) -> bool:
+        return capability in self._capabilities
 
     def get(self, capability: str) -> Any:
         if capability not in self._capabilities:
@@ -67,7 +111,9 @@ class PluginRegistry:
     def __init__(self, config: dict[str, Any], safe_mode: bool) -> None:
         self.config = config
         self.safe_mode = safe_mode
-        self._validator = SchemaLiteValidator()
+        self.lock_results: dict[str, dict[str, str]] = {}
+        self.capability_map: dict[str, dict[str, list[str]]] = {}
+        self.hosts: list[SubprocessPlugin] = []
 
     def discover_manifests(self) -> list[Path]:
         paths = [Path("plugins") / "builtin"]
@@ -93,9 +139,7 @@ class PluginRegistry:
         schema_path = Path("contracts/plugin_manifest.schema.json")
         if not schema_path.exists():
             raise PluginError("Missing plugin manifest schema")
-        with schema_path.open("r", encoding="utf-8") as handle:
-            schema = json.load(handle)
-        self._validator.validate(schema, manifest)
+        load_compiled_schema(schema_path).validate(manifest)
 
     def _check_lock(self, plugin_id: str, manifest_path: Path, plugin_root: Path, lockfile: dict[str, Any]) -> None:
         locks_cfg = self.config.get("plugins", {}).get("locks", {})
@@ -111,6 +155,7 @@ class PluginRegistry:
             raise PluginError(f"Plugin {plugin_id} manifest hash mismatch")
         if artifact_hash != expected.get("artifact_sha256"):
             raise PluginError(f"Plugin {plugin_id} artifact hash mismatch")
+        self.lock_results[plugin_id] = {"manifest_sha256": manifest_hash, "artifact_sha256": artifact_hash}
 
     def _check_permissions(self, manifest: dict[str, Any]) -> None:
         perms = manifest.get("permissions", {})
@@ -123,15 +168,13 @@ class PluginRegistry:
             if manifest.get("plugin_id") not in allowed:
                 raise PluginError("Network permission denied by policy")
 
-    def load_plugins(self) -> tuple[list[LoadedPlugin], CapabilityRegistry]:
+    def resolve_plugins(self) -> list[tuple[Path, dict[str, Any]]]:
+        """Discover, validate and lock-check the plugins that should load, in load order."""
         manifests = self.discover_manifests()
         lockfile = self.load_lockfile()
         allowlist = set(self.config.get("plugins", {}).get("allowlist", []))
         enabled_map = self.config.get("plugins", {}).get("enabled", {})
         default_pack = set(self.config.get("plugins", {}).get("default_pack", []))
-        hosting_cfg = self.config.get("plugins", {}).get("hosting", {})
-        hosting_mode = hosting_cfg.get("mode", "inproc")
-        inproc_allowlist = set(hosting_cfg.get("inproc_allowlist", []))
 
         manifests_by_id: dict[str, tuple[Path, dict[str, Any]]] = {}
         for manifest_path in manifests:
@@ -141,9 +184,6 @@ class PluginRegistry:
             plugin_id = manifest["plugin_id"]
             manifests_by_id[plugin_id] = (manifest_path, manifest)
 
-        loaded: list[LoadedPlugin] = []
-        capabilities = CapabilityRegistry()
-
         def is_enabled(pid: str, manifest: dict[str, Any]) -> bool:
             if self.config.get("plugins", {}).get("safe_mode", False):
                 return pid in default_pack
@@ -157,6 +197,8 @@ class PluginRegistry:
             if pid in allowlist and is_enabled(pid, manifest)
         }
 
+        resolved: list[tuple[Path, dict[str, Any]]] = []
+        self.lock_results = {}
         for plugin_id, (manifest_path, manifest) in manifests_by_id.items():
             if plugin_id not in allowlist:
                 continue
@@ -170,7 +212,42 @@ class PluginRegistry:
                     raise PluginError(f"Plugin {plugin_id} depends on disabled {dep}")
             self._check_permissions(manifest)
             self._check_lock(plugin_id, manifest_path, manifest_path.parent, lockfile)
+            resolved.append((manifest_path, manifest))
+        return resolved
 
+    def verify_locks(self, resolved: list[tuple[Path, dict[str, Any]]]) -> None:
+        """Re-run the lockfile hash checks for an already resolved plugin set (warm boot)."""
+        lockfile = self.load_lockfile()
+        self.lock_results = {}
+        for manifest_path, manifest in resolved:
+            self._check_lock(manifest["plugin_id"], manifest_path, manifest_path.parent, lockfile)
+
+    def load_plugins(
+        self,
+        resolved: list[tuple[Path, dict[str, Any]]] | None = None,
+        capability_map: dict[str, dict[str, list[str]]] | None = None,
+        capabilities: CapabilityRegistry | None = None,
+    ) -> tuple[list[LoadedPlugin], CapabilityRegistry]:
+        """Instantiate plugins; `resolved`/`capability_map` come from a boot snapshot when warm.
+
+        Plugin capabilities are added to `capabilities`, which the kernel
+        pre-populates with its own services; a bare registry is used otherwise.
+        """
+        if resolved is None:
+            resolved = self.resolve_plugins()
+        known_methods = capability_map or {}
+        hosting_cfg = self.config.get("plugins", {}).get("hosting", {})
+        hosting_mode = hosting_cfg.get("mode", "inproc")
+        inproc_allowlist = set(hosting_cfg.get("inproc_allowlist", []))
+
+        loaded: list[LoadedPlugin] = []
+        if capabilities is None:
+            capabilities = CapabilityRegistry()
+        self.hosts = []
+        self.capability_map = {}
+
+        for manifest_path, manifest in resolved:
+            plugin_id = manifest["plugin_id"]
             entrypoints = manifest.get("entrypoints", [])
             if not entrypoints:
                 raise PluginError(f"Plugin {plugin_id} has no entrypoints")
@@ -181,8 +258,20 @@ class PluginRegistry:
                 module_name = f"autocapture_plugin_{plugin_id.replace('.', '_')}"
                 network_allowed = bool(manifest.get("permissions", {}).get("network", False))
                 if hosting_mode == "subprocess" and plugin_id not in inproc_allowlist:
-                    instance = SubprocessPlugin(module_path, entry["callable"], plugin_id, network_allowed, self.config)
+                    host_key = f"{plugin_id}:{entry['id']}"
+                    instance = SubprocessPlugin(
+                        module_path,
+                        entry["callable"],
+                        plugin_id,
+                        network_allowed,
+                        self.config,
+                        methods=known_methods.get(host_key),
+                    )
                     caps = instance.capabilities()
+                    self.hosts.append(instance)
+                    self.capability_map[host_key] = instance.method_map()
+                    # The host process applies the guard; the pipe round trip needs none.
+                    guarded = False
                 else:
                     spec = importlib.util.spec_from_file_location(module_name, module_path)
                     if spec is None or spec.loader is None:
@@ -206,8 +295,9 @@ class PluginRegistry:
                         if not hasattr(instance, "capabilities"):
                             raise PluginError(f"Plugin {plugin_id} missing capabilities()")
                         caps = instance.capabilities()
+                    guarded = not network_allowed
                 for cap_name, impl in caps.items():
-                    capabilities.register(cap_name, impl, network_allowed)
+                    capabilities.register(cap_name, impl, network_allowed, guarded)
                 loaded.append(LoadedPlugin(plugin_id, manifest, instance, caps))
 
         return loaded, capabilities
@@ -2,29 +2,118 @@
 
 from __future__ import annotations
 
-import contextlib
-import socket
+import contextvars
+import sys
+import threading
+from typing import Any, Callable
 
 from autocapture_nx.kernel.errors import PermissionError
 
+# Per-thread/per-task policy; new threads start allowed unless spawned while denied.
+_network_denied: contextvars.ContextVar[bool] = contextvars.ContextVar("autocapture_network_denied", default=False)
+
+_DENIED_EVENTS = frozenset(
+    {
+        "socket.__new__",
+        "socket.bind",
+        "socket.connect",
+        "socket.getaddrinfo",
+        "socket.gethostbyaddr",
+        "socket.gethostbyname",
+        "socket.sendmsg",
+        "socket.sendto",
+    }
+)
+
+_install_lock = threading.Lock()
+_installed = False
+
+
+def _audit_hook(event: str, _args: tuple) -> None:
+    if event in _DENIED_EVENTS and _network_denied.get():
+        raise PermissionError("Network access is denied for this plugin")
+
+
+def _propagating_start(original_start):
+    def start(self: threading.Thread) -> None:
+        if _network_denied.get():
+            run = self.run
+
+            def denied_run() -> None:
+                _network_denied.set(True)
+                run()
+
+            self.run = denied_run  # type: ignore[method-assign]
+        original_start(self)
+
+    return start
+
+
+def install_network_guard() -> None:
+    """Install the process-wide socket audit hook once.
+
+    The hook only consults the current context's policy, so guarding a call is
+    a context variable set/reset rather than a patch of the socket module.
+    Threads started while the network is denied inherit the denial.
+    """
+    global _installed
+    if _installed:
+        return
+    with _install_lock:
+        if _installed:
+            return
+        sys.addaudithook(_audit_hook)
+        threading.Thread.start = _propagating_start(threading.Thread.start)  # type: ignore[method-assign]
+        _installed = True
+
+
+def network_denied() -> bool:
+    return _network_denied.get()
+
+
+class _AllowNetwork:
+    """Leaves the current policy untouched (an outer denial still applies)."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *_exc) -> None:
+        return None
+
+
+class _DenyNetwork:
+    __slots__ = ("_token",)
+
+    def __enter__(self) -> None:
+        self._token = _network_denied.set(True)
+
+    def __exit__(self, *_exc) -> None:
+        _network_denied.reset(self._token)
+
+
+_ALLOW = _AllowNetwork()
+
 
-@contextlib.contextmanager
 def network_guard(enabled: bool):
-    """Deny network access when enabled is False by patching socket APIs."""
+    """Deny network access for the current thread/context when enabled is False."""
     if enabled:
-        yield
-        return
+        return _ALLOW
+    return _DenyNetwork()
 
-    original_socket = socket.socket
-    original_create_connection = socket.create_connection
 
-    def _blocked(*_args, **_kwargs):
-        raise PermissionError("Network access is denied for this plugin")
+def deny_network(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap func so every call runs with network access denied."""
+
+    def guarded(*args: Any, **kwargs: Any) -> Any:
+        token = _network_denied.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _network_denied.reset(token)
+
+    return guarded
+
 
-    socket.socket = _blocked  # type: ignore[assignment]
-    socket.create_connection = _blocked  # type: ignore[assignment]
-    try:
-        yield
-    finally:
-        socket.socket = original_socket  # type: ignore[assignment]
-        socket.create_connection = original_create_connection  # type: ignore[assignment]
+install_network_guard()
@@ -11,6 +11,7 @@ from typing import Any
 
 from autocapture_nx.kernel.canonical_json import dumps
 from autocapture_nx.kernel.hashing import sha256_text
+from autocapture_nx.kernel.metrics import plugin_metrics
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 from autocapture_nx.windows.win_capture import iter_screenshots
 
@@ -50,24 +51,43 @@ class CaptureWindows(PluginBase):
         anchor = self.context.get_capability("anchor.writer")
         backpressure = self.context.get_capability("capture.backpressure")
         logger = self.context.get_capability("observability.logger")
+        metrics = plugin_metrics(self.context)
+        frames_total = metrics.counter("autocapture_capture_frames_total", help="Frames captured")
+        frames_dropped = metrics.counter(
+            "autocapture_capture_frames_dropped_total", help="Frame slots missed against the current fps target"
+        )
+        fps_achieved = metrics.gauge("autocapture_capture_fps", help="Frames per second achieved over the last segment")
+        queue_depth = metrics.gauge("autocapture_capture_queue_depth", help="Frames buffered for the current segment")
+        flush_us = metrics.histogram("autocapture_capture_segment_flush_us", help="Segment flush time in microseconds")
 
         frames = []
         segment_start = time.time()
         sequence = 0
+        last_frame_at: float | None = None
 
         for frame in iter_screenshots(fps):
             if self._stop.is_set():
                 break
             frames.append(frame)
             now = time.time()
+            frames_total.inc()
+            if last_frame_at is not None:
+                missed = int((now - last_frame_at) * fps + 0.5) - 1
+                if missed > 0:
+                    frames_dropped.inc(missed)
+            last_frame_at = now
             if now - segment_start >= segment_seconds:
                 if not self._check_disk(logger, journal, ledger, anchor, warn_free, critical_free):
                     self._stop.set()
                     break
+                fps_achieved.set(len(frames) / max(now - segment_start, 1e-6))
+                flush_started = time.perf_counter()
                 self._flush_segment(frames, storage_media, storage_meta, journal, ledger, anchor, sequence)
+                flush_us.observe((time.perf_counter() - flush_started) * 1_000_000)
                 frames = []
                 sequence += 1
                 segment_start = now
+            queue_depth.set(len(frames))
 
             # Apply backpressure based on queue depth (frames length)
             update = backpressure.adjust({"queue_depth": len(frames), "now": now}, {"fps_target": fps, "bitrate_kbps": 8000})
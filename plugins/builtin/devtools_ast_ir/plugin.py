@@ -2,17 +2,22 @@
 
 from __future__ import annotations
 
-import ast
 import difflib
+import hashlib
 import json
 import os
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from autocapture_nx.kernel.canonical_json import dumps
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
+from tools.hypervisor.ast_scan import SUMMARY_VERSION, summarize_job
+
+# Below this many cache misses, process start-up costs more than it saves.
+_PARALLEL_MIN_FILES = 16
 
 
 @dataclass
@@ -20,6 +25,9 @@ class CodeASTSummary:
     files: int
     functions: int
     classes: int
+    per_file: dict[str, dict[str, Any]] = field(default_factory=dict)
+    import_graph: dict[str, list[str]] = field(default_factory=dict)
+    cache: dict[str, int] = field(default_factory=dict)
 
 
 class ASTIRTool(PluginBase):
@@ -29,21 +37,79 @@ class ASTIRTool(PluginBase):
     def capabilities(self) -> dict[str, Any]:
         return {"devtools.ast_ir": self}
 
+    def _load_cache(self, path: Path) -> dict[str, dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != SUMMARY_VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def _save_cache(self, path: Path, entries: dict[str, dict[str, Any]]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump({"version": SUMMARY_VERSION, "entries": entries}, handle, sort_keys=True)
+        os.replace(tmp_path, path)
+
     def _scan_python_ast(self, root: str) -> CodeASTSummary:
+        cfg = self.context.config.get("devtools", {}).get("ast_ir", {})
+        cache_path = Path(cfg.get("cache_path", "config/cache/ast_ir.json"))
+        max_workers = int(cfg.get("max_workers", 0)) or os.cpu_count() or 1
         path = Path(root)
-        files = 0
-        functions = 0
-        classes = 0
-        for file_path in path.rglob("*.py"):
-            files += 1
-            with open(file_path, "r", encoding="utf-8") as handle:
-                node = ast.parse(handle.read())
-            for item in ast.walk(node):
-                if isinstance(item, ast.FunctionDef):
-                    functions += 1
-                elif isinstance(item, ast.ClassDef):
-                    classes += 1
-        return CodeASTSummary(files=files, functions=functions, classes=classes)
+        base = path.parent
+
+        # Summaries are keyed by content hash (plus relative path, which names
+        # the module), so renames, reverts and branch switches stay cached.
+        cached = self._load_cache(cache_path)
+        keys: dict[str, str] = {}
+        misses: list[tuple[str, bytes]] = []
+        for file_path in sorted(path.rglob("*.py")):
+            rel_path = file_path.relative_to(base).as_posix()
+            source = file_path.read_bytes()
+            key = f"{hashlib.sha256(source).hexdigest()}:{rel_path}"
+            keys[rel_path] = key
+            if key not in cached:
+                misses.append((rel_path, source))
+
+        if len(misses) >= _PARALLEL_MIN_FILES and max_workers > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                fresh = list(pool.map(summarize_job, misses, chunksize=8))
+        else:
+            fresh = [summarize_job(job) for job in misses]
+        for (rel_path, _source), summary in zip(misses, fresh):
+            cached[keys[rel_path]] = summary
+
+        summaries = {rel_path: cached[key] for rel_path, key in keys.items()}
+        # Stale entries under this root (deleted or edited files) are dropped;
+        # entries from other scan roots sharing the cache file are kept.
+        prefix = "" if path == base else f"{path.relative_to(base).as_posix()}/"
+        current = set(keys.values())
+        self._save_cache(
+            cache_path,
+            {key: value for key, value in cached.items() if key in current or not key.partition(":")[2].startswith(prefix)},
+        )
+
+        modules = {summary["module"] for summary in summaries.values()}
+        import_graph = {}
+        for summary in summaries.values():
+            targets = (set(summary["imports"]) | set(summary["from_imports"])) & modules
+            targets.discard(summary["module"])
+            import_graph[summary["module"]] = sorted(targets)
+        per_file = {
+            rel_path: {key: value for key, value in summary.items() if key != "from_imports"}
+            for rel_path, summary in summaries.items()
+        }
+        return CodeASTSummary(
+            files=len(per_file),
+            functions=sum(summary["functions"] for summary in per_file.values()),
+            classes=sum(summary["classes"] for summary in per_file.values()),
+            per_file=per_file,
+            import_graph=dict(sorted(import_graph.items())),
+            cache={"hits": len(per_file) - len(misses), "misses": len(misses)},
+        )
 
     def _build_design_ir(self) -> dict[str, Any]:
         cfg = self.context.config
@@ -15,11 +15,18 @@ class DiffusionHarness(PluginBase):
     def capabilities(self) -> dict[str, Any]:
         return {"devtools.diffusion": self}
 
-    def run(self, axis: str, k_variants: int | None = None, dry_run: bool | None = None) -> dict[str, Any]:
+    def run(
+        self,
+        axis: str,
+        k_variants: int | None = None,
+        dry_run: bool | None = None,
+        max_parallel: int | None = None,
+    ) -> dict[str, Any]:
         cfg = self.context.config.get("devtools", {}).get("diffusion", {})
         k = k_variants if k_variants is not None else cfg.get("k_variants", 1)
         dry = dry_run if dry_run is not None else cfg.get("dry_run", True)
-        return run_diffusion(axis=axis, k_variants=k, dry_run=dry)
+        jobs = max_parallel if max_parallel is not None else cfg.get("max_parallel", 0)
+        return run_diffusion(axis=axis, k_variants=k, dry_run=dry, max_parallel=jobs)
 
 
 def create_plugin(plugin_id: str, context: PluginContext) -> DiffusionHarness:
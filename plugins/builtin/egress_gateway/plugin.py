@@ -2,12 +2,11 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
 from typing import Any
 
-from autocapture_nx.kernel.config import SchemaLiteValidator
 from autocapture_nx.kernel.errors import ConfigError
+from autocapture_nx.kernel.schema import CompiledSchema, load_compiled_schema
 
 from autocapture_nx.kernel.errors import NetworkDisabledError, PermissionError
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
@@ -16,18 +15,16 @@ from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 class EgressGateway(PluginBase):
     def __init__(self, plugin_id: str, context: PluginContext) -> None:
         super().__init__(plugin_id, context)
-        self._validator = SchemaLiteValidator()
-        self._schema = None
+        self._schema: CompiledSchema | None = None
 
     def capabilities(self) -> dict[str, Any]:
         return {"egress.gateway": self}
 
-    def _load_schema(self) -> dict[str, Any]:
+    def _load_schema(self) -> CompiledSchema:
         if self._schema is not None:
             return self._schema
         schema_path = Path("contracts") / "reasoning_packet.schema.json"
-        with schema_path.open("r", encoding="utf-8") as handle:
-            self._schema = json.load(handle)
+        self._schema = load_compiled_schema(schema_path)
         return self._schema
 
     def _build_reasoning_packet(self, payload: dict[str, Any], sanitized: dict[str, Any]) -> dict[str, Any]:
@@ -67,7 +64,7 @@ class EgressGateway(PluginBase):
         if reasoning_only:
             sanitized = self._build_reasoning_packet(payload, sanitized)
             try:
-                self._validator.validate(self._load_schema(), sanitized)
+                self._load_schema().validate(sanitized)
             except ConfigError as exc:
                 raise PermissionError(f"Reasoning packet schema violation: {exc}") from exc
 
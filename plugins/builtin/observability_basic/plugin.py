@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import atexit
 import json
 import os
+import threading
 from datetime import datetime, timezone
 from typing import Any
 
@@ -16,6 +18,12 @@ class ObservabilityLogger(PluginBase):
         data_dir = context.config.get("storage", {}).get("data_dir", "data")
         self._log_path = os.path.join(data_dir, "logs", "observability.log")
         os.makedirs(os.path.dirname(self._log_path), exist_ok=True)
+        # One buffered handle for the plugin's lifetime. A background thread
+        # flushes it every interval, and close() (also run at exit) drains it.
+        self._handle = None
+        self._lock = threading.Lock()
+        self._flush_interval_s = 1.0
+        self._flusher: tuple[threading.Thread, threading.Event] | None = None
 
     def capabilities(self) -> dict[str, Any]:
         return {"observability.logger": self}
@@ -35,8 +43,41 @@ class ObservabilityLogger(PluginBase):
                 else:
                     payload[key] = "<redacted>"
 
-        with open(self._log_path, "a", encoding="utf-8") as handle:
-            handle.write(json.dumps(payload, sort_keys=True) + "\n")
+        line = json.dumps(payload, sort_keys=True) + "\n"
+        with self._lock:
+            if self._handle is None:
+                self._handle = open(self._log_path, "a", encoding="utf-8", buffering=65536)
+                if self._flusher is None:
+                    stop = threading.Event()
+                    thread = threading.Thread(target=self._flush_loop, args=(stop,), name="obs-flush", daemon=True)
+                    self._flusher = (thread, stop)
+                    thread.start()
+                    atexit.register(self.close)
+            self._handle.write(line)
+            if event.endswith(".critical"):
+                self._handle.flush()
+
+    def _flush_loop(self, stop: threading.Event) -> None:
+        while not stop.wait(self._flush_interval_s):
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            thread, stop = flusher
+            stop.set()
+            if thread is not threading.current_thread():
+                thread.join(timeout=self._flush_interval_s + 1)
+        atexit.unregister(self.close)
 
 
 def create_plugin(plugin_id: str, context: PluginContext) -> ObservabilityLogger:
@@ -2,35 +2,105 @@
 
 from __future__ import annotations
 
+import collections
+import hashlib
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
 
+from autocapture_nx.kernel.ocr_worker import ocr_job, require_engine
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 
 
 class OCRLocal(PluginBase):
+    """``ocr.engine`` with batched, pooled extraction.
+
+    ``extract_batch`` dedupes images by content hash, serves repeats from an
+    LRU of results and sends the rest to a process pool of
+    ``processing.idle.max_concurrency_cpu`` workers (capped at the CPU
+    count), each of which decodes, grayscales, downsizes and OCRs one image.
+    """
+
     def __init__(self, plugin_id: str, context: PluginContext) -> None:
         super().__init__(plugin_id, context)
+        cfg = context.config.get("processing", {}).get("ocr", {})
+        self.engine = str(cfg.get("engine", "tesseract"))
+        self.max_side_px = int(cfg.get("max_side_px", 2400))
+        self.cache_entries = int(cfg.get("cache_entries", 2048))
+        cpu_limit = int(context.config.get("processing", {}).get("idle", {}).get("max_concurrency_cpu", 2))
+        self.max_workers = max(1, min(cpu_limit, os.cpu_count() or 1))
+        self._cache: collections.OrderedDict[str, dict[str, Any]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
 
     def capabilities(self) -> dict[str, Any]:
         return {"ocr.engine": self}
 
-    def extract(self, image_bytes: bytes) -> dict[str, Any]:
-        try:
-            import pytesseract
-            from PIL import Image
-        except Exception as exc:
-            raise RuntimeError(f"Missing OCR dependency: {exc}")
-        from io import BytesIO
+    def model_id(self) -> str:
+        """Identifies what produced a result: engine plus preprocessing size."""
+        return f"{self.engine}@{self.max_side_px}"
+
+    def _cached(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def _store(self, key: str, result: dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
 
+    def _run(self, images: list[bytes]) -> list[dict[str, Any]]:
+        jobs = [(image, self.engine, self.max_side_px) for image in images]
+        if len(jobs) < 2 or self.max_workers < 2:
+            return [ocr_job(job) for job in jobs]
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            pool = self._pool
+        return list(pool.map(ocr_job, jobs))
+
+    def extract_batch(self, images: list[bytes]) -> dict[str, Any]:
+        """OCR ``images``; ``results[i]`` has ``text`` and ``words`` (``text``, ``box`` [x0, y0, x1, y1], ``conf``).
+
+        An undecodable image gets empty text and an ``error`` instead of failing the batch.
+        """
+        require_engine(self.engine)
+        keys = [f"{self.model_id()}:{hashlib.sha256(image).hexdigest()}" for image in images]
+        results: dict[str, dict[str, Any]] = {}
+        misses: dict[str, bytes] = {}
+        for key, image in zip(keys, images):
+            if key in results or key in misses:
+                continue
+            cached = self._cached(key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                misses[key] = image
+        for key, result in zip(misses, self._run(list(misses.values()))):
+            if "error" not in result:
+                self._store(key, result)
+            results[key] = result
+        return {"engine": self.engine, "results": [results[key] for key in keys]}
+
+    def extract(self, image_bytes: bytes) -> dict[str, Any]:
         if not image_bytes:
             raise RuntimeError("Missing OCR input bytes")
-        try:
-            img = Image.open(BytesIO(image_bytes))
-        except Exception as exc:
-            raise RuntimeError(f"Invalid OCR image bytes: {exc}")
-        text = pytesseract.image_to_string(img)
-        return {"text": text}
+        result = self.extract_batch([image_bytes])["results"][0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
 
 
 def create_plugin(plugin_id: str, context: PluginContext) -> OCRLocal:
@@ -7,6 +7,8 @@ from typing import Any
 
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 
+MODEL_ID = "local_cross_encoder"
+
 
 class RerankerStub(PluginBase):
     def __init__(self, plugin_id: str, context: PluginContext) -> None:
@@ -32,12 +34,18 @@ class RerankerStub(PluginBase):
             raise RuntimeError(f"Failed to load reranker model at {model_path}: {exc}")
         return self._model
 
-    def rerank(self, items: list[dict[str, Any]], query: str) -> list[dict[str, Any]]:
+    def score_batch(self, query: str, texts: list[str]) -> dict[str, Any]:
+        """Score (query, text) pairs in one ``predict`` call; callers choose the batch size."""
         model = self._load()
-        pairs = [(query, item.get("text", "")) for item in items]
-        scores = model.predict(pairs)
+        if not texts:
+            return {"model_id": MODEL_ID, "scores": []}
+        scores = model.predict([(query, text) for text in texts], batch_size=len(texts))
+        return {"model_id": MODEL_ID, "scores": [float(score) for score in scores]}
+
+    def rerank(self, items: list[dict[str, Any]], query: str) -> list[dict[str, Any]]:
+        scores = self.score_batch(query, [item.get("text", "") for item in items])["scores"]
         for item, score in zip(items, scores):
-            item["rerank_score"] = float(score)
+            item["rerank_score"] = score
         return sorted(items, key=lambda i: -i.get("rerank_score", 0.0))
 
 
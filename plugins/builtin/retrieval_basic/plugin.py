@@ -5,8 +5,12 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
+from autocapture_nx.kernel.storage_bulk import chunks, get_many
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 
+# Records are read in batches of this many (see ``storage_bulk.get_many``).
+_SCAN_BATCH = 256
+
 
 class RetrievalStrategy(PluginBase):
     def __init__(self, plugin_id: str, context: PluginContext) -> None:
@@ -15,25 +19,35 @@ class RetrievalStrategy(PluginBase):
     def capabilities(self) -> dict[str, Any]:
         return {"retrieval.strategy": self}
 
+    @staticmethod
+    def _match(
+        record_id: str, record: dict[str, Any], query_lower: str, time_window: dict[str, Any] | None
+    ) -> dict[str, Any] | None:
+        text = str(record.get("text", ""))
+        lowered = text.lower()
+        if query_lower and query_lower not in lowered:
+            return None
+        ts = record.get("ts_utc")
+        if time_window and ts:
+            start = time_window.get("start")
+            end = time_window.get("end")
+            if start and ts < start:
+                return None
+            if end and ts > end:
+                return None
+        score = 1 if query_lower in lowered else 0
+        # The text travels with the result so the answer path need not fetch the record again.
+        return {"record_id": record_id, "score": score, "ts_utc": ts, "text": text}
+
     def search(self, query: str, time_window: dict[str, Any] | None = None) -> list[dict[str, Any]]:
         store = self.context.get_capability("storage.metadata")
         results: list[dict[str, Any]] = []
         query_lower = query.lower()
-        for record_id in getattr(store, "keys", lambda: [])():
-            record = store.get(record_id, {})
-            text = str(record.get("text", "")).lower()
-            if query_lower and query_lower not in text:
-                continue
-            ts = record.get("ts_utc")
-            if time_window and ts:
-                start = time_window.get("start")
-                end = time_window.get("end")
-                if start and ts < start:
-                    continue
-                if end and ts > end:
-                    continue
-            score = 1 if query_lower in text else 0
-            results.append({"record_id": record_id, "score": score, "ts_utc": ts})
+        for batch in chunks(getattr(store, "keys", lambda: [])(), _SCAN_BATCH):
+            for record_id, record in get_many(store, batch, {}).items():
+                result = self._match(record_id, record or {}, query_lower, time_window)
+                if result is not None:
+                    results.append(result)
 
         def ts_key(ts: str | None) -> float:
             if not ts:
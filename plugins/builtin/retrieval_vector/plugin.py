@@ -0,0 +1,1000 @@
+"""Hybrid retrieval: quantized embedding index fused with lexical matches."""
+
+from __future__ import annotations
+
+import base64
+import collections
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any
+
+from autocapture_nx.kernel.crypto import KeyringCipher
+from autocapture_nx.kernel.metrics import plugin_metrics
+from autocapture_nx.kernel.storage_bulk import chunks, get_many
+from autocapture_nx.plugin_system.api import PluginBase, PluginContext
+
+INDEX_VERSION = 1
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_CHUNK_ROWS = 65536
+# Records read per get_many while looking for unindexed text.
+_PENDING_BATCH = 256
+_SEALED_CHUNK = re.compile(r"index\.(\d+)\.enc\.json")
+_SEALED_CHUNKS_MAX = 32
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except Exception as exc:
+        raise RuntimeError(f"Missing vector dependency: {exc}")
+    return np
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp, path)
+
+
+class HashingEmbedder:
+    """Deterministic stand-in embedder (signed feature hashing).
+
+    Words and their character trigrams are hashed into ``dim`` buckets, so
+    related spellings ("invoice"/"invoices") land close together. It needs no
+    model weights and yields identical vectors on every machine.
+    """
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.model_id = f"stand_in_hash_v1_{dim}"
+
+    def _features(self, text: str) -> list[str]:
+        features: list[str] = []
+        for word in _TOKEN.findall(text.lower()):
+            features.append(f"w:{word}")
+            padded = f"<{word}>"
+            features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, text: str) -> dict[str, Any]:
+        np = _numpy()
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vec[value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        return {"vector": vec.tolist(), "model_id": self.model_id}
+
+    def embed_batch(self, texts: list[str]) -> dict[str, Any]:
+        np = _numpy()
+        matrix = np.asarray([self.embed(text)["vector"] for text in texts], dtype="<f4").reshape(len(texts), self.dim)
+        return {"model_id": self.model_id, "count": len(texts), "dim": self.dim, "vectors": matrix.tobytes()}
+
+
+class VectorIndex:
+    """Row-per-record embedding matrix with a record id map.
+
+    Rows are L2-normalized and stored as float16, or as int8 with a float32
+    scale per row. With a ``cipher`` the matrix is held in memory and each
+    flush seals only the rows added or changed since the last one as a new
+    ``index.<seq>.enc.json`` chunk; once ``_SEALED_CHUNKS_MAX`` chunks exist the
+    next flush seals every row as a base chunk and drops the older ones, so a
+    write costs O(changed rows) amortized. Without a cipher the matrix is a
+    memory-mapped file that grows by doubling, and ``ids.json`` is rewritten
+    atomically on flush. Rows past the count recorded in ``ids.json`` (a crash
+    mid-write) are ignored.
+    """
+
+    def __init__(self, root: str, dim: int, dtype: str, model_id: str, cipher: "IndexCipher | None" = None) -> None:
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.root = root
+        self.dim = dim
+        self.dtype = dtype
+        self.model_id = model_id
+        self._cipher = cipher
+        self.ids: list[str] = []
+        self.ts: list[str | None] = []
+        self._rows: dict[str, int] = {}
+        self._matrix: Any = None
+        self._scales: Any = None
+        self._dirty = False
+        self._changed: set[int] = set()
+        self._sealed: list[str] = []
+        self._next_seq = 0
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._rows
+
+    def ts_for(self, record_id: str) -> str | None:
+        return self.ts[self._rows[record_id]]
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.root, "vectors.f16" if self.dtype == "float16" else "vectors.i8")
+
+    @property
+    def _scales_path(self) -> str:
+        return os.path.join(self.root, "scales.f32")
+
+    @property
+    def _ids_path(self) -> str:
+        return os.path.join(self.root, "ids.json")
+
+    def _sealed_paths(self) -> list[str]:
+        found = []
+        for name in os.listdir(self.root):
+            match = _SEALED_CHUNK.fullmatch(name)
+            if match:
+                found.append((int(match.group(1)), name))
+        return [os.path.join(self.root, name) for _, name in sorted(found)]
+
+    def _header(self) -> dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "model_id": self.model_id,
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "count": len(self.ids),
+        }
+
+    def _compatible(self, header: dict[str, Any]) -> bool:
+        return header.get("version") == INDEX_VERSION and all(
+            header.get(key) == value for key, value in self._header().items() if key != "count"
+        )
+
+    def _load(self) -> None:
+        np = _numpy()
+        if self._cipher is not None:
+            self._allocate(0)
+            paths = self._sealed_paths()
+            for path in paths:
+                with np.load(io.BytesIO(self._cipher.read(path)), allow_pickle=False) as data:
+                    header = json.loads(str(data["header"]))
+                    if not self._compatible(header):
+                        for stale in paths:
+                            os.remove(stale)
+                        self._set_ids([], [])
+                        return
+                    if header["base"]:
+                        self._set_ids([], [])
+                        self._sealed = []
+                    self._apply_sealed(header, data)
+                self._sealed.append(path)
+            if paths:
+                self._next_seq = int(_SEALED_CHUNK.fullmatch(os.path.basename(paths[-1])).group(1)) + 1
+            return
+        header: dict[str, Any] = {}
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path, "r", encoding="utf-8") as handle:
+                header = json.load(handle)
+        if not self._compatible(header) or not os.path.exists(self._matrix_path):
+            for path in (self._matrix_path, self._scales_path, self._ids_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._allocate(0)
+            return
+        self._set_ids(header["ids"][: header["count"]], header["ts"][: header["count"]])
+        self._allocate(len(self.ids))
+
+    def _apply_sealed(self, header: dict[str, Any], data: Any) -> None:
+        """Replay one sealed chunk: rows at the end are appended, earlier rows overwritten."""
+        np = _numpy()
+        rows = header["rows"]
+        for row, record_id, ts_utc in zip(rows, header["ids"], header["ts"]):
+            if row == len(self.ids):
+                self.ids.append(record_id)
+                self.ts.append(ts_utc)
+                self._rows[record_id] = row
+            else:
+                self.ts[row] = ts_utc
+        self._allocate(len(self.ids))
+        select = np.asarray(rows, dtype=np.int64)
+        self._matrix[select] = data["matrix"]
+        self._scales[select] = data["scales"] if self.dtype == "int8" else 1.0
+
+    def _set_ids(self, ids: list[str], ts: list[str | None]) -> None:
+        self.ids = list(ids)
+        self.ts = list(ts)
+        self._rows = {record_id: row for row, record_id in enumerate(self.ids)}
+
+    def _allocate(self, rows: int) -> None:
+        """Ensure capacity for ``rows`` rows, keeping existing contents."""
+        np = _numpy()
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if self._matrix is not None and rows <= capacity:
+            return
+        new_capacity = max(64, rows, capacity * 2)
+        item = np.float16 if self.dtype == "float16" else np.int8
+        if self._cipher is not None:
+            matrix = np.zeros((new_capacity, self.dim), dtype=item)
+            scales = np.zeros(new_capacity, dtype=np.float32)
+            if self._matrix is not None:
+                matrix[:capacity] = self._matrix
+                scales[:capacity] = self._scales
+            self._matrix, self._scales = matrix, scales
+            return
+        # Drop the old maps before resizing the files underneath them.
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._scales.flush()
+        self._matrix = self._scales = None
+        for path, width in ((self._matrix_path, self.dim * np.dtype(item).itemsize), (self._scales_path, 4)):
+            with open(path, "ab") as handle:
+                if handle.tell() < new_capacity * width:
+                    handle.truncate(new_capacity * width)
+        self._matrix = np.memmap(self._matrix_path, dtype=item, mode="r+", shape=(new_capacity, self.dim))
+        self._scales = np.memmap(self._scales_path, dtype=np.float32, mode="r+", shape=(new_capacity,))
+
+    def add(self, record_id: str, vector: Any, ts_utc: str | None) -> None:
+        np = _numpy()
+        vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vec.shape[0] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vector, got {vec.shape[0]}")
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            vec = vec / norm
+        row = self._rows.get(record_id)
+        if row is None:
+            row = len(self.ids)
+            self._allocate(row + 1)
+            self.ids.append(record_id)
+            self.ts.append(ts_utc)
+            self._rows[record_id] = row
+        else:
+            self.ts[row] = ts_utc
+        self._changed.add(row)
+        if self.dtype == "float16":
+            self._matrix[row] = vec.astype(np.float16)
+            self._scales[row] = 1.0
+        else:
+            scale = float(np.abs(vec).max()) / 127.0 if norm > 0 else 1.0
+            self._matrix[row] = np.round(vec / scale).astype(np.int8)
+            self._scales[row] = scale
+        self._dirty = True
+
+    def row_of(self, record_id: str) -> int:
+        return self._rows[record_id]
+
+    def dense(self, rows: Any) -> Any:
+        """Dequantized float32 copies of ``rows``."""
+        np = _numpy()
+        block = np.asarray(self._matrix[rows], dtype=np.float32)
+        if self.dtype == "int8":
+            block *= self._scales[rows][:, None]
+        return block
+
+    def scores(self, query: Any, rows: Any = None) -> Any:
+        """Cosine similarity of ``query`` against ``rows`` (default: every row), in chunks."""
+        np = _numpy()
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(q))
+        count = len(self.ids) if rows is None else len(rows)
+        out = np.zeros(count, dtype=np.float32)
+        if norm == 0 or count == 0:
+            return out
+        q = q / norm
+        for start in range(0, count, _CHUNK_ROWS):
+            stop = min(count, start + _CHUNK_ROWS)
+            select = slice(start, stop) if rows is None else rows[start:stop]
+            block = np.asarray(self._matrix[select], dtype=np.float32)
+            out[start:stop] = block @ q
+            if self.dtype == "int8":
+                out[start:stop] *= self._scales[select]
+        return out
+
+    def top_k(self, query: Any, k: int, mask: Any = None, rows: Any = None) -> list[tuple[str, float]]:
+        """Best ``k`` of ``rows`` (default: every row) whose ``mask`` entry is set."""
+        np = _numpy()
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        if mask is not None:
+            rows = rows[mask[rows]]
+        k = min(k, len(rows))
+        if k <= 0:
+            return []
+        scores = self.scores(query, rows)
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(self.ids[rows[i]], float(scores[i])) for i in idx]
+
+    def flush(self, compact: bool = False) -> None:
+        if not self._dirty:
+            return
+        if self._cipher is not None:
+            base = compact or not self._sealed or len(self._sealed) >= _SEALED_CHUNKS_MAX
+            self._seal(list(range(len(self.ids))) if base else sorted(self._changed), base)
+        else:
+            self._matrix.flush()
+            self._scales.flush()
+            header = {**self._header(), "ids": self.ids, "ts": self.ts}
+            _atomic_write(self._ids_path, json.dumps(header).encode("utf-8"))
+        self._changed.clear()
+        self._dirty = False
+
+    def _seal(self, rows: list[int], base: bool) -> None:
+        """Write ``rows`` as the next sealed chunk; a base chunk supersedes every earlier one."""
+        np = _numpy()
+        select = np.asarray(rows, dtype=np.int64)
+        header = {
+            **self._header(),
+            "base": base,
+            "rows": rows,
+            "ids": [self.ids[row] for row in rows],
+            "ts": [self.ts[row] for row in rows],
+        }
+        arrays = {"header": np.array(json.dumps(header)), "matrix": self._matrix[select]}
+        if self.dtype == "int8":
+            arrays["scales"] = self._scales[select]
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        path = os.path.join(self.root, f"index.{self._next_seq:08d}.enc.json")
+        self._cipher.write(path, buf.getvalue())
+        self._next_seq += 1
+        if base:
+            for stale in self._sealed:
+                os.remove(stale)
+            self._sealed = []
+        self._sealed.append(path)
+
+    def rewrite(self) -> int:
+        """Re-persist under the active key (key rotation), compacting sealed chunks."""
+        self._dirty = True
+        self.flush(compact=True)
+        return len(self.ids)
+
+    def close(self) -> None:
+        self.flush()
+        self._matrix = self._scales = None
+
+
+def _kmeans(data: Any, k: int, iterations: int, seed: int) -> Any:
+    """Spherical k-means over unit rows; empty clusters keep their centroid."""
+    np = _numpy()
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        norms = np.linalg.norm(sums, axis=1)
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids
+
+
+class IVFShard:
+    """Inverted-file ANN over one ``VectorIndex`` shard.
+
+    Below ``min_rows`` (or always, when it is None) the shard is scanned exactly. At ``min_rows`` a coarse
+    quantizer (``sqrt(rows)`` k-means centroids, capped at ``nlist``) is
+    trained on a deterministic sample; later rows join their nearest list on
+    insert, and the quantizer is retrained whenever the shard doubles. A query
+    scores only the rows in its ``nprobe`` nearest lists.
+    """
+
+    SAMPLE_ROWS = 20000
+
+    def __init__(
+        self,
+        vectors: VectorIndex,
+        nlist: int,
+        nprobe: int,
+        min_rows: int | None,
+        cipher: "IndexCipher | None" = None,
+    ) -> None:
+        np = _numpy()
+        self.vectors = vectors
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_rows = min_rows
+        self._cipher = cipher
+        self.centroids: Any = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.trained_rows = 0
+        self._dirty = False
+        self._load()
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.vectors.root, "ivf.enc.json" if self._cipher is not None else "ivf.npz")
+
+    def _load(self) -> None:
+        np = _numpy()
+        if self._cipher is not None:
+            payload = self._cipher.read(self._state_path)
+        elif os.path.exists(self._state_path):
+            with open(self._state_path, "rb") as handle:
+                payload = handle.read()
+        else:
+            payload = None
+        if payload is None:
+            return
+        with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+            centroids, assign, trained = data["centroids"], data["assign"], int(data["trained_rows"])
+        if centroids.shape[1] != self.vectors.dim or len(assign) > len(self.vectors):
+            return  # stale state for a rebuilt shard: retrain on demand
+        self.centroids, self.trained_rows = centroids, trained
+        self.assign = self._grown(assign, len(self.vectors))
+        if len(assign) < len(self.vectors):
+            self._assign_rows(np.arange(len(assign), len(self.vectors)))
+
+    def _grown(self, assign: Any, rows: int) -> Any:
+        np = _numpy()
+        if len(assign) >= rows:
+            return assign
+        grown = np.zeros(max(rows, 2 * len(assign)), dtype=np.int32)
+        grown[: len(assign)] = assign
+        return grown
+
+    def _assign_rows(self, rows: Any) -> None:
+        np = _numpy()
+        for start in range(0, len(rows), _CHUNK_ROWS):
+            chunk = rows[start : start + _CHUNK_ROWS]
+            self.assign[chunk] = np.argmax(self.vectors.dense(chunk) @ self.centroids.T, axis=1)
+        self._dirty = True
+
+    def train(self) -> None:
+        np = _numpy()
+        count = len(self.vectors)
+        rng = np.random.default_rng(count)
+        sample = np.arange(count)
+        if count > self.SAMPLE_ROWS:
+            sample = np.sort(rng.choice(count, size=self.SAMPLE_ROWS, replace=False))
+        k = max(1, min(self.nlist, int(np.sqrt(count)), len(sample)))
+        self.centroids = _kmeans(self.vectors.dense(sample), k, iterations=10, seed=count)
+        self.assign = np.zeros(count, dtype=np.int32)
+        self._assign_rows(np.arange(count))
+        self.trained_rows = count
+
+    def add(self, record_id: str, vector: Any, ts_utc: str | None) -> None:
+        np = _numpy()
+        self.vectors.add(record_id, vector, ts_utc)
+        count = len(self.vectors)
+        if self.centroids is None:
+            if self.min_rows is not None and count >= self.min_rows:
+                self.train()
+            return
+        if count >= 2 * self.trained_rows:
+            self.train()
+            return
+        self.assign = self._grown(self.assign, count)
+        self._assign_rows(np.array([self.vectors.row_of(record_id)]))
+
+    def top_k(self, query: Any, k: int, mask: Any = None) -> list[tuple[str, float]]:
+        np = _numpy()
+        if self.centroids is None:
+            return self.vectors.top_k(query, k, mask)
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        probe = np.argsort(-(self.centroids @ q), kind="stable")[: self.nprobe]
+        rows = np.flatnonzero(np.isin(self.assign[: len(self.vectors)], probe))
+        if mask is not None:
+            rows = rows[mask[rows]]
+            if len(rows) < k:
+                # A narrow time window starves the probed lists; the masked rows are few, scan them.
+                return self.vectors.top_k(query, k, mask)
+        return self.vectors.top_k(query, k, rows=rows)
+
+    def flush(self) -> None:
+        self.vectors.flush()
+        if not self._dirty or self.centroids is None:
+            return
+        np = _numpy()
+        buf = io.BytesIO()
+        np.savez(
+            buf,
+            centroids=self.centroids,
+            assign=self.assign[: len(self.vectors)],
+            trained_rows=np.array(self.trained_rows),
+        )
+        if self._cipher is not None:
+            self._cipher.write(self._state_path, buf.getvalue())
+        else:
+            _atomic_write(self._state_path, buf.getvalue())
+        self._dirty = False
+
+    def rewrite(self) -> int:
+        self._dirty = True
+        self.flush()
+        return self.vectors.rewrite()
+
+    def close(self) -> None:
+        self.flush()
+        self.vectors.close()
+
+
+def _parse_utc(ts: str | None) -> datetime | None:
+    if not ts:
+        return None
+    if ts.endswith("Z"):
+        ts = ts[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(ts)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _month_bounds(key: str) -> tuple[datetime, datetime]:
+    year, month = int(key[:4]), int(key[5:7])
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+
+class ShardedIndex:
+    """Time-partitioned ANN index: one ``IVFShard`` per UTC month.
+
+    Shards live in ``<root>/shards/<YYYY-MM>`` (``undated`` for records with
+    no timestamp). A time window skips shards outside it entirely and only
+    masks rows in the shards it cuts through.
+    """
+
+    UNDATED = "undated"
+
+    def __init__(
+        self,
+        root: str,
+        dim: int,
+        dtype: str,
+        model_id: str,
+        cipher: "IndexCipher | None" = None,
+        nlist: int = 1024,
+        nprobe: int = 16,
+        min_rows: int | None = 4096,
+    ) -> None:
+        self.root = root
+        self._shard_root = os.path.join(root, "shards")
+        self._args = (dim, dtype, model_id)
+        self._ivf = (nlist, nprobe, min_rows)
+        self._cipher = cipher
+        self.shards: dict[str, IVFShard] = {}
+        self._where: dict[str, str] = {}
+        os.makedirs(self._shard_root, exist_ok=True)
+        for key in sorted(os.listdir(self._shard_root)):
+            shard = self._open(key)
+            if not len(shard.vectors):
+                continue
+            for record_id in shard.vectors.ids:
+                self._where[record_id] = key
+
+    def _open(self, key: str) -> IVFShard:
+        shard = self.shards.get(key)
+        if shard is None:
+            vectors = VectorIndex(os.path.join(self._shard_root, key), *self._args, cipher=self._cipher)
+            shard = IVFShard(vectors, *self._ivf, cipher=self._cipher)
+            self.shards[key] = shard
+        return shard
+
+    @classmethod
+    def shard_key(cls, ts_utc: str | None) -> str:
+        parsed = _parse_utc(ts_utc)
+        return parsed.strftime("%Y-%m") if parsed is not None else cls.UNDATED
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._where
+
+    def ts_for(self, record_id: str) -> str | None:
+        return self.shards[self._where[record_id]].vectors.ts_for(record_id)
+
+    def add(self, record_id: str, vector: Any, ts_utc: str | None) -> None:
+        # Rows cannot move between shards; a re-indexed record stays where it landed.
+        key = self._where.get(record_id) or self.shard_key(ts_utc)
+        self._open(key).add(record_id, vector, ts_utc)
+        self._where[record_id] = key
+
+    def _covering(self, time_window: dict[str, Any] | None) -> list[tuple[IVFShard, bool]]:
+        """Shards that can hold matches, each flagged when rows still need a window mask."""
+        if not time_window:
+            return [(shard, False) for shard in self.shards.values()]
+        start = _parse_utc(time_window.get("start"))
+        end = _parse_utc(time_window.get("end"))
+        covering = []
+        for key, shard in self.shards.items():
+            if key == self.UNDATED:
+                continue
+            month_start, month_end = _month_bounds(key)
+            if (start and start >= month_end) or (end and end < month_start):
+                continue
+            partial = bool((start and start > month_start) or (end and end < month_end))
+            covering.append((shard, partial))
+        return covering
+
+    def top_k(self, query: Any, k: int, time_window: dict[str, Any] | None = None) -> list[tuple[str, float]]:
+        np = _numpy()
+        hits: list[tuple[str, float]] = []
+        for shard, partial in self._covering(time_window):
+            mask = None
+            if partial:
+                ts = shard.vectors.ts
+                mask = np.fromiter((_in_window(value, time_window) for value in ts), dtype=bool, count=len(ts))
+            hits.extend(shard.top_k(query, k, mask))
+        hits.sort(key=lambda hit: -hit[1])
+        return hits[:k]
+
+    def flush(self) -> None:
+        for shard in self.shards.values():
+            shard.flush()
+
+    def rewrite(self) -> int:
+        return sum(shard.rewrite() for shard in self.shards.values())
+
+    def close(self) -> None:
+        for shard in self.shards.values():
+            shard.close()
+        self.shards = {}
+
+
+class IndexCipher(KeyringCipher):
+    """AES-GCM envelopes keyed from the storage keyring."""
+
+    def __init__(self, keyring: Any, purpose: str = "vector_index") -> None:
+        super().__init__(keyring, purpose)
+
+    def write(self, path: str, payload: bytes) -> None:
+        _atomic_write(path, json.dumps(self.seal(payload), sort_keys=True).encode("utf-8"))
+
+    def read(self, path: str) -> bytes | None:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as handle:
+            return self.unseal(json.load(handle))
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by ``(model_id, sha256(text))``.
+
+    Entries are held in memory in LRU order and appended to a JSON-lines file
+    on flush (each line sealed separately under a cipher). Evicting past
+    ``max_entries`` rewrites the file on the next flush; a torn last line is
+    skipped on load.
+    """
+
+    def __init__(self, path: str, max_entries: int, cipher: IndexCipher | None = None) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cipher = cipher
+        self._entries: collections.OrderedDict[str, bytes] = collections.OrderedDict()
+        self._pending: list[str] = []
+        self._compact = False
+        self._load()
+
+    @staticmethod
+    def key(model_id: str, text: str) -> str:
+        return f"{model_id}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                    if self._cipher is not None:
+                        payload = self._cipher.unseal(record)
+                        if payload is None:
+                            continue
+                        record = json.loads(payload)
+                    self._entries[record["k"]] = base64.b64decode(record["v"])
+                    self._entries.move_to_end(record["k"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+        self._evict()
+
+    def get(self, key: str) -> bytes | None:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        if key not in self._entries:
+            self._pending.append(key)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._compact = True
+
+    def _line(self, key: str) -> str:
+        record = {"k": key, "v": base64.b64encode(self._entries[key]).decode("ascii")}
+        if self._cipher is not None:
+            record = self._cipher.seal(json.dumps(record).encode("utf-8"))
+        return json.dumps(record, sort_keys=True) + "\n"
+
+    def flush(self) -> None:
+        if self._compact:
+            _atomic_write(self.path, "".join(self._line(key) for key in self._entries).encode("utf-8"))
+        elif self._pending:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.writelines(self._line(key) for key in self._pending if key in self._entries)
+        self._pending = []
+        self._compact = False
+
+    def rewrite(self) -> int:
+        """Re-persist under the active key (key rotation)."""
+        self._compact = True
+        self.flush()
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _ts_key(ts: str | None) -> float:
+    if not ts:
+        return 0.0
+    if ts.endswith("Z"):
+        ts = ts[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(ts).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def _in_window(ts: str | None, time_window: dict[str, Any] | None) -> bool:
+    if not time_window:
+        return True
+    if not ts:
+        return False
+    start = time_window.get("start")
+    end = time_window.get("end")
+    if start and ts < start:
+        return False
+    if end and ts > end:
+        return False
+    return True
+
+
+class VectorRetrieval(PluginBase):
+    def __init__(self, plugin_id: str, context: PluginContext) -> None:
+        super().__init__(plugin_id, context)
+        cfg = context.config.get("retrieval", {}).get("vector", {})
+        self.enabled = bool(cfg.get("enabled", True))
+        self.embedder_mode = str(cfg.get("embedder", "auto"))
+        self.dim = int(cfg.get("dim", 256))
+        self.dtype = str(cfg.get("dtype", "float16"))
+        self.top_k = int(cfg.get("top_k", 20))
+        self.min_similarity = int(cfg.get("min_similarity_pct", 30)) / 100
+        self.lexical_weight = int(cfg.get("lexical_weight_pct", 50)) / 100
+        self.batch_size = int(cfg.get("batch_size", 64))
+        self.cache_max_entries = int(cfg.get("cache_max_entries", 20000))
+        ann_cfg = cfg.get("ann", {})
+        self.ann_enabled = bool(ann_cfg.get("enabled", True))
+        self.nlist = int(ann_cfg.get("nlist", 1024))
+        self.nprobe = int(ann_cfg.get("nprobe", 16))
+        self.ann_min_rows = int(ann_cfg.get("min_rows", 4096))
+        storage_cfg = context.config.get("storage", {})
+        self._root = os.path.join(storage_cfg.get("data_dir", "data"), "vector")
+        self._encrypt = bool(storage_cfg.get("encryption_required", False))
+        self._lock = threading.RLock()
+        self._embedder: Any = None
+        self._model_id = ""
+        self._dim = 0
+        self._index: ShardedIndex | None = None
+        self._cache: EmbeddingCache | None = None
+        self._rows_gauge = plugin_metrics(context).gauge(
+            "autocapture_vector_index_rows", help="Records in the vector retrieval index"
+        )
+
+    def capabilities(self) -> dict[str, Any]:
+        return {"retrieval.vector": self}
+
+    def _capability(self, name: str) -> Any:
+        try:
+            return self.context.get_capability(name)
+        except Exception:
+            return None
+
+    def _resolve(self) -> None:
+        """Pick ``embedder.text`` if it works, else the stand-in, and open the index and cache."""
+        if self._embedder is not None:
+            return
+        embedder: Any = None
+        model = self._capability("embedder.text") if self.embedder_mode == "auto" else None
+        if model is not None:
+            try:
+                probe = model.embed_batch([""])
+                embedder, model_id, dim = model, str(probe["model_id"]), int(probe["dim"])
+            except Exception as exc:
+                self.context.logger(f"embedder.text unavailable, using stand-in: {exc}")
+        if embedder is None:
+            embedder = HashingEmbedder(self.dim)
+            model_id, dim = embedder.model_id, self.dim
+        index_cipher = cache_cipher = None
+        if self._encrypt:
+            keyring = self._capability("storage.keyring")
+            if keyring is None:
+                raise RuntimeError("storage.encryption_required needs storage.keyring for the vector index")
+            index_cipher = IndexCipher(keyring)
+            cache_cipher = IndexCipher(keyring, "embedding_cache")
+        min_rows = self.ann_min_rows if self.ann_enabled else None
+        self._index = ShardedIndex(
+            self._root, dim, self.dtype, model_id, index_cipher, self.nlist, self.nprobe, min_rows
+        )
+        self._cache = EmbeddingCache(os.path.join(self._root, "embeddings.jsonl"), self.cache_max_entries, cache_cipher)
+        self._embedder, self._model_id, self._dim = embedder, model_id, dim
+        self._rows_gauge.set(len(self._index))
+
+    def embed_batch(self, texts: list[str]) -> Any:
+        """Embed ``texts`` as a ``len(texts) x dim`` float32 array.
+
+        Cached vectors are reused; the remaining distinct texts go to the
+        embedder in ``batch_size`` chunks and are appended to the cache file
+        before returning.
+        """
+        np = _numpy()
+        with self._lock:
+            self._resolve()
+            assert self._cache is not None
+            out = np.empty((len(texts), self._dim), dtype=np.float32)
+            missing: dict[str, list[int]] = {}
+            for row, text in enumerate(texts):
+                cached = self._cache.get(EmbeddingCache.key(self._model_id, text))
+                if cached is None:
+                    missing.setdefault(text, []).append(row)
+                else:
+                    out[row] = np.frombuffer(cached, dtype="<f4")
+            pending = list(missing)
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start : start + self.batch_size]
+                result = self._embedder.embed_batch(chunk)
+                matrix = np.frombuffer(result["vectors"], dtype="<f4").reshape(len(chunk), int(result["dim"]))
+                for text, vec in zip(chunk, matrix):
+                    out[missing[text]] = vec
+                    self._cache.put(EmbeddingCache.key(self._model_id, text), vec.tobytes())
+            if pending:
+                self._cache.flush()
+            return out
+
+    @property
+    def index(self) -> ShardedIndex:
+        with self._lock:
+            self._resolve()
+            assert self._index is not None
+            return self._index
+
+    def _add(self, items: list[tuple[str, str, str | None]]) -> None:
+        vectors = self.embed_batch([text for _record_id, text, _ts in items])
+        index = self.index
+        for (record_id, _text, ts_utc), vector in zip(items, vectors):
+            index.add(record_id, vector, ts_utc)
+        self._rows_gauge.set(len(index))
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._index is not None:
+                self._index.flush()
+
+    def index_record(self, record_id: str, record: dict[str, Any], flush: bool = True) -> bool:
+        """Embed one record's text (write-time path). Returns False when there is no text.
+
+        Writers indexing many records pass ``flush=False`` and call ``flush()`` once.
+        """
+        text = str(record.get("text", "") or "")
+        if not self.enabled or not text:
+            return False
+        with self._lock:
+            self._add([(record_id, text, record.get("ts_utc"))])
+            if flush:
+                self._index.flush()
+        return True
+
+    def index_pending(self, limit: int | None = None) -> int:
+        """Embed stored records that have text but no vector yet (run by the idle-drain scheduler)."""
+        if not self.enabled:
+            return 0
+        store = self._capability("storage.metadata")
+        if store is None:
+            return 0
+        items: list[tuple[str, str, str | None]] = []
+        with self._lock:
+            index = self.index
+            pending = (record_id for record_id in sorted(getattr(store, "keys", lambda: [])()) if record_id not in index)
+            for batch in chunks(pending, _PENDING_BATCH):
+                for record_id, record in get_many(store, batch, {}).items():
+                    text = str((record or {}).get("text", "") or "")
+                    if text:
+                        items.append((record_id, text, record.get("ts_utc")))
+                    if limit is not None and len(items) >= limit:
+                        break
+                if limit is not None and len(items) >= limit:
+                    break
+            if items:
+                self._add(items)
+                index.flush()
+        return len(items)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "model_id": self._model_id,
+                "rows": len(self._index) if self._index is not None else 0,
+                "cache": self._cache.stats() if self._cache is not None else {},
+            }
+
+    def search(self, query: str, time_window: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+        lexical_cap = self._capability("retrieval.strategy")
+        lexical = lexical_cap.search(query, time_window=time_window) if lexical_cap is not None else []
+        if not self.enabled or not query.strip():
+            return lexical
+        with self._lock:
+            index = self.index
+            query_vec = self.embed_batch([query])[0]
+            hits = index.top_k(query_vec, self.top_k, time_window)
+            ts_by_id = {record_id: index.ts_for(record_id) for record_id, _ in hits}
+
+        fused: dict[str, dict[str, Any]] = {}
+        for result in lexical:
+            fused[result["record_id"]] = {
+                "record_id": result["record_id"],
+                "ts_utc": result.get("ts_utc"),
+                "lexical_score": float(result.get("score", 0)),
+                "vector_score": 0.0,
+            }
+            if "text" in result:
+                fused[result["record_id"]]["text"] = result["text"]
+        for record_id, similarity in hits:
+            if similarity < self.min_similarity:
+                continue
+            entry = fused.setdefault(
+                record_id,
+                {"record_id": record_id, "ts_utc": ts_by_id[record_id], "lexical_score": 0.0, "vector_score": 0.0},
+            )
+            entry["vector_score"] = round(similarity, 6)
+        for entry in fused.values():
+            entry["score"] = round(
+                self.lexical_weight * entry["lexical_score"] + (1 - self.lexical_weight) * entry["vector_score"], 6
+            )
+        results = list(fused.values())
+        # Same stable ordering as the lexical strategy: score desc, timestamp desc, record_id asc
+        results.sort(key=lambda r: (-r["score"], -_ts_key(r.get("ts_utc")), r["record_id"]))
+        return results
+
+    def rotate(self, _new_key: bytes | None = None) -> int:
+        if not self._encrypt:
+            return 0
+        with self._lock:
+            count = self.index.rewrite()
+            assert self._cache is not None
+            self._cache.rewrite()
+            return count
+
+    def close(self) -> None:
+        with self._lock:
+            if self._index is not None:
+                self._index.close()
+            if self._cache is not None:
+                self._cache.flush()
+            self._embedder = self._index = self._cache = None
+
+
+def create_plugin(plugin_id: str, context: PluginContext) -> VectorRetrieval:
+    return VectorRetrieval(plugin_id, context)
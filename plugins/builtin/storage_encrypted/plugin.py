@@ -4,14 +4,27 @@ from __future__ import annotations
 
 import json
 import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any
 
 from autocapture_nx.kernel.crypto import EncryptedBlob, decrypt_bytes, derive_key, encrypt_bytes
 from autocapture_nx.kernel.keyring import KeyRing
+from autocapture_nx.kernel.metrics import Counter, plugin_metrics
+from autocapture_nx.kernel.storage_bulk import chunks
+from autocapture_nx.kernel.write_log import WriteLog
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 
 
+# get_many reads files on a small thread pool once a batch is this large.
+_PARALLEL_MIN = 16
+_MAX_READERS = 8
+# Records re-sealed per put_many during key rotation (bounds memory for media).
+_ROTATE_BATCH = 64
+_UNREADABLE = object()
+
+
 class DerivedKeyProvider:
     def __init__(self, keyring: KeyRing, purpose: str) -> None:
         self._keyring = keyring
@@ -42,40 +55,99 @@ class DerivedKeyProvider:
         return keys
 
 
-class EncryptedJSONStore:
-    def __init__(self, root_dir: str, key_provider: DerivedKeyProvider) -> None:
+class _EncryptedFileStore(ABC):
+    """One AES-GCM sealed file per record, shared by the JSON and blob stores.
+
+    Writes go to a temporary file that is moved into place with
+    ``os.replace``, so a reader never sees a torn record. ``put_many`` seals
+    every record with one derived key before replacing any of them: an
+    encoding or I/O failure leaves the store untouched.
+    """
+
+    def __init__(self, root_dir: str, key_provider: DerivedKeyProvider, bytes_written: Counter | None = None) -> None:
         self._root = root_dir
         self._key_provider = key_provider
+        self._bytes_written = bytes_written or Counter()
         os.makedirs(self._root, exist_ok=True)
 
+    @abstractmethod
+    def _encode(self, value: Any) -> bytes:
+        """Serialize one record value for sealing."""
+
+    @abstractmethod
+    def _decode(self, payload: bytes) -> Any:
+        """Inverse of ``_encode`` for an unsealed payload."""
+
+    def _written(self, record_ids: list[str]) -> None:
+        pass
+
     def _path(self, record_id: str) -> str:
         safe = record_id.replace("/", "_")
         return os.path.join(self._root, f"{safe}.json")
 
     def put(self, record_id: str, value: Any) -> None:
-        payload = json.dumps(value, sort_keys=True).encode("utf-8")
+        self.put_many({record_id: value})
+
+    def put_many(self, records: dict[str, Any]) -> None:
+        if not records:
+            return
         key_id, key = self._key_provider.active()
-        blob = encrypt_bytes(key, payload, key_id=key_id)
-        with open(self._path(record_id), "w", encoding="utf-8") as handle:
-            json.dump(blob.__dict__, handle, sort_keys=True)
+        staged: list[tuple[str, str]] = []
+        written = 0
+        try:
+            for record_id, value in records.items():
+                blob = encrypt_bytes(key, self._encode(value), key_id=key_id)
+                serialized = json.dumps(blob.__dict__, sort_keys=True)
+                path = self._path(record_id)
+                staged.append((f"{path}.tmp", path))
+                with open(f"{path}.tmp", "w", encoding="utf-8") as handle:
+                    handle.write(serialized)
+                written += len(serialized)
+        except BaseException:
+            for tmp, _final in staged:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            raise
+        for tmp, path in staged:
+            os.replace(tmp, path)
+        self._bytes_written.inc(written)
+        self._written(list(records))
 
     def get(self, record_id: str, default: Any = None) -> Any:
+        return self._read(record_id, default)
+
+    def _read(self, record_id: str, default: Any, keys: dict[str | None, list[bytes]] | None = None) -> Any:
         path = self._path(record_id)
         if not os.path.exists(path):
             return default
         with open(path, "r", encoding="utf-8") as handle:
             data = json.load(handle)
         blob = EncryptedBlob(**data)
-        payload = None
-        for key in self._key_provider.candidates(blob.key_id):
+        if keys is None:
+            candidates = self._key_provider.candidates(blob.key_id)
+        else:
+            # Derive each key id's candidates once per batch instead of once per record.
+            candidates = keys.get(blob.key_id)
+            if candidates is None:
+                candidates = keys[blob.key_id] = self._key_provider.candidates(blob.key_id)
+        for key in candidates:
             try:
                 payload = decrypt_bytes(key, blob)
-                break
             except Exception:
                 continue
-        if payload is None:
-            return default
-        return json.loads(payload.decode("utf-8"))
+            return self._decode(payload)
+        return default
+
+    def get_many(self, record_ids: list[str], default: Any = None) -> dict[str, Any]:
+        keys: dict[str | None, list[bytes]] = {}
+        ids = list(dict.fromkeys(record_ids))
+        if len(ids) < _PARALLEL_MIN:
+            return {record_id: self._read(record_id, default, keys) for record_id in ids}
+        with ThreadPoolExecutor(max_workers=_MAX_READERS) as pool:
+            values = list(pool.map(lambda record_id: self._read(record_id, default, keys), ids))
+        return dict(zip(ids, values))
 
     def keys(self) -> list[str]:
         ids = []
@@ -86,61 +158,44 @@ class EncryptedJSONStore:
         return ids
 
     def rotate(self, _new_key: bytes | None = None) -> int:
+        """Re-seal every readable record under the active key, a batch at a time."""
         count = 0
-        for record_id in self.keys():
-            value = self.get(record_id)
-            self.put(record_id, value)
-            count += 1
+        for batch in chunks(self.keys(), _ROTATE_BATCH):
+            values = self.get_many(batch, _UNREADABLE)
+            records = {record_id: value for record_id, value in values.items() if value is not _UNREADABLE}
+            self.put_many(records)
+            count += len(records)
         return count
 
 
-class EncryptedBlobStore:
-    def __init__(self, root_dir: str, key_provider: DerivedKeyProvider) -> None:
-        self._root = root_dir
-        self._key_provider = key_provider
-        os.makedirs(self._root, exist_ok=True)
+class EncryptedJSONStore(_EncryptedFileStore):
+    def __init__(self, root_dir: str, key_provider: DerivedKeyProvider, bytes_written: Counter | None = None) -> None:
+        super().__init__(root_dir, key_provider, bytes_written)
+        self._writes = WriteLog()
 
-    def _path(self, record_id: str) -> str:
-        safe = record_id.replace("/", "_")
-        return os.path.join(self._root, f"{safe}.json")
+    def _encode(self, value: Any) -> bytes:
+        return json.dumps(value, sort_keys=True).encode("utf-8")
 
-    def put(self, record_id: str, data: bytes) -> None:
-        key_id, key = self._key_provider.active()
-        blob = encrypt_bytes(key, data, key_id=key_id)
-        with open(self._path(record_id), "w", encoding="utf-8") as handle:
-            json.dump(blob.__dict__, handle, sort_keys=True)
+    def _decode(self, payload: bytes) -> Any:
+        return json.loads(payload.decode("utf-8"))
 
-    def get(self, record_id: str, default: bytes | None = None) -> bytes | None:
-        path = self._path(record_id)
-        if not os.path.exists(path):
-            return default
-        with open(path, "r", encoding="utf-8") as handle:
-            data = json.load(handle)
-        blob = EncryptedBlob(**data)
-        for key in self._key_provider.candidates(blob.key_id):
-            try:
-                return decrypt_bytes(key, blob)
-            except Exception:
-                continue
-        return default
+    def _written(self, record_ids: list[str]) -> None:
+        for record_id in record_ids:
+            self._writes.bump(record_id)
 
-    def keys(self) -> list[str]:
-        ids = []
-        for filename in os.listdir(self._root):
-            if not filename.endswith(".json"):
-                continue
-            ids.append(filename[:-5])
-        return ids
+    def version(self) -> int:
+        return self._writes.version
 
-    def rotate(self, _new_key: bytes | None = None) -> int:
-        count = 0
-        for record_id in self.keys():
-            value = self.get(record_id)
-            if value is None:
-                continue
-            self.put(record_id, value)
-            count += 1
-        return count
+    def changes_since(self, version: int) -> list[str] | None:
+        return self._writes.changes_since(version)
+
+
+class EncryptedBlobStore(_EncryptedFileStore):
+    def _encode(self, value: bytes) -> bytes:
+        return value
+
+    def _decode(self, payload: bytes) -> bytes:
+        return payload
 
 
 class EntityMapStore:
@@ -207,8 +262,12 @@ class EncryptedStoragePlugin(PluginBase):
         media_provider = DerivedKeyProvider(keyring, "media")
         entity_provider = DerivedKeyProvider(keyring, "entity_tokens")
         data_dir = storage_cfg.get("data_dir", "data")
-        self._metadata = EncryptedJSONStore(os.path.join(data_dir, "metadata"), meta_provider)
-        self._media = EncryptedBlobStore(os.path.join(data_dir, "media"), media_provider)
+        self._metadata = EncryptedJSONStore(
+            os.path.join(data_dir, "metadata"), meta_provider, bytes_written_counter(context, "metadata")
+        )
+        self._media = EncryptedBlobStore(
+            os.path.join(data_dir, "media"), media_provider, bytes_written_counter(context, "media")
+        )
         persist = storage_cfg.get("entity_map", {}).get("persist", True)
         self._entity_map = EntityMapStore(os.path.join(data_dir, "entity_map"), entity_provider, persist)
 
@@ -221,5 +280,13 @@ class EncryptedStoragePlugin(PluginBase):
         }
 
 
+def bytes_written_counter(context: PluginContext, store: str) -> Counter:
+    return plugin_metrics(context).counter(
+        "autocapture_storage_bytes_written_total",
+        {"store": store},
+        help="Bytes written to disk per store",
+    )
+
+
 def create_plugin(plugin_id: str, context: PluginContext) -> EncryptedStoragePlugin:
     return EncryptedStoragePlugin(plugin_id, context)
@@ -6,25 +6,42 @@ import json
 import os
 from typing import Any
 
+from autocapture_nx.kernel.write_log import WriteLog
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 
 
 class InMemoryStore:
     def __init__(self) -> None:
         self._data: dict[str, Any] = {}
+        self._writes = WriteLog()
 
     def put(self, key: str, value: Any) -> None:
         self._data[key] = value
+        self._writes.bump(key)
+
+    def put_many(self, records: dict[str, Any]) -> None:
+        self._data.update(records)
+        for key in records:
+            self._writes.bump(key)
 
     def get(self, key: str, default: Any = None) -> Any:
         return self._data.get(key, default)
 
+    def get_many(self, keys: list[str], default: Any = None) -> dict[str, Any]:
+        return {key: self._data.get(key, default) for key in keys}
+
     def all(self) -> dict[str, Any]:
         return dict(self._data)
 
     def keys(self) -> list[str]:
         return list(self._data.keys())
 
+    def version(self) -> int:
+        return self._writes.version
+
+    def changes_since(self, version: int) -> list[str] | None:
+        return self._writes.changes_since(version)
+
 
 class EntityMapStore:
     def __init__(self, persist: bool, data_dir: str) -> None:
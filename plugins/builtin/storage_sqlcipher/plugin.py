@@ -7,14 +7,18 @@ import sqlite3
 from typing import Any
 
 from autocapture_nx.kernel.keyring import KeyRing
+from autocapture_nx.kernel.metrics import Counter
+from autocapture_nx.kernel.write_log import WriteLog
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
-from plugins.builtin.storage_encrypted.plugin import DerivedKeyProvider, EncryptedBlobStore
+from plugins.builtin.storage_encrypted.plugin import DerivedKeyProvider, EncryptedBlobStore, bytes_written_counter
 
 
 class SQLCipherStore:
-    def __init__(self, db_path: str, key: bytes) -> None:
+    def __init__(self, db_path: str, key: bytes, bytes_written: Counter | None = None) -> None:
         self._db_path = db_path
         self._key = key
+        self._bytes_written = bytes_written or Counter()
+        self._writes = WriteLog()
         os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
         self._conn = None
 
@@ -51,6 +55,26 @@ class SQLCipherStore:
             (record_id, payload),
         )
         self._conn.commit()
+        self._bytes_written.inc(len(payload))
+        self._writes.bump(record_id)
+
+    def put_many(self, records: dict[str, Any]) -> None:
+        """Write all ``records`` in one transaction (rolled back on failure)."""
+        import json
+
+        if not records:
+            return
+        self._ensure()
+        rows = [(record_id, json.dumps(value, sort_keys=True)) for record_id, value in records.items()]
+        try:
+            self._conn.executemany("INSERT OR REPLACE INTO metadata (id, payload) VALUES (?, ?)", rows)
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+        self._bytes_written.inc(sum(len(payload) for _id, payload in rows))
+        for record_id, _payload in rows:
+            self._writes.bump(record_id)
 
     def get(self, record_id: str, default: Any = None) -> Any:
         import json
@@ -62,11 +86,33 @@ class SQLCipherStore:
             return default
         return json.loads(row[0])
 
+    def get_many(self, record_ids: list[str], default: Any = None) -> dict[str, Any]:
+        import json
+
+        self._ensure()
+        ids = list(dict.fromkeys(record_ids))
+        found: dict[str, Any] = {}
+        # Stay well under SQLite's bound-parameter limit.
+        for start in range(0, len(ids), 500):
+            batch = ids[start : start + 500]
+            cur = self._conn.execute(
+                f"SELECT id, payload FROM metadata WHERE id IN ({', '.join('?' for _ in batch)})",
+                batch,
+            )
+            found.update((row[0], json.loads(row[1])) for row in cur.fetchall())
+        return {record_id: found.get(record_id, default) for record_id in ids}
+
     def keys(self) -> list[str]:
         self._ensure()
         cur = self._conn.execute("SELECT id FROM metadata")
         return [row[0] for row in cur.fetchall()]
 
+    def version(self) -> int:
+        return self._writes.version
+
+    def changes_since(self, version: int) -> list[str] | None:
+        return self._writes.changes_since(version)
+
     def entity_put(self, token: str, value: str, kind: str) -> None:
         self._ensure()
         self._conn.execute(
@@ -123,8 +169,12 @@ class SQLCipherStoragePlugin(PluginBase):
         media_provider = DerivedKeyProvider(keyring, "media")
         data_dir = storage_cfg.get("data_dir", "data")
         _meta_id, meta_key = meta_provider.active()
-        self._metadata = SQLCipherStore(os.path.join(data_dir, "metadata", "metadata.db"), meta_key)
-        self._media = EncryptedBlobStore(os.path.join(data_dir, "media"), media_provider)
+        self._metadata = SQLCipherStore(
+            os.path.join(data_dir, "metadata", "metadata.db"), meta_key, bytes_written_counter(context, "metadata")
+        )
+        self._media = EncryptedBlobStore(
+            os.path.join(data_dir, "media"), media_provider, bytes_written_counter(context, "media")
+        )
         self._entity_map = EntityMapAdapter(self._metadata)
         self._keyring = keyring
         self._meta_provider = meta_provider
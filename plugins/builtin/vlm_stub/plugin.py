@@ -2,55 +2,151 @@
 
 from __future__ import annotations
 
+import gc
 import os
+from io import BytesIO
 from typing import Any
 
+from autocapture_nx.kernel.model_manager import BatchQueue, ModelManager
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 
+MODEL_ID = "local_vision2seq"
+BACKENDS = ("transformers", "stand_in")
 
-class VLMStub(PluginBase):
-    def __init__(self, plugin_id: str, context: PluginContext) -> None:
-        super().__init__(plugin_id, context)
-        self._model = None
-
-    def capabilities(self) -> dict[str, Any]:
-        return {"vision.extractor": self}
 
-    def _load(self):
-        if self._model is not None:
-            return self._model
+class _Vision2Seq:
+    def __init__(self, model_path: str) -> None:
         try:
-            from transformers import AutoProcessor, AutoModelForVision2Seq
+            from transformers import AutoModelForVision2Seq, AutoProcessor
         except Exception as exc:
             raise RuntimeError(f"Missing VLM dependency: {exc}")
-        model_path = os.path.join("D:\\autocapture", "models", "vlm")
         if not os.path.isdir(model_path):
             raise RuntimeError(f"Missing VLM model files at {model_path}")
         try:
-            processor = AutoProcessor.from_pretrained(model_path)
-            model = AutoModelForVision2Seq.from_pretrained(model_path)
+            self.processor = AutoProcessor.from_pretrained(model_path)
+            self.model = AutoModelForVision2Seq.from_pretrained(model_path)
         except Exception as exc:
             raise RuntimeError(f"Failed to load VLM model at {model_path}: {exc}")
-        self._model = (processor, model)
-        return self._model
+
+    def generate(self, images: list[Any], max_new_tokens: int) -> list[str]:
+        import torch
+
+        inputs = self.processor(images=[image.convert("RGB") for image in images], return_tensors="pt")
+        with torch.no_grad():
+            output = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+        return self.processor.batch_decode(output, skip_special_tokens=True)
+
+    def unload(self) -> None:
+        self.model = None
+        self.processor = None
+        gc.collect()
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+
+class _StandIn:
+    """CPU stand-in for tests: "describes" an image by its PNG ``ocr_text`` chunk."""
+
+    def generate(self, images: list[Any], max_new_tokens: int) -> list[str]:
+        texts = []
+        for image in images:
+            words = str(image.info.get("ocr_text", "")).split()[:max_new_tokens]
+            texts.append(" ".join(words) if words else f"screen {image.width}x{image.height}")
+        return texts
+
+    def unload(self) -> None:
+        pass
+
+
+class VLMStub(PluginBase):
+    """``vision.extractor`` with batched generation and a managed model.
+
+    ``extract`` and ``extract_batch`` requests share a queue, so concurrent
+    callers are coalesced into ``generate`` calls of up to
+    ``processing.vlm.batch_size`` images. The model is loaded on first use
+    and released on ``set_mode("ACTIVE_CAPTURE_ONLY")`` when
+    ``runtime.gpu.release_vram_on_active`` is set (see ``ModelManager``).
+    """
+
+    def __init__(self, plugin_id: str, context: PluginContext) -> None:
+        super().__init__(plugin_id, context)
+        cfg = context.config.get("processing", {}).get("vlm", {})
+        gpu = context.config.get("runtime", {}).get("gpu", {})
+        self.backend = str(cfg.get("backend", "transformers"))
+        self.max_new_tokens = int(cfg.get("max_new_tokens", 128))
+        self.manager = ModelManager(
+            self._load,
+            lambda model: model.unload(),
+            release_on_active=bool(gpu.get("release_vram_on_active", True)),
+            release_deadline_ms=int(gpu.get("release_vram_deadline_ms", 250)),
+        )
+        self._queue = BatchQueue(
+            self._generate,
+            max_batch=int(cfg.get("batch_size", 8)),
+            wait_ms=int(cfg.get("batch_wait_ms", 5)),
+            name=f"{plugin_id}.batch",
+        )
+
+    def capabilities(self) -> dict[str, Any]:
+        return {"vision.extractor": self}
+
+    def model_id(self) -> str:
+        return MODEL_ID if self.backend == "transformers" else f"{MODEL_ID}:{self.backend}"
+
+    def _load(self):
+        if self.backend == "stand_in":
+            return _StandIn()
+        if self.backend != "transformers":
+            raise RuntimeError(f"Unknown VLM backend: {self.backend}")
+        return _Vision2Seq(os.path.join("D:\\autocapture", "models", "vlm"))
+
+    def _generate(self, images: list[bytes]) -> list[dict[str, Any]]:
+        from PIL import Image
+
+        results: list[dict[str, Any] | None] = [None] * len(images)
+        decoded = []
+        for idx, image_bytes in enumerate(images):
+            try:
+                image = Image.open(BytesIO(image_bytes))
+                image.load()
+            except Exception as exc:
+                results[idx] = {"text": "", "layout": [], "error": f"Invalid VLM image bytes: {exc}"}
+                continue
+            decoded.append((idx, image))
+        if decoded:
+            with self.manager.use() as model:
+                texts = model.generate([image for _idx, image in decoded], self.max_new_tokens)
+            for (idx, _image), text in zip(decoded, texts):
+                results[idx] = {"text": text, "layout": []}
+        return results  # type: ignore[return-value]
+
+    def extract_batch(self, images: list[bytes]) -> dict[str, Any]:
+        """Describe ``images``; an undecodable image gets empty text and an ``error``."""
+        return {"model": self.model_id(), "results": self._queue.submit(list(images))}
 
     def extract(self, image_bytes: bytes) -> dict[str, Any]:
         if not image_bytes:
             raise RuntimeError("Missing VLM input bytes")
-        processor, model = self._load()
-        from io import BytesIO
-        from PIL import Image
-        import torch
+        result = self._queue.submit([image_bytes])[0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result
 
-        try:
-            image = Image.open(BytesIO(image_bytes)).convert("RGB")
-        except Exception as exc:
-            raise RuntimeError(f"Invalid VLM image bytes: {exc}")
-        inputs = processor(images=image, return_tensors="pt")
-        with torch.no_grad():
-            output = model.generate(**inputs, max_new_tokens=128)
-        text = processor.batch_decode(output, skip_special_tokens=True)[0]
-        return {"text": text, "layout": []}
+    def set_mode(self, mode: str) -> dict[str, Any]:
+        """Governor mode hook; releases the model (and its VRAM) on ``ACTIVE_CAPTURE_ONLY``."""
+        return self.manager.set_mode(mode)
+
+    def status(self) -> dict[str, Any]:
+        return {**self.manager.status(), "batches": self._queue.batches}
+
+    def close(self) -> None:
+        self._queue.close()
+        self.manager.release()
 
 
 def create_plugin(plugin_id: str, context: PluginContext) -> VLMStub:
@@ -8,9 +8,15 @@ import time
 from datetime import datetime, timezone
 from typing import Any
 
+from autocapture_nx.kernel.storage_bulk import put_many
 from autocapture_nx.plugin_system.api import PluginBase, PluginContext
 from autocapture_nx.windows.win_window import active_window
 
+# Window records are written in batches: every _FLUSH_RECORDS changes, or
+# _FLUSH_INTERVAL_S after the oldest unwritten one, and when the loop stops.
+_FLUSH_RECORDS = 32
+_FLUSH_INTERVAL_S = 1.0
+
 
 class WindowMetadataWindows(PluginBase):
     def __init__(self, plugin_id: str, context: PluginContext) -> None:
@@ -47,41 +53,48 @@ class WindowMetadataWindows(PluginBase):
         interval = 1.0 / max(sample_hz, 1)
         seq = 0
         last_hwnd = None
-        while not self._stop.is_set():
-            info = active_window()
-            if info and info.hwnd != last_hwnd:
-                ts = datetime.now(timezone.utc).isoformat()
-                payload = {
-                    "title": info.title,
-                    "process_path": info.process_path,
-                    "hwnd": info.hwnd,
-                    "rect": list(info.rect),
-                }
-                journal.append(
-                    {
-                        "schema_version": 1,
-                        "event_id": f"window_{seq}",
-                        "sequence": seq,
-                        "ts_utc": ts,
-                        "tzid": "UTC",
-                        "offset_minutes": 0,
-                        "event_type": "window.meta",
-                        "payload": payload,
+        pending: dict[str, dict[str, Any]] = {}
+        oldest = 0.0
+        try:
+            while not self._stop.is_set():
+                info = active_window()
+                if info and info.hwnd != last_hwnd:
+                    ts = datetime.now(timezone.utc).isoformat()
+                    payload = {
+                        "title": info.title,
+                        "process_path": info.process_path,
+                        "hwnd": info.hwnd,
+                        "rect": list(info.rect),
                     }
-                )
-                metadata_store.put(
-                    f"window_{seq}",
-                    {
+                    journal.append(
+                        {
+                            "schema_version": 1,
+                            "event_id": f"window_{seq}",
+                            "sequence": seq,
+                            "ts_utc": ts,
+                            "tzid": "UTC",
+                            "offset_minutes": 0,
+                            "event_type": "window.meta",
+                            "payload": payload,
+                        }
+                    )
+                    if not pending:
+                        oldest = time.monotonic()
+                    pending[f"window_{seq}"] = {
                         "record_type": "window.meta",
                         "ts_utc": ts,
                         "text": f"{info.title} {info.process_path}".strip(),
                         "window": payload,
-                    },
-                )
-                seq += 1
-                last_hwnd = info.hwnd
-                self._last_info = payload
-            time.sleep(interval)
+                    }
+                    seq += 1
+                    last_hwnd = info.hwnd
+                    self._last_info = payload
+                if pending and (len(pending) >= _FLUSH_RECORDS or time.monotonic() - oldest >= _FLUSH_INTERVAL_S):
+                    put_many(metadata_store, pending)
+                    pending.clear()
+                time.sleep(interval)
+        finally:
+            put_many(metadata_store, pending)
 
 
 def create_plugin(plugin_id: str, context: PluginContext) -> WindowMetadataWindows:
@@ -0,0 +1,147 @@
+import hmac
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from autocapture_nx.kernel.config import ConfigPaths
+from autocapture_nx.kernel.errors import PluginError
+from autocapture_nx.kernel.loader import Kernel
+
+
+class BootSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        root = Path(self.tempdir.name)
+        self.paths = ConfigPaths(
+            default_path=Path("config") / "default.json",
+            user_path=root / "user.json",
+            schema_path=Path("contracts") / "config_schema.json",
+            backup_dir=root / "backup",
+            snapshot_path=root / "cache" / "boot_snapshot.json",
+        )
+        safe_tmp = self.tempdir.name.replace("\\", "/")
+        self.override = {
+            "storage": {
+                "data_dir": safe_tmp,
+                "crypto": {
+                    "keyring_path": f"{safe_tmp}/keyring.json",
+                    "root_key_path": f"{safe_tmp}/root.key",
+                },
+            }
+        }
+        self._write_user(self.override)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def _write_user(self, override):
+        with open(self.paths.user_path, "w", encoding="utf-8") as handle:
+            json.dump(override, handle)
+
+    def _boot(self):
+        kernel = Kernel(self.paths, safe_mode=False)
+        system = kernel.boot()
+        self.addCleanup(lambda: [getattr(p.instance, "close", lambda: None)() for p in system.plugins])
+        return kernel, system
+
+    def test_second_boot_is_warm_and_equivalent(self):
+        cold_kernel, cold_system = self._boot()
+        self.assertEqual(cold_kernel.boot_stats.mode, "cold")
+        warm_kernel, warm_system = self._boot()
+        self.assertEqual(warm_kernel.boot_stats.mode, "warm")
+        self.assertEqual(warm_kernel.boot_stats.cold_boot_ms, cold_kernel.boot_stats.boot_ms)
+        self.assertEqual(warm_system.config, cold_system.config)
+        self.assertEqual(
+            sorted(p.plugin_id for p in warm_system.plugins),
+            sorted(p.plugin_id for p in cold_system.plugins),
+        )
+        self.assertEqual(set(warm_system.capabilities.all()), set(cold_system.capabilities.all()))
+        check = [c for c in warm_kernel.doctor() if c.name == "boot_snapshot"][0]
+        self.assertIn("warm boot", check.detail)
+
+    def test_config_is_validated_once_cold_and_not_at_all_warm(self):
+        import autocapture_nx.kernel.loader as loader
+
+        with mock.patch.object(loader, "validate_config", wraps=loader.validate_config) as validate:
+            self._boot()
+            self.assertEqual(validate.call_count, 1)
+            validate.reset_mock()
+            kernel, _system = self._boot()
+            self.assertEqual(kernel.boot_stats.mode, "warm")
+            self.assertEqual(validate.call_count, 0)
+
+    def test_snapshot_key_never_creates_a_keyring(self):
+        kernel = Kernel(self.paths, safe_mode=False)
+        self.assertIsNone(kernel._snapshot_key(self.override))
+        self.assertFalse(Path(self.override["storage"]["crypto"]["keyring_path"]).exists())
+
+    def test_config_change_invalidates_snapshot(self):
+        self._boot()
+        override = dict(self.override, profile="changed_profile")
+        self._write_user(override)
+        kernel, system = self._boot()
+        self.assertEqual(kernel.boot_stats.mode, "cold")
+        self.assertEqual(system.config["profile"], "changed_profile")
+
+    def test_corrupt_snapshot_falls_back_to_cold(self):
+        self._boot()
+        with open(self.paths.snapshot_path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        data["body"]["config"]["profile"] = "tampered"
+        with open(self.paths.snapshot_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+        kernel, system = self._boot()
+        self.assertEqual(kernel.boot_stats.mode, "cold")
+        self.assertNotEqual(system.config["profile"], "tampered")
+
+    def test_snapshot_forged_without_the_keyring_is_rejected(self):
+        import hashlib
+
+        self._boot()
+        with open(self.paths.snapshot_path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        data["body"]["config"]["profile"] = "tampered"
+        body = json.dumps(data["body"], sort_keys=True, separators=(",", ":")).encode("utf-8")
+        data["mac"] = hmac.new(b"not the keyring key", body, hashlib.sha256).hexdigest()
+        with open(self.paths.snapshot_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+        kernel, system = self._boot()
+        self.assertEqual(kernel.boot_stats.mode, "cold")
+        self.assertNotEqual(system.config["profile"], "tampered")
+
+    def test_warm_boot_rechecks_plugin_artifact_hashes(self):
+        cold_kernel, _system = self._boot()
+        detail = [c for c in cold_kernel.doctor() if c.name == "boot_snapshot"][0].detail
+        self.assertNotIn("(cold", detail)
+        # Same mtime and size, different content: only a content hash notices.
+        with mock.patch("autocapture_nx.plugin_system.registry.sha256_directory", return_value="0" * 64):
+            with self.assertRaises(PluginError):
+                Kernel(self.paths, safe_mode=False).boot()
+
+    def test_shutdown_closes_plugins_and_plugin_hosts(self):
+        kernel, system = self._boot()
+        system.get("observability.logger").log("boot.done", {})
+        ocr = system.get("ocr.engine")
+        ocr.model_id()
+        proc = ocr.host._host._proc
+        kernel.shutdown()
+        kernel.shutdown()
+        self.assertIsNone(kernel.system)
+        # The host saw stdin close, closed its plugin and exited on its own rather than being terminated.
+        self.assertEqual(proc.returncode, 0)
+        log_path = Path(self.tempdir.name) / "logs" / "observability.log"
+        self.assertIn("boot.done", log_path.read_text(encoding="utf-8"))
+
+    def test_warm_boot_starts_subprocess_hosts_lazily(self):
+        self._boot()
+        _kernel, system = self._boot()
+        hosted = [p.instance for p in system.plugins if p.plugin_id == "builtin.ocr.stub"]
+        self.assertEqual(len(hosted), 1)
+        self.assertFalse(hosted[0].started)
+        self.assertIn("extract", hosted[0].method_map()["ocr.engine"])
+
+
+if __name__ == "__main__":
+    unittest.main()
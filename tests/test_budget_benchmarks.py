@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from autocapture_nx.kernel.loader import Kernel
+from tools.benchmarks import budget
+
+
+class BudgetSuiteTests(unittest.TestCase):
+    def test_percentiles_nearest_rank(self):
+        stats = budget.percentiles([float(v) for v in range(1, 101)])
+        self.assertEqual((stats["p50"], stats["p90"], stats["p99"]), (50.0, 90.0, 99.0))
+        self.assertEqual(budget.percentiles([7.0])["p99"], 7.0)
+        self.assertEqual(budget.percentiles([]), {"count": 0})
+
+    def test_budget_checks_flag_regressions(self):
+        performance = {"startup_ms": 500, "query_latency_ms": 2000, "ingestion_mb_s": 50}
+        results = {
+            "boot": {"warm_ms": {"p50": 120.0}},
+            "query": {"latency_ms": {"p90": 2500.0}},
+            "ingestion": {"mb_s": 80.0},
+        }
+        checks = {check["metric"]: check["ok"] for check in budget.check_budgets(results, performance)}
+        self.assertEqual(
+            checks,
+            {"boot.warm_ms.p50": True, "query.latency_ms.p90": False, "ingestion.mb_s": True},
+        )
+
+    def test_history_and_trend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "history.jsonl"
+            self.assertEqual(budget.load_history(path), [])
+            budget.append_history(path, {"results": {"ingestion": {"mb_s": 50.0}, "query": {"latency_ms": {"p90": 100.0}}}})
+            previous = budget.load_history(path)[-1]["results"]
+        trend = budget.compare({"ingestion": {"mb_s": 60.0}, "query": {"latency_ms": {"p90": 150.0}}}, previous)
+        self.assertEqual(trend["ingestion.mb_s"]["improvement_pct"], 20.0)
+        self.assertEqual(trend["query.latency_ms.p90"]["improvement_pct"], -50.0)
+        self.assertEqual(budget.compare({}, None), {})
+
+    def test_stage_benchmarks_run_against_real_plugins(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            system = Kernel(budget.bench_config_paths(Path(tmp)), safe_mode=False).boot()
+            try:
+                query = budget.bench_query(system, records=20, queries=3)
+                ingestion = budget.bench_ingestion(system, segments=2, segment_bytes=4096)
+                sanitizer = budget.bench_sanitizer(system, iterations=2)
+                ledger_lines = (Path(tmp) / "data" / "ledger.ndjson").read_text(encoding="utf-8").splitlines()
+            finally:
+                budget._close(system)
+        self.assertEqual(query["latency_ms"]["count"], 3)
+        self.assertEqual(query["query_cache_hits"], 0)
+        self.assertFalse(system.get("query.cache").enabled)
+        self.assertGreater(ingestion["mb_s"], 0)
+        self.assertEqual(len(ledger_lines), 2)
+        self.assertEqual(sanitizer["call_ms"]["count"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
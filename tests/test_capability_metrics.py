@@ -0,0 +1,63 @@
+import unittest
+
+from autocapture_nx.kernel.metrics import CapabilityMetrics, LatencyHistogram
+from autocapture_nx.plugin_system.registry import CapabilityProxy, CapabilityRegistry
+
+
+class _Store:
+    def __init__(self):
+        self.data = {"a": 1}
+
+    def get(self, key):
+        return self.data[key]
+
+
+class LatencyHistogramTests(unittest.TestCase):
+    def test_percentiles_within_bucket_error(self):
+        hist = LatencyHistogram()
+        for value in range(1, 10001):
+            hist.record(value)
+        snap = hist.snapshot()
+        self.assertEqual(snap["count"], 10000)
+        self.assertEqual((snap["min"], snap["max"]), (1, 10000))
+        self.assertLessEqual(abs(snap["p50"] - 5000) / 5000, 1 / 16)
+        self.assertLessEqual(abs(snap["p99"] - 9900) / 9900, 1 / 16)
+
+    def test_memory_is_fixed(self):
+        hist = LatencyHistogram()
+        buckets = len(hist.counts)
+        for value in (0, 7, 10**6, 10**12, 10**18):
+            hist.record(value)
+        self.assertEqual(len(hist.counts), buckets)
+        self.assertEqual(hist.percentile(100), 10**18)
+
+
+class CapabilityMetricsTests(unittest.TestCase):
+    def test_registry_records_calls_and_errors_per_method(self):
+        metrics = CapabilityMetrics()
+        registry = CapabilityRegistry(metrics)
+        registry.register("storage.metadata", _Store(), network_allowed=False)
+        store = registry.get("storage.metadata")
+        self.assertEqual(store.get("a"), 1)
+        with self.assertRaises(KeyError):
+            store.get("missing")
+        snap = metrics.snapshot()["calls"]["storage.metadata.get"]
+        self.assertEqual((snap["calls"], snap["errors"]), (2, 1))
+        self.assertEqual(snap["latency_us"]["count"], 2)
+        metrics.reset()
+        store.get("a")
+        self.assertEqual(metrics.snapshot()["calls"]["storage.metadata.get"]["calls"], 1)
+
+    def test_disabled_metrics_add_no_instrumentation(self):
+        registry = CapabilityRegistry(CapabilityMetrics(enabled=False))
+        store = _Store()
+        registry.register("storage.metadata", store, network_allowed=True)
+        registry.register("storage.guarded", _Store(), network_allowed=False)
+        self.assertIs(registry.get("storage.metadata"), store)
+        guarded = registry.get("storage.guarded")
+        self.assertIsInstance(guarded, CapabilityProxy)
+        self.assertIsNone(guarded._metrics)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from autocapture_nx.kernel import daemon
+from autocapture_nx.kernel.config import ConfigPaths
+from autocapture_nx.kernel.errors import DaemonError
+from autocapture_nx.kernel.loader import Kernel
+
+
+@unittest.skipIf(os.name == "nt", "AF_UNIX daemon test")
+class DaemonTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        root = Path(self.tempdir.name)
+        self.paths = ConfigPaths(
+            default_path=Path("config") / "default.json",
+            user_path=root / "user.json",
+            schema_path=Path("contracts") / "config_schema.json",
+            backup_dir=root / "backup",
+            snapshot_path=root / "cache" / "boot_snapshot.json",
+        )
+        safe_tmp = self.tempdir.name.replace("\\", "/")
+        override = {
+            "storage": {
+                "data_dir": safe_tmp,
+                "crypto": {
+                    "keyring_path": f"{safe_tmp}/keyring.json",
+                    "root_key_path": f"{safe_tmp}/root.key",
+                },
+            }
+        }
+        with open(self.paths.user_path, "w", encoding="utf-8") as handle:
+            json.dump(override, handle)
+        kernel = Kernel(self.paths, safe_mode=False)
+        system = kernel.boot()
+        self.server = daemon.DaemonServer(kernel)
+        self.server.start()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.addCleanup(lambda: [getattr(p.instance, "close", lambda: None)() for p in system.plugins])
+
+    def tearDown(self):
+        client = daemon.connect(self.paths, safe_mode=False)
+        if client is not None:
+            client.request("shutdown")
+        self.thread.join(timeout=5)
+        self.tempdir.cleanup()
+
+    def test_client_routes_commands_to_daemon(self):
+        client = daemon.connect(self.paths, safe_mode=False)
+        self.assertIsNotNone(client)
+        self.assertEqual(client.request("ping")["pid"], os.getpid())
+        checks = client.request("doctor")
+        self.assertTrue(any(check["name"] == "boot_snapshot" for check in checks))
+        result = client.request("query", text="what happened today")
+        self.assertIn("answer", result)
+        with self.assertRaises(DaemonError):
+            client.request("bogus")
+
+    def test_profile_runs_without_holding_the_system_lock(self):
+        client = daemon.connect(self.paths, safe_mode=False)
+        self.server.system.get("devtools.profiler").run_root = Path(self.tempdir.name) / "runs"
+        result: dict = {}
+        worker = threading.Thread(target=lambda: result.update(client.request("profile", seconds=1.0, interval_ms=5)))
+        worker.start()
+        # A query completes while the profile session is still sampling.
+        self.assertIn("answer", client.request("query", text="today"))
+        self.assertTrue(worker.is_alive())
+        worker.join(timeout=10)
+        self.assertTrue(Path(result["collapsed"]).exists())
+        with self.assertRaises(DaemonError):
+            client.request("profile", seconds=0)
+
+    def test_concurrent_clients_are_served(self):
+        script = (
+            "import json, sys\n"
+            "from pathlib import Path\n"
+            "from autocapture_nx.kernel import daemon\n"
+            "from autocapture_nx.kernel.config import ConfigPaths\n"
+            "paths = ConfigPaths(Path(sys.argv[1]), Path(sys.argv[2]), Path(sys.argv[3]), Path(sys.argv[4]))\n"
+            "client = daemon.connect(paths, safe_mode=False)\n"
+            "print(json.dumps(sorted(client.request('query', text='today'))))\n"
+        )
+        args = [
+            str(self.paths.default_path),
+            str(self.paths.user_path),
+            str(self.paths.schema_path),
+            str(self.paths.backup_dir),
+        ]
+        procs = [
+            subprocess.Popen([sys.executable, "-c", script, *args], stdout=subprocess.PIPE, text=True)
+            for _ in range(4)
+        ]
+        outputs = [proc.communicate(timeout=60)[0] for proc in procs]
+        self.assertEqual([proc.returncode for proc in procs], [0, 0, 0, 0])
+        self.assertTrue(all(out.strip() for out in outputs))
+
+    def test_bad_or_silent_clients_do_not_stop_or_stall_the_server(self):
+        from multiprocessing import AuthenticationError
+        from multiprocessing.connection import Client
+
+        silent = Client(self.server.address, family=self.server.family)
+        self.addCleanup(silent.close)
+        with self.assertRaises(AuthenticationError):
+            Client(self.server.address, family=self.server.family, authkey=b"wrong")
+        self.assertTrue(self.thread.is_alive())
+        client = daemon.connect(self.paths, safe_mode=False)
+        self.assertIsNotNone(client)
+        self.assertEqual(client.request("ping")["pid"], os.getpid())
+
+    def test_second_server_refuses_to_start(self):
+        self.assertEqual(self.server.state_path.stat().st_mode & 0o777, 0o600)
+        state = self.server.state_path.read_text(encoding="utf-8")
+        other = daemon.DaemonServer(self.server.kernel)
+        with self.assertRaises(DaemonError):
+            other.start()
+        self.assertEqual(self.server.state_path.read_text(encoding="utf-8"), state)
+        self.assertTrue(os.path.exists(self.server.address))
+        self.assertEqual(daemon.running_daemon(self.server.system.config, False), os.getpid())
+
+    def test_instance_lock_wins_even_when_the_probe_misses_the_daemon(self):
+        from unittest import mock
+
+        other = daemon.DaemonServer(self.server.kernel)
+        with mock.patch.object(daemon, "running_daemon", return_value=None):
+            with self.assertRaises(DaemonError):
+                other.start()
+        self.assertTrue(os.path.exists(self.server.address))
+        self.assertEqual(daemon.running_daemon(self.server.system.config, False), os.getpid())
+
+    def test_mismatched_authkey_falls_back_to_in_process(self):
+        original = self.server.state_path.read_text(encoding="utf-8")
+        state = dict(json.loads(original), authkey=os.urandom(32).hex())
+        self.server.state_path.write_text(json.dumps(state), encoding="utf-8")
+        try:
+            self.assertIsNone(daemon.connect(self.paths, safe_mode=False))
+        finally:
+            self.server.state_path.write_text(original, encoding="utf-8")
+
+    def test_stale_config_or_shutdown_disables_client(self):
+        self.assertIsNone(daemon.connect(self.paths, safe_mode=True))
+        client = daemon.connect(self.paths, safe_mode=False)
+        client.request("shutdown")
+        self.thread.join(timeout=5)
+        self.assertFalse(self.server.state_path.exists())
+        self.assertIsNone(daemon.connect(self.paths, safe_mode=False))
+
+
+class RunCommandTests(unittest.TestCase):
+    def test_run_leaves_a_serving_daemon_alone(self):
+        import argparse
+        import contextlib
+        from unittest import mock
+
+        from autocapture_nx import cli
+
+        class _Source:
+            def __init__(self):
+                self.calls = []
+
+            def start(self):
+                self.calls.append("start")
+
+            def stop(self):
+                self.calls.append("stop")
+
+        sources = {name: _Source() for name in ["capture.source", "capture.audio", "tracking.input", "window.metadata"]}
+        kernel = mock.Mock(safe_mode=False)
+        kernel.system.config = {}
+        kernel.system.get = sources.__getitem__
+
+        @contextlib.contextmanager
+        def _local_kernel(_args):
+            yield kernel
+
+        with mock.patch.object(cli, "_local_kernel", _local_kernel), \
+                mock.patch.object(daemon, "running_daemon", return_value=4242), \
+                mock.patch.object(daemon, "DaemonServer") as server_cls, \
+                mock.patch.object(cli.time, "sleep", side_effect=KeyboardInterrupt), \
+                contextlib.redirect_stdout(None):
+            self.assertEqual(cli.cmd_run(argparse.Namespace(safe_mode=False)), 0)
+        server_cls.assert_not_called()
+        self.assertTrue(all(source.calls == ["start", "stop"] for source in sources.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,12 @@
 import json
 import os
+import tempfile
 import unittest
 from pathlib import Path
 
 from autocapture_nx.kernel.loader import Kernel, default_config_paths
+from autocapture_nx.plugin_system.api import PluginContext
+from plugins.builtin.devtools_ast_ir.plugin import ASTIRTool
 
 
 class DevtoolsTests(unittest.TestCase):
@@ -25,5 +28,49 @@ class DevtoolsTests(unittest.TestCase):
         self.assertTrue(result["pinned_ok"])
 
 
+class ASTScanTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.root = Path(self.tempdir.name) / "pkg"
+        (self.root / "sub").mkdir(parents=True)
+        (self.root / "__init__.py").write_text("", encoding="utf-8")
+        (self.root / "sub" / "__init__.py").write_text("", encoding="utf-8")
+        (self.root / "core.py").write_text("import os\n\nclass A:\n    def f(self):\n        pass\n", encoding="utf-8")
+        (self.root / "sub" / "use.py").write_text(
+            "from .. import core\nfrom ..core import A\n\nasync def g():\n    pass\n", encoding="utf-8"
+        )
+
+    def _tool(self, max_workers: int = 1) -> ASTIRTool:
+        config = {"devtools": {"ast_ir": {"cache_path": str(Path(self.tempdir.name) / "cache.json"), "max_workers": max_workers}}}
+        return ASTIRTool("ast", PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None))
+
+    def test_summaries_and_import_graph(self):
+        summary = self._tool()._scan_python_ast(str(self.root))
+        self.assertEqual((summary.files, summary.functions, summary.classes), (4, 1, 1))
+        use = summary.per_file["pkg/sub/use.py"]
+        self.assertEqual((use["module"], use["async_functions"], use["imports"]), ("pkg.sub.use", 1, ["pkg", "pkg.core"]))
+        self.assertEqual(summary.import_graph["pkg.sub.use"], ["pkg", "pkg.core"])
+        self.assertEqual(summary.import_graph["pkg.core"], [])
+
+    def test_cache_reparses_only_changed_files(self):
+        tool = self._tool()
+        self.assertEqual(tool._scan_python_ast(str(self.root)).cache, {"hits": 0, "misses": 4})
+        self.assertEqual(tool._scan_python_ast(str(self.root)).cache, {"hits": 4, "misses": 0})
+        (self.root / "core.py").write_text("def h():\n    pass\n", encoding="utf-8")
+        summary = tool._scan_python_ast(str(self.root))
+        self.assertEqual(summary.cache, {"hits": 3, "misses": 1})
+        self.assertEqual((summary.functions, summary.classes), (1, 0))
+
+    def test_process_pool_matches_serial_scan(self):
+        for idx in range(20):
+            (self.root / f"m{idx}.py").write_text(f"from . import m{(idx + 1) % 20}\ndef f{idx}():\n    pass\n", encoding="utf-8")
+        parallel = self._tool(max_workers=2)._scan_python_ast(str(self.root))
+        os.remove(Path(self.tempdir.name) / "cache.json")
+        serial = self._tool(max_workers=1)._scan_python_ast(str(self.root))
+        self.assertEqual(parallel.per_file, serial.per_file)
+        self.assertEqual(parallel.import_graph["pkg.m3"], ["pkg", "pkg.m4"])
+
+
 if __name__ == "__main__":
     unittest.main()
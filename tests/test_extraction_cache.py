@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+import unittest
+
+from autocapture_nx.kernel.extraction_cache import ExtractionCache
+from autocapture_nx.kernel.keyring import KeyRing
+from autocapture_nx.kernel.metrics import MetricsRegistry
+from autocapture_nx.kernel.query import ocr_frames
+
+
+class _Engine:
+    def __init__(self, model="m1"):
+        self.model = model
+        self.calls = 0
+
+    def model_id(self):
+        return self.model
+
+    def extract(self, frame):
+        self.calls += 1
+        return {"text": f"text-{len(frame)}"}
+
+
+def _jpeg(shade: int, quality: int = 90) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (320, 200), (240, 240, 240))
+    ImageDraw.Draw(image).rectangle([20, 20, 160 + shade, 120], fill=(shade, 0, 0))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+class ExtractionCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def _cache(self, key="sha256", max_entries=100, encrypt=False, keyring=None, metrics=None):
+        config = {
+            "storage": {"data_dir": self.tempdir.name, "encryption_required": encrypt},
+            "processing": {"extraction_cache": {"enabled": True, "key": key, "max_entries": max_entries}},
+        }
+        return ExtractionCache(config, lambda: keyring, metrics)
+
+    def test_frames_are_extracted_once_across_records(self):
+        cache = self._cache()
+        engine = _Engine()
+        frames = [b"screen-a", b"screen-b", b"screen-a", b"screen-a"]
+        first = ocr_frames(engine, frames, cache)
+        self.assertEqual(engine.calls, 2)
+        self.assertEqual(ocr_frames(engine, frames, cache), first)
+        self.assertEqual(engine.calls, 2)
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (4, 4))
+
+    def test_entries_are_per_engine_version(self):
+        cache = self._cache()
+        cache.put("ocr", _Engine("m1"), b"frame", "old")
+        self.assertIsNone(cache.get("ocr", _Engine("m2"), b"frame"))
+        self.assertIsNone(cache.get("vlm", _Engine("m1"), b"frame"))
+        self.assertEqual(cache.get("ocr", _Engine("m1"), b"frame"), "old")
+
+    def test_engines_without_model_id_are_not_cached(self):
+        cache = self._cache()
+        engine = object()
+        cache.put("ocr", engine, b"frame", "text")
+        self.assertIsNone(cache.get("ocr", engine, b"frame"))
+        self.assertFalse(os.path.exists(cache.path))
+
+    def test_entries_persist_and_stay_bounded(self):
+        cache = self._cache(max_entries=3)
+        engine = _Engine()
+        for idx in range(10):
+            cache.put("ocr", engine, f"frame-{idx}".encode(), f"text-{idx}")
+        with open(cache.path, encoding="utf-8") as handle:
+            self.assertLessEqual(sum(1 for _ in handle), 6)
+        reopened = self._cache(max_entries=3)
+        self.assertEqual(reopened.stats()["entries"], 0)
+        self.assertEqual(reopened.get("ocr", engine, b"frame-9"), "text-9")
+        self.assertIsNone(reopened.get("ocr", engine, b"frame-0"))
+        self.assertEqual(reopened.stats()["entries"], 3)
+
+    def test_encrypted_entries_are_sealed(self):
+        keyring = KeyRing.load(os.path.join(self.tempdir.name, "keyring.json"))
+        cache = self._cache(encrypt=True, keyring=keyring)
+        engine = _Engine()
+        cache.put("ocr", engine, b"frame", "secret words")
+        with open(cache.path, encoding="utf-8") as handle:
+            self.assertNotIn("secret", handle.read())
+        keyring.rotate()
+        self.assertEqual(cache.rewrite(), 1)
+        reopened = self._cache(encrypt=True, keyring=keyring)
+        self.assertEqual(reopened.get("ocr", engine, b"frame"), "secret words")
+
+    def test_encryption_without_keyring_disables_cache(self):
+        cache = self._cache(encrypt=True)
+        cache.put("ocr", _Engine(), b"frame", "secret words")
+        self.assertFalse(os.path.exists(cache.path))
+        self.assertFalse(cache.stats()["enabled"])
+
+    def test_dhash_key_matches_reencoded_frames(self):
+        cache = self._cache(key="dhash")
+        engine = _Engine()
+        cache.put("vlm", engine, _jpeg(0, quality=90), "same screen")
+        self.assertEqual(cache.get("vlm", engine, _jpeg(0, quality=70)), "same screen")
+        self.assertIsNone(self._cache().get("vlm", engine, _jpeg(0, quality=70)))
+
+    def test_lookups_are_counted_in_metrics(self):
+        metrics = MetricsRegistry()
+        cache = self._cache(metrics=metrics)
+        engine = _Engine()
+        cache.get("ocr", engine, b"frame")
+        cache.put("ocr", engine, b"frame", "text")
+        cache.get("ocr", engine, b"frame")
+        self.assertEqual(metrics.counter("autocapture_extraction_cache_hits_total", {"kind": "ocr"}).value, 1)
+        self.assertEqual(metrics.counter("autocapture_extraction_cache_misses_total", {"kind": "ocr"}).value, 1)
+        self.assertEqual(metrics.gauge("autocapture_extraction_cache_entries").value, 1)
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
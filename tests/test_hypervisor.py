@@ -0,0 +1,85 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tools.hypervisor import hypervisor
+
+
+class _Gauge:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *_exc):
+        with self._lock:
+            self.current -= 1
+
+
+class ParallelScoringTests(unittest.TestCase):
+    def test_variants_scored_concurrently_with_exclusive_timing(self):
+        tests_gauge, timing_gauge = _Gauge(), _Gauge()
+        scratch_dirs = []
+        overlaps = []
+
+        def fake_run_cmd(cmd, cwd=None, env_overrides=None):
+            scratch_dirs.append(env_overrides["TMPDIR"])
+            with tests_gauge:
+                overlaps.append(timing_gauge.current)
+                time.sleep(0.1)
+            return 0, "ok"
+
+        def fake_doctor(_cwd, _env):
+            with tests_gauge:
+                overlaps.append(timing_gauge.current)
+                time.sleep(0.01)
+            return True
+
+        def timed(*_args, **_kwargs):
+            with timing_gauge:
+                overlaps.append(tests_gauge.current)
+                time.sleep(0.02)
+                overlaps.append(tests_gauge.current)
+            return 1.0
+
+        def fake_benchmarks(_cwd, _env):
+            timed()
+            return None
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.multiple(
+            hypervisor,
+            _create_variant=lambda variant_id, _axis, _dry: Path(tmp) / variant_id,
+            _run_cmd=fake_run_cmd,
+            _run_doctor=fake_doctor,
+            _measure_startup_ms=timed,
+            _run_benchmarks=fake_benchmarks,
+        ):
+            result = hypervisor.run_diffusion(axis="test", k_variants=4, dry_run=False, max_parallel=2)
+
+        self.assertEqual(result["variants"], ["v1", "v2", "v3", "v4"])
+        self.assertEqual([card["variant_id"] for card in result["scorecards"]], result["variants"])
+        self.assertEqual(tests_gauge.peak, 2)
+        self.assertEqual(timing_gauge.peak, 1)
+        # No correctness phase ever ran while a timing phase was measuring.
+        self.assertEqual(set(overlaps), {0})
+        self.assertEqual(len(set(scratch_dirs)), 4)
+        run_meta = json.loads((Path(result["run_dir"]) / "run.json").read_text(encoding="utf-8"))
+        self.assertEqual(run_meta["max_parallel"], 2)
+
+    def test_cpu_budget_defaults_to_half_the_cpus(self):
+        with mock.patch.object(hypervisor.os, "cpu_count", return_value=8):
+            self.assertEqual(hypervisor._cpu_budget(0), 4)
+        self.assertEqual(hypervisor._cpu_budget(3), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
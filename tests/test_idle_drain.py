@@ -0,0 +1,325 @@
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from pathlib import Path
+
+from autocapture_nx.kernel.idle_drain import ExtractionQueue, IdleDrainScheduler
+from autocapture_nx.plugin_system.api import PluginContext
+from plugins.builtin.runtime_governor.plugin import RuntimeGovernor
+
+IDLE = {"user_active": False, "idle_seconds": 600}
+ACTIVE = {"user_active": True, "idle_seconds": 0}
+
+
+def _segment(frame: bytes) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("frame_0000.png", frame)
+    return buf.getvalue()
+
+
+class _Store(dict):
+    def get(self, key, default=None):
+        return super().get(key, default)
+
+    def put(self, key, value):
+        self[key] = value
+
+
+class _Extractor:
+    def __init__(self, delay_s=0.0, fail=False):
+        self.delay_s = delay_s
+        self.fail = fail
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def extract(self, frame):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay_s)
+            if self.fail:
+                raise RuntimeError("Missing model: test")
+            return {"text": frame.decode("utf-8")}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class _System:
+    def __init__(self, data_dir, count, vlm=None, ocr=None, cpu=2, gpu=1, metadata=None, media=None):
+        self.config = {
+            "storage": {"data_dir": data_dir},
+            "runtime": {"idle_window_s": 45, "mode_enforcement": {"suspend_workers": True, "suspend_deadline_ms": 100}},
+            "processing": {
+                "idle": {
+                    "enabled": True,
+                    "max_concurrency_cpu": cpu,
+                    "max_concurrency_gpu": gpu,
+                    "poll_ms": 10,
+                    "checkpoint_every": 4,
+                    "max_attempts": 2,
+                    "refill_interval_s": 60,
+                }
+            },
+        }
+        self.metadata = metadata if metadata is not None else _Store()
+        self.media = media if media is not None else _Store()
+        for idx in range(count):
+            record_id = f"seg{idx:03d}"
+            self.metadata.put(record_id, {"ts_utc": f"2026-01-01T10:{idx % 60:02d}:00Z"})
+            self.media.put(record_id, _segment(f"text {idx}".encode("utf-8")))
+        governor = RuntimeGovernor("gov", PluginContext(config=self.config, get_capability=lambda _k: None, logger=lambda _m: None))
+        self.caps = {
+            "storage.metadata": self.metadata,
+            "storage.media": self.media,
+            "vision.extractor": vlm or _Extractor(),
+            "ocr.engine": ocr or _Extractor(),
+            "runtime.governor": governor,
+        }
+
+    def get(self, name):
+        return self.caps[name]
+
+    def has(self, name):
+        return name in self.caps
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class ExtractionQueueTests(unittest.TestCase):
+    def test_checkpoint_resumes_in_flight_claims(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            system = _System(tmp, 3)
+            queue = ExtractionQueue(Path(tmp) / "queue.json")
+            self.assertEqual(queue.refill(system.metadata), 3)
+            self.assertEqual(queue.refill(system.metadata), 0)
+            first = queue.claim()
+            self.assertEqual(first, "seg002")
+            second = queue.claim()
+            queue.complete(second)
+            queue.checkpoint()
+            reloaded = ExtractionQueue(Path(tmp) / "queue.json")
+            self.assertEqual(len(reloaded), 2)
+            self.assertEqual(reloaded.claim(), first)
+            self.assertEqual(reloaded.done, 1)
+
+    def test_refill_skips_extracted_and_non_segment_records(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            system = _System(tmp, 2)
+            system.metadata["seg000"]["text_source"] = "ocr"
+            system.metadata.put("win0", {"record_type": "window.meta", "ts_utc": "2026-01-01T10:00:00Z"})
+            queue = ExtractionQueue(Path(tmp) / "queue.json")
+            queue.refill(system.metadata)
+            self.assertEqual(queue.claim(), "seg001")
+            self.assertIsNone(queue.claim())
+
+    def test_concurrent_checkpoints_do_not_collide(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = ExtractionQueue(Path(tmp) / "queue.json")
+            queue.refill(_System(tmp, 5).metadata)
+            errors = []
+
+            def writer():
+                try:
+                    for _ in range(50):
+                        queue.checkpoint()
+                except Exception as exc:
+                    errors.append(exc)
+
+            threads = [threading.Thread(target=writer) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(len(ExtractionQueue(Path(tmp) / "queue.json")), 5)
+
+    def test_refill_reads_records_in_bulk(self):
+        class _BulkStore(_Store):
+            def get_many(self, keys, default=None):
+                batches.append(len(keys))
+                return {key: dict.get(self, key, default) for key in keys}
+
+            def get(self, key, default=None):
+                raise AssertionError("refill should not read records one at a time")
+
+        batches = []
+        with tempfile.TemporaryDirectory() as tmp:
+            system = _System(tmp, 3, metadata=_BulkStore())
+            queue = ExtractionQueue(Path(tmp) / "queue.json")
+            self.assertEqual(queue.refill(system.metadata), 3)
+            self.assertEqual(batches, [3])
+            self.assertEqual(queue.refill(system.metadata), 0)
+            self.assertEqual(batches, [3])
+
+
+class IdleDrainSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.signals = dict(ACTIVE)
+
+    def _scheduler(self, system):
+        scheduler = IdleDrainScheduler(system, signals=lambda: self.signals)
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def test_drains_only_while_idle_within_concurrency_limits(self):
+        vlm = _Extractor(delay_s=0.01)
+        system = _System(self.tempdir.name, 12, vlm=vlm, cpu=3, gpu=1)
+        scheduler = self._scheduler(system)
+        scheduler.start()
+        time.sleep(0.1)
+        self.assertEqual(vlm.calls, 0)
+        self.signals = dict(IDLE)
+        self.assertTrue(_wait_for(lambda: scheduler.stats["extracted"] == 12))
+        self.assertEqual(vlm.peak, 1)
+        self.assertTrue(all(record["text_source"] == "vlm" for record in system.metadata.values()))
+        self.assertEqual(system.metadata["seg005"]["text"], "text 5")
+
+    def test_user_activity_suspends_within_deadline(self):
+        ocr = _Extractor(delay_s=0.03)
+        system = _System(self.tempdir.name, 200, ocr=ocr, cpu=2, gpu=0)
+        scheduler = self._scheduler(system)
+        self.signals = dict(IDLE)
+        scheduler.start()
+        self.assertTrue(_wait_for(lambda: scheduler.stats["extracted"] >= 4))
+        self.signals = dict(ACTIVE)
+        self.assertTrue(_wait_for(lambda: scheduler.mode == "ACTIVE_CAPTURE_ONLY"))
+        self.assertTrue(_wait_for(lambda: scheduler.stats["suspends"] >= 1))
+        self.assertLessEqual(scheduler.stats["last_suspend_ms"], 100)
+        self.assertEqual(scheduler.stats["suspend_overruns"], 0)
+        calls = ocr.calls
+        time.sleep(0.1)
+        self.assertEqual(ocr.calls, calls)
+        self.assertLess(calls, 200)
+
+    def test_hold_forces_user_query(self):
+        system = _System(self.tempdir.name, 1)
+        scheduler = IdleDrainScheduler(system, signals=lambda: dict(IDLE))
+        self.assertEqual(scheduler.step(), "IDLE_DRAIN")
+        with scheduler.hold():
+            self.assertEqual(scheduler.step(), "USER_QUERY")
+        self.assertEqual(scheduler.step(), "IDLE_DRAIN")
+
+    def test_mode_transitions_are_forwarded_to_the_vlm(self):
+        class _ManagedVLM(_Extractor):
+            def set_mode(self, mode):
+                self.modes.append(mode)
+                return {"mode": mode, "loaded": mode != "ACTIVE_CAPTURE_ONLY"}
+
+        vlm = _ManagedVLM()
+        vlm.modes = []
+        system = _System(self.tempdir.name, 1, vlm=vlm)
+        signals = dict(IDLE)
+        scheduler = IdleDrainScheduler(system, signals=lambda: signals)
+        scheduler.step()
+        scheduler.step()
+        signals.update(ACTIVE)
+        scheduler.step()
+        self.assertEqual(vlm.modes, ["IDLE_DRAIN", "ACTIVE_CAPTURE_ONLY"])
+        self.assertEqual(scheduler.stats["vlm"], {"mode": "ACTIVE_CAPTURE_ONLY", "loaded": False})
+
+    def test_restart_resumes_from_checkpoint(self):
+        ocr = _Extractor(delay_s=0.01)
+        system = _System(self.tempdir.name, 40, ocr=ocr, cpu=1, gpu=0)
+        scheduler = IdleDrainScheduler(system, signals=lambda: self.signals)
+        self.signals = dict(IDLE)
+        scheduler.start()
+        self.assertTrue(_wait_for(lambda: scheduler.stats["extracted"] >= 8))
+        scheduler.stop()
+        state = json.loads((Path(self.tempdir.name) / "run" / "extract_queue.json").read_text())
+        done = sum(1 for record in system.metadata.values() if "text_source" in record)
+        self.assertEqual(len(state["pending"]), 40 - done)
+
+        restarted_ocr = _Extractor()
+        restarted = _System(self.tempdir.name, 0, ocr=restarted_ocr, cpu=1, gpu=0, metadata=system.metadata, media=system.media)
+        second = self._scheduler(restarted)
+        self.assertEqual(len(second.queue), 40 - done)
+        second.start()
+        self.assertTrue(_wait_for(lambda: all("text_source" in r for r in system.metadata.values())))
+        self.assertEqual(restarted_ocr.calls, 40 - done)
+
+    def test_failing_segments_are_dropped_after_max_attempts(self):
+        system = _System(self.tempdir.name, 2, vlm=_Extractor(fail=True), ocr=_Extractor(fail=True))
+        scheduler = self._scheduler(system)
+        self.signals = dict(IDLE)
+        scheduler.start()
+        self.assertTrue(_wait_for(lambda: scheduler.stats["dropped"] == 2))
+        self.assertEqual(scheduler.stats["failed"], 4)
+        self.assertEqual(len(scheduler.queue), 0)
+        self.assertTrue(all("text_source" not in record for record in system.metadata.values()))
+        self.assertEqual(scheduler.queue.refill(system.metadata), 0)
+
+    def test_checkpoint_failure_does_not_stop_workers(self):
+        system = _System(self.tempdir.name, 12, cpu=1, gpu=0)
+        scheduler = self._scheduler(system)
+        real_checkpoint = scheduler.queue.checkpoint
+        calls = []
+
+        def flaky_checkpoint():
+            calls.append(1)
+            if len(calls) == 1:
+                raise FileNotFoundError("extract_queue.tmp")
+            real_checkpoint()
+
+        scheduler.queue.checkpoint = flaky_checkpoint
+        self.signals = dict(IDLE)
+        scheduler.start()
+        self.assertTrue(_wait_for(lambda: scheduler.stats["extracted"] == 12))
+        self.assertEqual(scheduler.stats["checkpoint_errors"], 1)
+        self.assertTrue(all(thread.is_alive() for thread in scheduler._threads))
+
+    def test_records_with_text_are_embedded_while_idle(self):
+        class _Vector:
+            def __init__(self, metadata):
+                self.metadata = metadata
+                self.indexed = set()
+                self.limits = []
+
+            def index_pending(self, limit=None):
+                self.limits.append(limit)
+                pending = sorted(rid for rid, rec in self.metadata.items() if rec.get("text") and rid not in self.indexed)
+                batch = pending[:limit]
+                self.indexed.update(batch)
+                return len(batch)
+
+            def index_record(self, record_id, record, flush=True):
+                self.indexed.add(record_id)
+
+            def flush(self):
+                pass
+
+        system = _System(self.tempdir.name, 0)
+        for idx in range(70):
+            system.metadata.put(f"win{idx:03d}", {"record_type": "window.meta", "text": f"Title {idx}"})
+        vector = system.caps["retrieval.vector"] = _Vector(system.metadata)
+        scheduler = self._scheduler(system)
+        self.signals = dict(ACTIVE)
+        scheduler.step()
+        self.assertEqual(vector.indexed, set())
+        self.signals = dict(IDLE)
+        scheduler.start()
+        self.assertTrue(_wait_for(lambda: len(vector.indexed) == 70))
+        self.assertTrue(_wait_for(lambda: scheduler.stats["indexed"] == 70))
+        self.assertEqual(set(vector.limits), {32})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import io
+import unittest
+import zipfile
+
+from autocapture_nx.kernel.keyframes import KeyframeConfig, frame_order, segment_keyframes, select_keyframes
+
+
+def _jpeg(shade: int, bar: int = 0) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (320, 200), (shade, shade, shade))
+    if bar:
+        ImageDraw.Draw(image).rectangle([0, 0, bar, 199], fill=(255 - shade, 0, 0))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _segment(frames: list[bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for idx, frame in enumerate(frames):
+            zf.writestr(f"frame_{idx}.jpg", frame)
+    return buf.getvalue()
+
+
+class KeyframeTests(unittest.TestCase):
+    def test_frame_order_is_natural(self):
+        names = [f"frame_{idx}.jpg" for idx in (10, 2, 0, 1, 11)]
+        self.assertEqual(frame_order(names), ["frame_0.jpg", "frame_1.jpg", "frame_2.jpg", "frame_10.jpg", "frame_11.jpg"])
+
+    def test_selects_first_frame_and_scene_changes(self):
+        # Three screens, each held for several near-identical frames.
+        frames = [_jpeg(20)] * 4 + [_jpeg(20, bar=4)] + [_jpeg(200)] * 4 + [_jpeg(90, bar=160)] * 4
+        config = KeyframeConfig(max_per_segment=4, min_change_pct=8)
+        names = [name for name, _ in segment_keyframes(_segment(frames), config)]
+        self.assertEqual(names, ["frame_0.jpg", "frame_5.jpg", "frame_9.jpg"])
+
+    def test_budget_keeps_largest_changes_in_capture_order(self):
+        frames = [_jpeg(0), _jpeg(40), _jpeg(250), _jpeg(240)]
+        config = KeyframeConfig(max_per_segment=2, min_change_pct=8)
+        with zipfile.ZipFile(io.BytesIO(_segment(frames))) as zf:
+            self.assertEqual(select_keyframes(zf, config), ["frame_0.jpg", "frame_2.jpg"])
+        with zipfile.ZipFile(io.BytesIO(_segment(frames))) as zf:
+            self.assertEqual(select_keyframes(zf, KeyframeConfig(max_per_segment=1)), ["frame_0.jpg"])
+
+    def test_scan_is_bounded(self):
+        frames = [_jpeg(0)] * 5 + [_jpeg(255)] * 5
+        config = KeyframeConfig(max_per_segment=4, min_change_pct=8, max_scan_frames=5)
+        with zipfile.ZipFile(io.BytesIO(_segment(frames))) as zf:
+            self.assertEqual(select_keyframes(zf, config), ["frame_0.jpg", "frame_6.jpg"])
+
+    def test_undecodable_frames_fall_back_to_first(self):
+        blob = _segment([b"not an image", b"still not"])
+        self.assertEqual(segment_keyframes(blob, KeyframeConfig()), [("frame_0.jpg", b"not an image")])
+
+    def test_config_from_processing_section(self):
+        config = KeyframeConfig.from_config({"processing": {"keyframes": {"max_per_segment": 0, "min_change_pct": 12}}})
+        self.assertEqual(config.max_per_segment, 1)
+        self.assertEqual(config.min_change_pct, 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from autocapture_nx.kernel.metrics import MetricsExporter, MetricsRegistry, plugin_metrics
+from autocapture_nx.plugin_system.api import PluginContext
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def test_counters_gauges_histograms_by_labels(self):
+        registry = MetricsRegistry(enabled=False)
+        registry.counter("bytes_total", {"store": "media"}).inc(10)
+        registry.counter("bytes_total", {"store": "media"}).inc(5)
+        registry.counter("bytes_total", {"store": "metadata"}).inc(1)
+        registry.gauge("queue_depth").set(7)
+        for value in (100, 200, 300):
+            registry.histogram("flush_us").observe(value)
+        snap = registry.snapshot()
+        self.assertEqual(snap["counters"], {'bytes_total{store="media"}': 15, 'bytes_total{store="metadata"}': 1})
+        self.assertEqual(snap["gauges"], {"queue_depth": 7})
+        self.assertEqual(snap["histograms"]["flush_us"]["count"], 3)
+        self.assertEqual(snap["histograms"]["flush_us"]["sum"], 600)
+        with self.assertRaises(ValueError):
+            registry.gauge("bytes_total")
+
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        registry.counter("frames_total", help="Frames captured").inc(3)
+        registry.histogram("flush_us", {"store": 'a"b'}).observe(42)
+        registry.timed("storage.metadata.get", lambda: None)()
+        text = registry.prometheus_text()
+        self.assertIn("# HELP frames_total Frames captured\n# TYPE frames_total counter\nframes_total 3\n", text)
+        self.assertIn('flush_us{store="a\\"b",quantile="0.5"} 42', text)
+        self.assertIn('flush_us_count{store="a\\"b"} 1', text)
+        self.assertIn('autocapture_capability_calls_total{method="storage.metadata.get"} 1', text)
+
+    def test_plugin_metrics_falls_back_to_detached_registry(self):
+        shared = MetricsRegistry()
+        ctx = PluginContext(config={}, get_capability=lambda _k: shared, logger=lambda _m: None)
+        self.assertIs(plugin_metrics(ctx), shared)
+        hosted = PluginContext(config={}, get_capability=lambda _k: None, logger=lambda _m: None)
+        plugin_metrics(hosted).counter("x").inc()
+
+
+class MetricsExporterTests(unittest.TestCase):
+    def test_export_writes_rolling_history_and_prometheus_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = MetricsRegistry()
+            registry.counter("frames_total").inc()
+            exporter = MetricsExporter(registry, tmp, interval_s=0, history_max_bytes=1024)
+            for _ in range(20):
+                exporter.export_once()
+            metrics_dir = Path(tmp) / "metrics"
+            history = (metrics_dir / "history.jsonl").read_text(encoding="utf-8").splitlines()
+            record = json.loads(history[-1])
+            self.assertEqual(record["counters"], {"frames_total": 1})
+            self.assertIn("autocapture_disk_free_bytes", record["gauges"])
+            self.assertTrue((metrics_dir / "history.1.jsonl").exists())
+            self.assertLessEqual((metrics_dir / "history.jsonl").stat().st_size, 1024)
+            self.assertIn("frames_total 1", (metrics_dir / "metrics.prom").read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,6 +17,16 @@ class ModelPluginTests(unittest.TestCase):
             return
         self.assertIn("vector", result)
 
+    def test_embed_batch_returns_contiguous_matrix(self):
+        ctx = PluginContext(config={}, get_capability=lambda _k: None, logger=lambda _m: None)
+        embedder = EmbedderLocal("emb", ctx)
+        try:
+            result = embedder.embed_batch(["hello", "world"])
+        except RuntimeError:
+            return
+        self.assertEqual(result["count"], 2)
+        self.assertEqual(len(result["vectors"]), 2 * result["dim"] * 4)
+
     def test_reranker_requires_dependency(self):
         ctx = PluginContext(config={}, get_capability=lambda _k: None, logger=lambda _m: None)
         reranker = RerankerStub("rer", ctx)
@@ -26,6 +36,16 @@ class ModelPluginTests(unittest.TestCase):
             return
         self.assertIsInstance(result, list)
 
+    def test_reranker_score_batch_reports_model(self):
+        ctx = PluginContext(config={}, get_capability=lambda _k: None, logger=lambda _m: None)
+        reranker = RerankerStub("rer", ctx)
+        try:
+            result = reranker.score_batch("q", ["a", "b"])
+        except RuntimeError:
+            return
+        self.assertEqual(len(result["scores"]), 2)
+        self.assertTrue(result["model_id"])
+
     def test_vlm_requires_dependency(self):
         ctx = PluginContext(config={}, get_capability=lambda _k: None, logger=lambda _m: None)
         vlm = VLMStub("vlm", ctx)
@@ -1,6 +1,9 @@
+import _socket
 import socket
+import threading
 import unittest
 
+from autocapture_nx.plugin_system.registry import CapabilityProxy, CapabilityRegistry
 from autocapture_nx.plugin_system.runtime import network_guard
 from autocapture_nx.kernel.errors import PermissionError
 
@@ -16,6 +19,83 @@ class NetworkGuardTests(unittest.TestCase):
             s = socket.socket()
             s.close()
 
+    def test_low_level_socket_blocked(self):
+        with self.assertRaises(PermissionError):
+            with network_guard(enabled=False):
+                _socket.socket()
+
+    def test_allow_does_not_lift_outer_denial(self):
+        with self.assertRaises(PermissionError):
+            with network_guard(enabled=False):
+                with network_guard(enabled=True):
+                    socket.socket()
+
+    def test_guard_is_per_thread(self):
+        entered = threading.Event()
+        release = threading.Event()
+        outcome = {}
+
+        def denied_worker():
+            with network_guard(enabled=False):
+                entered.set()
+                release.wait(5)
+
+        worker = threading.Thread(target=denied_worker)
+        worker.start()
+        try:
+            self.assertTrue(entered.wait(5))
+            s = socket.socket()
+            s.close()
+            outcome["ok"] = True
+        finally:
+            release.set()
+            worker.join(5)
+        self.assertTrue(outcome.get("ok"))
+
+    def test_threads_spawned_while_denied_inherit_denial(self):
+        errors = []
+
+        def child():
+            try:
+                socket.socket().close()
+            except PermissionError as exc:
+                errors.append(exc)
+
+        with network_guard(enabled=False):
+            thread = threading.Thread(target=child)
+            thread.start()
+        thread.join(5)
+        self.assertEqual(len(errors), 1)
+
+
+class _Opener:
+    limit = 3
+
+    def open_socket(self):
+        socket.socket().close()
+        return True
+
+
+class CapabilityProxyTests(unittest.TestCase):
+    def test_guarded_proxy_caches_wrappers_and_denies_network(self):
+        proxy = CapabilityProxy(_Opener(), network_allowed=False)
+        self.assertIs(proxy.open_socket, proxy.open_socket)
+        self.assertEqual(proxy.limit, 3)
+        with self.assertRaises(PermissionError):
+            proxy.open_socket()
+        socket.socket().close()
+
+    def test_registry_binds_unguarded_capabilities_directly(self):
+        registry = CapabilityRegistry()
+        allowed = _Opener()
+        hosted = _Opener()
+        registry.register("net.allowed", allowed, network_allowed=True)
+        registry.register("net.hosted", hosted, network_allowed=False, guarded=False)
+        registry.register("net.denied", _Opener(), network_allowed=False)
+        self.assertIs(registry.get("net.allowed"), allowed)
+        self.assertIs(registry.get("net.hosted"), hosted)
+        self.assertIsInstance(registry.get("net.denied"), CapabilityProxy)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,6 @@
 import os
 import tempfile
+import time
 import unittest
 
 from autocapture_nx.plugin_system.api import PluginContext
@@ -16,12 +17,48 @@ class ObservabilityTests(unittest.TestCase):
             ctx = PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None)
             logger = ObservabilityLogger("obs", ctx)
             logger.log("test", {"message": "ok", "secret": "value"})
+            logger.close()
             log_path = os.path.join(tmp, "logs", "observability.log")
             with open(log_path, "r", encoding="utf-8") as handle:
                 content = handle.read()
             self.assertIn("<redacted>", content)
             self.assertNotIn("value", content)
 
+    def test_logger_keeps_one_buffered_handle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = {
+                "storage": {"data_dir": tmp},
+                "observability": {"allow_evidence": False, "allowlist_keys": ["event"]},
+            }
+            ctx = PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None)
+            logger = ObservabilityLogger("obs", ctx)
+            for idx in range(5):
+                logger.log("tick", {"idx": idx})
+            handle = logger._handle
+            logger.log("tick", {"idx": 5})
+            self.assertIs(logger._handle, handle)
+            logger.flush()
+            log_path = os.path.join(tmp, "logs", "observability.log")
+            with open(log_path, "r", encoding="utf-8") as handle:
+                self.assertEqual(len(handle.readlines()), 6)
+            logger.close()
+
+    def test_buffer_is_flushed_without_further_log_calls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = PluginContext(config={"storage": {"data_dir": tmp}}, get_capability=lambda _k: None, logger=lambda _m: None)
+            logger = ObservabilityLogger("obs", ctx)
+            logger._flush_interval_s = 0.02
+            self.addCleanup(logger.close)
+            logger.log("last.before.idle", {})
+            log_path = os.path.join(tmp, "logs", "observability.log")
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and os.path.getsize(log_path) == 0:
+                time.sleep(0.01)
+            with open(log_path, "r", encoding="utf-8") as handle:
+                self.assertIn("last.before.idle", handle.read())
+            logger.close()
+            self.assertIsNone(logger._flusher)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,96 @@
+import io
+import unittest
+
+from autocapture_nx.kernel.ocr_worker import ocr_job
+from autocapture_nx.plugin_system.api import PluginContext
+from plugins.builtin.ocr_stub.plugin import OCRLocal
+
+
+def _png(text: str, width: int = 400, height: int = 100) -> bytes:
+    from PIL import Image
+    from PIL.PngImagePlugin import PngInfo
+
+    meta = PngInfo()
+    meta.add_text("ocr_text", text)
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (255, 255, 255)).save(buf, format="PNG", pnginfo=meta)
+    return buf.getvalue()
+
+
+def _plugin(engine="stand_in", workers=2, max_side_px=2400):
+    config = {
+        "processing": {
+            "idle": {"max_concurrency_cpu": workers},
+            "ocr": {"engine": engine, "max_side_px": max_side_px, "cache_entries": 16},
+        }
+    }
+    return OCRLocal("ocr", PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None))
+
+
+class OCRBatchTests(unittest.TestCase):
+    def test_batch_returns_text_and_word_boxes_in_order(self):
+        plugin = _plugin(workers=1)
+        result = plugin.extract_batch([_png("alpha beta"), _png("gamma")])
+        self.assertEqual(result["engine"], "stand_in")
+        self.assertEqual([r["text"] for r in result["results"]], ["alpha beta", "gamma"])
+        words = result["results"][0]["words"]
+        self.assertEqual([w["text"] for w in words], ["alpha", "beta"])
+        self.assertEqual(words[1]["box"], [200, 0, 400, 100])
+
+    def test_pool_matches_inline_results(self):
+        images = [_png(f"frame {idx}") for idx in range(4)]
+        inline = _plugin(workers=1).extract_batch(images)
+        pooled_plugin = _plugin()
+        pooled_plugin.max_workers = 2
+        self.addCleanup(pooled_plugin.close)
+        pooled = pooled_plugin.extract_batch(images)
+        self.assertIsNotNone(pooled_plugin._pool)
+        self.assertEqual(pooled, inline)
+
+    def test_repeated_images_are_deduped_and_cached(self):
+        plugin = _plugin(workers=1)
+        calls = []
+        run = plugin._run
+        plugin._run = lambda images: calls.append(len(images)) or run(images)
+        same = _png("static screen")
+        result = plugin.extract_batch([same, same, _png("other")])
+        self.assertEqual(calls, [2])
+        self.assertEqual(result["results"][0], result["results"][1])
+        plugin.extract_batch([same])
+        self.assertEqual(calls, [2, 0])
+
+    def test_downsizing_reports_original_coordinates(self):
+        image = _png("wide", width=4000, height=1000)
+        result = ocr_job((image, "stand_in", 1000))
+        self.assertEqual((result["width"], result["height"]), (4000, 1000))
+        self.assertEqual(result["words"][0]["box"], [0, 0, 4000, 1000])
+
+    def test_invalid_image_does_not_fail_the_batch(self):
+        plugin = _plugin(workers=1)
+        result = plugin.extract_batch([b"garbage", _png("ok")])
+        self.assertIn("error", result["results"][0])
+        self.assertEqual(result["results"][1]["text"], "ok")
+        with self.assertRaises(RuntimeError):
+            plugin.extract(b"garbage")
+
+    def test_tesseract_engine_requires_dependency(self):
+        try:
+            import pytesseract  # noqa: F401
+        except Exception:
+            with self.assertRaises(RuntimeError):
+                _plugin(engine="tesseract").extract_batch([_png("x")])
+        else:
+            self.skipTest("pytesseract installed")
+
+
+class OCRBatchBenchmarkTests(unittest.TestCase):
+    def test_batch_matches_serial_text(self):
+        from tools.benchmarks.ocr_batch import run
+
+        result = run(images=6, width=320, height=200, workers=2, repeat_pct=50)
+        self.assertTrue(result["identical_text"])
+        self.assertEqual(result["unique_images"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
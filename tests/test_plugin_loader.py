@@ -1,11 +1,14 @@
 import json
 import os
+import subprocess
+import sys
 import tempfile
 import unittest
 from pathlib import Path
 
 from autocapture_nx.kernel.config import ConfigPaths, load_config
 from autocapture_nx.kernel.errors import PluginError
+from autocapture_nx.kernel.loader import Kernel
 from autocapture_nx.plugin_system.registry import PluginRegistry
 
 
@@ -124,6 +127,33 @@ class PluginLoaderTests(unittest.TestCase):
             plugin_ids = {p.plugin_id for p in plugins}
             self.assertNotIn("builtin.egress.gateway", plugin_ids)
 
+    def test_plugin_discovery_does_not_import_kernel_services(self):
+        probe = (
+            "import sys, autocapture_nx.plugin_system.registry\n"
+            "print(sorted(m for m in sys.modules if m.startswith('autocapture_nx.kernel.')))"
+        )
+        out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+        for module in ("query", "query_cache", "rerank", "profiler", "extraction_cache", "crypto"):
+            self.assertNotIn(f"'autocapture_nx.kernel.{module}'", out)
+
+    def test_kernel_services_are_registered_by_the_kernel(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self._config_paths(Path(tmp))
+            config = load_config(paths, safe_mode=False)
+            _plugins, caps = PluginRegistry(config, safe_mode=False).load_plugins()
+            self.assertFalse(caps.has("query.cache"))
+            kernel = Kernel(paths, safe_mode=False)
+            system = kernel.boot()
+            self.addCleanup(kernel.shutdown)
+            for capability in (
+                "observability.metrics",
+                "devtools.profiler",
+                "retrieval.rerank",
+                "query.cache",
+                "extraction.cache",
+            ):
+                self.assertTrue(system.has(capability), capability)
+
 
 if __name__ == "__main__":
     unittest.main()
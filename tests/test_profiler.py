@@ -0,0 +1,118 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from autocapture_nx.kernel.config import ConfigPaths
+from autocapture_nx.kernel.errors import PluginError, ProfilerError
+from autocapture_nx.kernel.loader import Kernel
+from autocapture_nx.kernel.profiler import Profiler, StackSampler
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class StackSamplerTests(unittest.TestCase):
+    def test_samples_other_threads_as_collapsed_stacks(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+        worker.start()
+        sampler = StackSampler(interval_s=0.001)
+        sampler.start()
+        time.sleep(0.1)
+        stacks = sampler.stop()
+        stop.set()
+        worker.join()
+        self.assertFalse(sampler.running)
+        self.assertGreater(sampler.samples, 0)
+        spinner = [stack for stack in stacks if stack.startswith("spinner;")]
+        self.assertTrue(spinner)
+        self.assertTrue(all(stack.rsplit(";", 1)[-1].startswith("_spin ") for stack in spinner))
+        self.assertFalse(any("autocapture-profiler" in stack for stack in stacks))
+
+
+class ProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def test_start_stop_writes_collapsed_output(self):
+        profiler = Profiler({}, run_root=self.tempdir.name)
+        session = profiler.start(interval_ms=1)
+        self.assertTrue(profiler.status()["running"])
+        with self.assertRaises(ProfilerError):
+            profiler.start()
+        time.sleep(0.05)
+        summary = profiler.stop()
+        self.assertFalse(profiler.status()["running"])
+        run_dir = Path(self.tempdir.name) / session["run_id"]
+        self.assertEqual(summary["run_dir"], str(run_dir))
+        lines = (run_dir / "profile.collapsed").read_text(encoding="utf-8").splitlines()
+        self.assertTrue(all(line.startswith("kernel;") and line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        recorded = json.loads((run_dir / "profile.json").read_text(encoding="utf-8"))
+        self.assertGreater(recorded["processes"]["kernel"]["samples"], 0)
+        with self.assertRaises(ProfilerError):
+            profiler.stop()
+
+    def test_back_to_back_sessions_get_separate_run_dirs(self):
+        profiler = Profiler({}, run_root=self.tempdir.name)
+        first = profiler.profile(0.01, interval_ms=1)
+        second = profiler.profile(0.01, interval_ms=1)
+        self.assertNotEqual(first["run_dir"], second["run_dir"])
+        self.assertTrue(Path(first["collapsed"]).exists())
+        self.assertTrue(Path(second["collapsed"]).exists())
+
+    def test_rejects_durations_above_configured_limit(self):
+        profiler = Profiler({"devtools": {"profiler": {"interval_ms": 10, "max_seconds": 1}}}, run_root=self.tempdir.name)
+        with self.assertRaises(ProfilerError):
+            profiler.profile(5)
+        self.assertFalse(profiler.status()["running"])
+
+
+class HostProfilingTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        root = Path(self.tempdir.name)
+        user_path = root / "user.json"
+        safe_tmp = self.tempdir.name.replace("\\", "/")
+        override = {
+            "storage": {
+                "data_dir": safe_tmp,
+                "crypto": {
+                    "keyring_path": f"{safe_tmp}/keyring.json",
+                    "root_key_path": f"{safe_tmp}/root.key",
+                },
+            }
+        }
+        user_path.write_text(json.dumps(override), encoding="utf-8")
+        paths = ConfigPaths(
+            default_path=Path("config") / "default.json",
+            user_path=user_path,
+            schema_path=Path("contracts") / "config_schema.json",
+            backup_dir=root / "backup",
+        )
+        self.system = Kernel(paths, safe_mode=False).boot()
+        self.addCleanup(self.tempdir.cleanup)
+        self.addCleanup(lambda: [getattr(p.instance, "close", lambda: None)() for p in self.system.plugins])
+
+    def test_profiles_running_subprocess_hosts(self):
+        if self.system.config["plugins"]["hosting"]["mode"] != "subprocess":
+            self.skipTest("subprocess hosting disabled")
+        with self.assertRaises(PluginError):
+            self.system.get("ocr.engine").extract(b"not an image")  # starts the host
+        profiler = self.system.get("devtools.profiler")
+        profiler.run_root = Path(self.tempdir.name) / "runs"
+        summary = profiler.profile(0.2, interval_ms=5)
+        self.assertIn("builtin.ocr.stub", summary["processes"])
+        host = summary["processes"]["builtin.ocr.stub"]
+        self.assertGreater(host["samples"], 0)
+        text = Path(summary["collapsed"]).read_text(encoding="utf-8")
+        self.assertIn("builtin.ocr.stub;MainThread;", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,76 @@
+import io
+import threading
+import time
 import unittest
+import zipfile
 
 from autocapture_nx.kernel.loader import Kernel, default_config_paths
+from autocapture_nx.kernel.query import _clamp_window, extract_on_demand
+
+
+def _segment(frame: bytes) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("frame_0000.png", frame)
+    return buf.getvalue()
+
+
+class _Store(dict):
+    def get(self, key, default=None):
+        return super().get(key, default)
+
+    def put(self, key, value):
+        self[key] = value
+
+
+class _Extractor:
+    """Returns the frame bytes as text; tracks peak concurrency."""
+
+    def __init__(self, delay_s=0.0, fail=False):
+        self.delay_s = delay_s
+        self.fail = fail
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def extract(self, frame):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.fail:
+                raise RuntimeError("Missing vlm dependency: test")
+            time.sleep(self.delay_s)
+            return {"text": frame.decode("utf-8")}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class _System:
+    def __init__(self, records, vlm, ocr=None, **on_query):
+        cfg = {"allow_decode_extract": True, "max_window_minutes": 120, "max_segments": 5, "max_workers": 4, "extract_budget_pct": 50}
+        cfg.update(on_query)
+        self.config = {"processing": {"on_query": cfg}, "performance": {"query_latency_ms": 2000}}
+        self.metadata = _Store()
+        self.media = _Store()
+        for record_id, ts, text in records:
+            self.metadata.put(record_id, {"record_type": "evidence.capture.segment", "ts_utc": ts})
+            self.media.put(record_id, _segment(text.encode("utf-8")))
+        self.caps = {
+            "storage.metadata": self.metadata,
+            "storage.media": self.media,
+            "vision.extractor": vlm,
+            "ocr.engine": ocr or _Extractor(),
+        }
+
+    def get(self, name):
+        return self.caps[name]
+
+    def has(self, name):
+        return name in self.caps
 
 
 class QueryTests(unittest.TestCase):
@@ -15,5 +85,100 @@ class QueryTests(unittest.TestCase):
         self.assertIn("answer", result)
 
 
+
+class ExtractOnDemandTests(unittest.TestCase):
+    def _records(self, count):
+        return [(f"seg{idx}", f"2026-01-01T10:{idx:02d}:00Z", f"text {idx}") for idx in range(count)]
+
+    def test_extracts_newest_segments_in_parallel_and_persists(self):
+        vlm = _Extractor(delay_s=0.05)
+        system = _System(self._records(8), vlm, max_segments=4, max_workers=4)
+        info = extract_on_demand(system, None)
+        self.assertEqual(info["processed"], 4)
+        self.assertFalse(info["timed_out"])
+        self.assertGreater(vlm.peak, 1)
+        done = sorted(rid for rid, rec in system.metadata.items() if rec.get("text"))
+        self.assertEqual(done, ["seg4", "seg5", "seg6", "seg7"])
+        self.assertEqual(system.metadata["seg7"]["text_source"], "vlm")
+        extract_on_demand(system, None, limit=4)
+        self.assertEqual(vlm.calls, 8)
+        extract_on_demand(system, None, limit=4)
+        self.assertEqual(vlm.calls, 8)
+
+    def test_deadline_returns_partial_results(self):
+        vlm = _Extractor(delay_s=0.2)
+        system = _System(self._records(6), vlm, max_segments=6, max_workers=2)
+        start = time.monotonic()
+        info = extract_on_demand(system, None, budget_ms=300)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertTrue(info["timed_out"])
+        # Two finished in budget; the two running at the deadline were waited for and kept.
+        self.assertEqual((info["processed"], info["late"]), (4, 2))
+        self.assertEqual(vlm.active, 0)
+        time.sleep(0.3)
+        self.assertEqual(vlm.calls, 4)
+        done = sorted(rid for rid, rec in system.metadata.items() if rec.get("text"))
+        self.assertEqual(done, ["seg2", "seg3", "seg4", "seg5"])
+
+    def test_results_are_persisted_in_one_bulk_write(self):
+        class _BulkStore(_Store):
+            def put_many(self, records):
+                batches.append(sorted(records))
+                self.update(records)
+
+        batches = []
+        system = _System(self._records(3), _Extractor())
+        system.metadata = system.caps["storage.metadata"] = _BulkStore(system.metadata)
+        info = extract_on_demand(system, None)
+        self.assertEqual(info["processed"], 3)
+        self.assertEqual(batches, [["seg0", "seg1", "seg2"]])
+        self.assertEqual(system.metadata["seg1"]["text"], "text 1")
+
+    def test_candidates_are_read_in_bulk(self):
+        class _BulkStore(_Store):
+            def get(self, key, default=None):
+                single.append(key)
+                return super().get(key, default)
+
+            def get_many(self, keys, default=None):
+                batches.append(len(keys))
+                return {key: dict.get(self, key, default) for key in keys}
+
+        single, batches = [], []
+        system = _System(self._records(3), _Extractor())
+        system.metadata = system.caps["storage.metadata"] = _BulkStore(system.metadata)
+        self.assertEqual(extract_on_demand(system, None)["processed"], 3)
+        self.assertEqual(single, [])
+        self.assertEqual(batches[0], 3)
+
+    def test_ocr_fallback_and_empty_text_are_persisted(self):
+        system = _System([("seg0", "2026-01-01T10:00:00Z", "")], _Extractor(fail=True))
+        info = extract_on_demand(system, None)
+        self.assertEqual(info["empty"], 1)
+        self.assertEqual(system.metadata["seg0"]["text_source"], "ocr")
+        self.assertEqual(extract_on_demand(system, None)["candidates"], 0)
+
+    def test_failed_extraction_is_retried_later(self):
+        system = _System(self._records(1), _Extractor(fail=True), ocr=_Extractor(fail=True))
+        info = extract_on_demand(system, None)
+        self.assertEqual(info["failed"], 1)
+        self.assertNotIn("text_source", system.metadata["seg0"])
+        self.assertEqual(extract_on_demand(system, None)["candidates"], 1)
+
+    def test_window_is_capped_to_max_window_minutes(self):
+        system = _System(self._records(30), _Extractor(), max_segments=30, max_window_minutes=10)
+        window = {"start": "2026-01-01T00:00:00+00:00", "end": "2026-01-01T10:20:00+00:00"}
+        info = extract_on_demand(system, window)
+        self.assertEqual(info["candidates"], 11)
+        unbounded = _System(self._records(30), _Extractor(), max_segments=30, max_window_minutes=10)
+        self.assertEqual(extract_on_demand(unbounded, None)["candidates"], 11)
+
+    def test_clamp_window(self):
+        window = {"start": "2026-01-01T08:00:00+00:00", "end": "2026-01-01T12:00:00+00:00"}
+        self.assertEqual(_clamp_window(window, 60)["start"], "2026-01-01T11:00:00+00:00")
+        self.assertEqual(_clamp_window({"start": "2026-01-01T08:00:00+00:00"}, 60)["end"], "2026-01-01T09:00:00+00:00")
+        self.assertIs(_clamp_window(window, 0), window)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,185 @@
+import unittest
+from datetime import datetime, timezone
+
+from autocapture_nx.kernel.query import result_texts, run_query
+from autocapture_nx.kernel.query_cache import QueryCache
+from autocapture_nx.kernel.write_log import WriteLog
+from plugins.builtin.storage_memory.plugin import InMemoryStore
+
+NOW = datetime(2026, 1, 2, 12, 0, tzinfo=timezone.utc)
+YESTERDAY = {"start": "2026-01-01T00:00:00+00:00", "end": "2026-01-02T00:00:00+00:00"}
+TODAY = {"start": "2026-01-02T00:00:00+00:00", "end": "2026-01-03T00:00:00+00:00"}
+
+
+def _cache(max_entries=16):
+    config = {"retrieval": {"query_cache": {"enabled": True, "max_entries": max_entries}}}
+    return QueryCache(config, clock=lambda: NOW)
+
+
+class WriteLogTests(unittest.TestCase):
+    def test_changes_since_and_truncation(self):
+        log = WriteLog(max_entries=3)
+        self.assertEqual(log.changes_since(0), [])
+        for key in ["a", "b", "a"]:
+            log.bump(key)
+        self.assertEqual(log.version, 3)
+        self.assertEqual(log.changes_since(1), ["b", "a"])
+        self.assertEqual(log.changes_since(0), ["a", "b"])
+        log.bump("c")
+        self.assertIsNone(log.changes_since(0))
+        self.assertEqual(log.changes_since(1), ["b", "a", "c"])
+
+
+class QueryCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryStore()
+        self.store.put("old", {"ts_utc": "2026-01-01T10:00:00Z", "text": "editor"})
+        self.cache = _cache()
+
+    def _prime(self, window):
+        self.cache.put("What was I doing", window, self.store.version(), {"results": [{"record_id": "old"}]})
+
+    def test_closed_window_survives_writes_outside_it(self):
+        self._prime(YESTERDAY)
+        self.store.put("new", {"ts_utc": "2026-01-02T11:00:00Z"})
+        hit = self.cache.get("  what was i   DOING ", YESTERDAY, self.store)
+        self.assertEqual(hit, {"results": [{"record_id": "old"}]})
+        hit["results"].clear()
+        self.assertEqual(self.cache.get("what was i doing", YESTERDAY, self.store)["results"], [{"record_id": "old"}])
+
+    def test_closed_window_is_invalidated_by_writes_inside_it(self):
+        self._prime(YESTERDAY)
+        self.store.put("old", {"ts_utc": "2026-01-01T10:00:00Z", "text": "editor", "text_source": "ocr"})
+        self.assertIsNone(self.cache.get("what was i doing", YESTERDAY, self.store))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_undated_writes_invalidate_closed_windows(self):
+        self._prime(YESTERDAY)
+        self.store.put("undated", {"text": "editor"})
+        self.assertIsNone(self.cache.get("what was i doing", YESTERDAY, self.store))
+
+    def test_open_windows_refresh_on_any_write(self):
+        self._prime(TODAY)
+        self._prime(None)
+        self.assertIsNotNone(self.cache.get("what was i doing", TODAY, self.store))
+        self.store.put("elsewhere", {"ts_utc": "2025-06-01T00:00:00Z"})
+        self.assertIsNone(self.cache.get("what was i doing", TODAY, self.store))
+        self.assertIsNone(self.cache.get("what was i doing", None, self.store))
+
+    def test_truncated_write_log_invalidates(self):
+        self._prime(YESTERDAY)
+        for idx in range(5000):
+            self.store.put(f"new{idx}", {"ts_utc": "2026-01-02T11:00:00Z"})
+        self.assertIsNone(self.cache.get("what was i doing", YESTERDAY, self.store))
+
+    def test_stores_without_versions_are_not_cached(self):
+        class _Plain(dict):
+            pass
+
+        self.assertIsNone(self.cache.version(_Plain()))
+        self.cache.put("q", None, None, {"results": []})
+        self.assertIsNone(self.cache.get("q", None, _Plain()))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_entries_are_bounded(self):
+        cache = _cache(max_entries=2)
+        for query in ["a", "b", "c"]:
+            cache.put(query, YESTERDAY, self.store.version(), {"results": []})
+        self.assertIsNone(cache.get("a", YESTERDAY, self.store))
+        self.assertIsNotNone(cache.get("c", YESTERDAY, self.store))
+
+
+class _Parser:
+    def parse(self, text):
+        return {"query": text, "time_window": YESTERDAY if "yesterday" in text.lower() else None}
+
+
+class _Retrieval:
+    def __init__(self, store):
+        self.store = store
+        self.calls = 0
+
+    def search(self, query, time_window=None):
+        self.calls += 1
+        return [{"record_id": record_id, "score": 1} for record_id in self.store.keys()]
+
+
+class _Answer:
+    def build(self, claims):
+        return {"claims": claims}
+
+
+class RunQueryCacheTests(unittest.TestCase):
+    def test_repeated_query_is_served_from_cache(self):
+        store = InMemoryStore()
+        store.put("seg1", {"ts_utc": "2026-01-01T10:00:00Z", "text": "editor"})
+        retrieval = _Retrieval(store)
+        cache = _cache()
+        caps = {
+            "time.intent_parser": _Parser(),
+            "retrieval.strategy": retrieval,
+            "answer.builder": _Answer(),
+            "storage.metadata": store,
+            "query.cache": cache,
+        }
+
+        class _System:
+            config = {"processing": {"on_query": {"allow_decode_extract": False}}}
+
+            def get(self, name):
+                return caps[name]
+
+            def has(self, name):
+                return name in caps
+
+        first = run_query(_System(), "yesterday editor")
+        second = run_query(_System(), "Yesterday  editor")
+        self.assertEqual(retrieval.calls, 1)
+        self.assertEqual(second["answer"], first["answer"])
+        self.assertEqual(second["intent"]["query"], "Yesterday  editor")
+        store.put("seg2", {"ts_utc": "2026-01-01T11:00:00Z", "text": "editor"})
+        third = run_query(_System(), "yesterday editor")
+        self.assertEqual(retrieval.calls, 2)
+        self.assertEqual(len(third["results"]), 2)
+
+
+class _CountingStore(InMemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.gets = 0
+        self.bulk = []
+
+    def get(self, key, default=None):
+        self.gets += 1
+        return super().get(key, default)
+
+    def get_many(self, keys, default=None):
+        self.bulk.append(list(keys))
+        return super().get_many(keys, default)
+
+
+class ResultTextTests(unittest.TestCase):
+    def setUp(self):
+        self.store = _CountingStore()
+        for idx in range(3):
+            self.store.put(f"seg{idx}", {"ts_utc": "2026-01-01T10:00:00Z", "text": f"editor {idx}"})
+
+    def test_results_with_text_are_not_refetched(self):
+        results = [{"record_id": f"seg{idx}", "score": 1, "text": f"editor {idx}"} for idx in range(3)]
+        texts, fetched = result_texts(self.store, results)
+        self.assertEqual(fetched, 0)
+        self.assertEqual(texts["seg2"], "editor 2")
+        self.assertEqual((self.store.gets, self.store.bulk), (0, []))
+
+    def test_missing_texts_are_fetched_in_one_batch(self):
+        results = [{"record_id": "seg0", "score": 1, "text": "editor 0"}]
+        results += [{"record_id": record_id, "score": 1} for record_id in ["seg1", "seg2", "gone", "seg1"]]
+        texts, fetched = result_texts(self.store, results)
+        self.assertEqual(fetched, 3)
+        self.assertEqual(self.store.bulk, [["seg1", "seg2", "gone"]])
+        self.assertEqual(self.store.gets, 0)
+        self.assertEqual(texts, {"seg0": "editor 0", "seg1": "editor 1", "seg2": "editor 2", "gone": ""})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import time
+import unittest
+
+from autocapture_nx.kernel.rerank import RerankStage
+
+
+class FakeReranker:
+    """Scores a text by its length; records every batch it is asked for."""
+
+    def __init__(self, model_id: str = "fake", delay_s: float = 0.0) -> None:
+        self.model_id = model_id
+        self.delay_s = delay_s
+        self.batches: list[list[str]] = []
+
+    def score_batch(self, query, texts):
+        self.batches.append(list(texts))
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        return {"model_id": self.model_id, "scores": [float(len(text)) for text in texts]}
+
+
+class FailingReranker:
+    def __init__(self, message: str = "Missing reranker dependency: test") -> None:
+        self.message = message
+        self.calls = 0
+
+    def score_batch(self, query, texts):
+        self.calls += 1
+        raise RuntimeError(self.message)
+
+
+class FlakyReranker(FakeReranker):
+    """Fails its first call the way a timed-out plugin host does, then recovers."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.failures = 1
+
+    def score_batch(self, query, texts):
+        if self.failures:
+            self.failures -= 1
+            raise TimeoutError("plugin host did not answer in time")
+        return super().score_batch(query, texts)
+
+
+def _config(**overrides):
+    rerank = {"enabled": True, "top_n": 50, "batch_size": 16, "budget_ms": 500, "cache_entries": 4096}
+    rerank.update(overrides)
+    return {"retrieval": {"rerank": rerank}}
+
+
+def _results(count):
+    return [{"record_id": f"r{idx}", "score": 1.0 - idx / 1000} for idx in range(count)]
+
+
+def _texts(count):
+    # r0 is the shortest, so reranking by length reverses retrieval order.
+    return {f"r{idx}": "x" * (idx + 1) for idx in range(count)}
+
+
+class RerankStageTests(unittest.TestCase):
+    def test_reorders_top_n_in_micro_batches(self):
+        reranker = FakeReranker()
+        stage = RerankStage(_config(top_n=10, batch_size=4), lambda: reranker)
+        texts = _texts(15)
+        looked_up = []
+
+        def text_for(record_id):
+            looked_up.append(record_id)
+            return texts[record_id]
+
+        results, info = stage.rerank("q", _results(15), text_for)
+        self.assertEqual([len(batch) for batch in reranker.batches], [4, 4, 2])
+        self.assertEqual(len(looked_up), 10)
+        self.assertEqual([r["record_id"] for r in results[:10]], [f"r{idx}" for idx in range(9, -1, -1)])
+        self.assertEqual([r["record_id"] for r in results[10:]], [f"r{idx}" for idx in range(10, 15)])
+        self.assertNotIn("rerank_score", results[10])
+        self.assertEqual(info, {"candidates": 10, "scored": 10, "cached": 0, "timed_out": False})
+
+    def test_repeated_query_uses_score_cache(self):
+        reranker = FakeReranker()
+        stage = RerankStage(_config(top_n=8, batch_size=8), lambda: reranker)
+        texts = _texts(8)
+        first, _ = stage.rerank("q", _results(8), texts.get)
+        second, info = stage.rerank("q", _results(8), texts.get)
+        self.assertEqual(len(reranker.batches), 1)
+        self.assertEqual(info["cached"], 8)
+        self.assertEqual(info["scored"], 0)
+        self.assertEqual(first, second)
+        stage.rerank("other", _results(8), texts.get)
+        self.assertEqual(len(reranker.batches), 2)
+
+    def test_cache_is_bounded_lru(self):
+        reranker = FakeReranker()
+        stage = RerankStage(_config(top_n=4, batch_size=4, cache_entries=3), lambda: reranker)
+        stage.rerank("q", _results(4), _texts(4).get)
+        self.assertEqual(len(stage._cache), 3)
+
+    def test_deadline_reorders_scored_prefix_only(self):
+        reranker = FakeReranker(delay_s=0.05)
+        stage = RerankStage(_config(top_n=12, batch_size=4, budget_ms=30), lambda: reranker)
+        results, info = stage.rerank("q", _results(12), _texts(12).get)
+        self.assertTrue(info["timed_out"])
+        self.assertEqual(info["scored"], 4)
+        self.assertEqual(len(reranker.batches), 1)
+        self.assertEqual([r["record_id"] for r in results[:4]], ["r3", "r2", "r1", "r0"])
+        self.assertEqual([r["record_id"] for r in results[4:]], [f"r{idx}" for idx in range(4, 12)])
+
+    def test_zero_budget_keeps_retrieval_order(self):
+        reranker = FakeReranker()
+        stage = RerankStage(_config(), lambda: reranker)
+        original = _results(5)
+        results, info = stage.rerank("q", original, _texts(5).get, budget_ms=0)
+        self.assertTrue(info["timed_out"])
+        self.assertEqual(results, original)
+        self.assertEqual(reranker.batches, [])
+
+    def test_failing_reranker_disables_stage(self):
+        reranker = FailingReranker()
+        stage = RerankStage(_config(), lambda: reranker)
+        original = _results(3)
+        results, _ = stage.rerank("q", original, _texts(3).get)
+        self.assertEqual(results, original)
+        self.assertIsNotNone(stage.unavailable)
+        stage.rerank("q", original, _texts(3).get)
+        self.assertEqual(reranker.calls, 1)
+
+    def test_model_load_failure_via_plugin_host_disables_stage(self):
+        reranker = FailingReranker("Failed to load reranker model at /models: bad weights")
+        stage = RerankStage(_config(), lambda: reranker)
+        stage.rerank("q", _results(3), _texts(3).get)
+        stage.rerank("q", _results(3), _texts(3).get)
+        self.assertEqual(reranker.calls, 1)
+
+    def test_transient_failure_falls_back_for_that_query_only(self):
+        reranker = FlakyReranker()
+        stage = RerankStage(_config(), lambda: reranker)
+        original = _results(3)
+        results, info = stage.rerank("q", original, _texts(3).get)
+        self.assertEqual(results, original)
+        self.assertIn("did not answer", info["error"])
+        self.assertIsNone(stage.unavailable)
+        results, info = stage.rerank("q", original, _texts(3).get)
+        self.assertEqual([r["record_id"] for r in results], ["r2", "r1", "r0"])
+        self.assertNotIn("error", info)
+
+    def test_disabled_or_missing_reranker_is_a_no_op(self):
+        original = _results(3)
+        disabled = RerankStage(_config(enabled=False), lambda: FakeReranker())
+        self.assertEqual(disabled.rerank("q", original, _texts(3).get)[0], original)
+        missing = RerankStage(_config(), lambda: None)
+        self.assertEqual(missing.rerank("q", original, _texts(3).get)[0], original)
+
+
+if __name__ == "__main__":
+    unittest.main()
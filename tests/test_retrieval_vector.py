@@ -0,0 +1,365 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from autocapture_nx.kernel.config import ConfigPaths
+from autocapture_nx.kernel.keyring import KeyRing
+from autocapture_nx.kernel.loader import Kernel
+from autocapture_nx.kernel.query import run_query
+from autocapture_nx.plugin_system.api import PluginContext
+from plugins.builtin.retrieval_basic.plugin import RetrievalStrategy
+from plugins.builtin.retrieval_vector.plugin import (
+    EmbeddingCache,
+    HashingEmbedder,
+    IndexCipher,
+    IVFShard,
+    ShardedIndex,
+    VectorIndex,
+    VectorRetrieval,
+    _SEALED_CHUNKS_MAX,
+)
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+
+class StubStore:
+    def __init__(self):
+        self._data = {}
+
+    def put(self, key, value):
+        self._data[key] = value
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def keys(self):
+        return list(self._data.keys())
+
+
+@unittest.skipIf(np is None, "numpy not available")
+class HashingEmbedderTests(unittest.TestCase):
+    def test_deterministic_and_morphology_aware(self):
+        embedder = HashingEmbedder(128)
+        first = embedder.embed("Quarterly invoice totals")
+        self.assertEqual(first, embedder.embed("Quarterly invoice totals"))
+        self.assertEqual(first["model_id"], "stand_in_hash_v1_128")
+
+        def cos(a, b):
+            va = np.asarray(embedder.embed(a)["vector"])
+            vb = np.asarray(embedder.embed(b)["vector"])
+            return float(va @ vb / (np.linalg.norm(va) * np.linalg.norm(vb)))
+
+        self.assertGreater(cos("invoices", "invoice"), cos("invoices", "weather"))
+
+
+@unittest.skipIf(np is None, "numpy not available")
+class VectorIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.root = os.path.join(self.tempdir.name, "vector")
+
+    def _fill(self, index, count):
+        rng = np.random.default_rng(7)
+        vectors = rng.standard_normal((count, index.dim)).astype(np.float32)
+        for row, vec in enumerate(vectors):
+            index.add(f"rec{row:03d}", vec, f"2026-01-24T10:{row % 60:02d}:00Z")
+        return vectors
+
+    def test_top_k_survives_growth_and_reload(self):
+        for dtype in ("float16", "int8"):
+            with self.subTest(dtype=dtype):
+                root = os.path.join(self.root, dtype)
+                index = VectorIndex(root, 32, dtype, "m1")
+                vectors = self._fill(index, 150)
+                hits = index.top_k(vectors[42], 3)
+                self.assertEqual(hits[0][0], "rec042")
+                self.assertAlmostEqual(hits[0][1], 1.0, delta=0.02)
+                index.close()
+
+                reopened = VectorIndex(root, 32, dtype, "m1")
+                self.assertEqual(len(reopened), 150)
+                self.assertEqual(reopened.top_k(vectors[42], 1)[0][0], "rec042")
+                mask = np.array([record_id != "rec042" for record_id in reopened.ids])
+                self.assertNotEqual(reopened.top_k(vectors[42], 1, mask)[0][0], "rec042")
+                reopened.close()
+
+    def test_model_change_discards_index(self):
+        index = VectorIndex(self.root, 16, "float16", "m1")
+        self._fill(index, 3)
+        index.close()
+        self.assertEqual(len(VectorIndex(self.root, 16, "float16", "m2")), 0)
+
+    def test_encrypted_index_is_not_plaintext(self):
+        keyring = KeyRing.load(os.path.join(self.tempdir.name, "keyring.json"))
+        index = VectorIndex(self.root, 16, "int8", "m1", IndexCipher(keyring))
+        vectors = self._fill(index, 5)
+        index.close()
+        self.assertEqual(os.listdir(self.root), ["index.00000000.enc.json"])
+        self.assertNotIn("rec001", Path(self.root, "index.00000000.enc.json").read_text(encoding="utf-8"))
+        reopened = VectorIndex(self.root, 16, "int8", "m1", IndexCipher(keyring))
+        self.assertEqual(reopened.top_k(vectors[1], 1)[0][0], "rec001")
+
+    def test_encrypted_flush_seals_only_changed_rows(self):
+        cipher = IndexCipher(KeyRing.load(os.path.join(self.tempdir.name, "keyring.json")))
+        index = VectorIndex(self.root, 16, "int8", "m1", cipher)
+        vectors = self._fill(index, 200)
+        index.flush()
+        index.add("rec_new", vectors[3], "2026-01-02T00:00:00Z")
+        index.add("rec005", vectors[5], "2026-01-03T00:00:00Z")
+        index.flush()
+        chunks = sorted(os.listdir(self.root))
+        self.assertEqual(chunks, ["index.00000000.enc.json", "index.00000001.enc.json"])
+        with np.load(io.BytesIO(cipher.read(os.path.join(self.root, chunks[1]))), allow_pickle=False) as data:
+            self.assertEqual(data["matrix"].shape, (2, 16))
+            self.assertEqual(json.loads(str(data["header"]))["rows"], [5, 200])
+        index.close()
+
+        reopened = VectorIndex(self.root, 16, "int8", "m1", cipher)
+        self.assertEqual(len(reopened), 201)
+        self.assertEqual(reopened.ts_for("rec005"), "2026-01-03T00:00:00Z")
+        self.assertEqual(reopened.top_k(vectors[7], 1)[0][0], "rec007")
+        self.assertIn(reopened.top_k(vectors[3], 2)[1][0], {"rec003", "rec_new"})
+
+        for extra in range(_SEALED_CHUNKS_MAX - 2):
+            reopened.add(f"extra{extra}", vectors[extra], None)
+            reopened.flush()
+        self.assertEqual(len(os.listdir(self.root)), _SEALED_CHUNKS_MAX)
+        reopened.add("last", vectors[9], None)
+        reopened.flush()
+        self.assertEqual(len(os.listdir(self.root)), 1)
+        self.assertEqual(reopened.rewrite(), 201 + _SEALED_CHUNKS_MAX - 1)
+        self.assertEqual(len(os.listdir(self.root)), 1)
+        reopened.close()
+        again = VectorIndex(self.root, 16, "int8", "m1", cipher)
+        self.assertEqual(again.ids, reopened.ids)
+        self.assertEqual(again.top_k(vectors[7], 1)[0][0], "rec007")
+
+
+def _clustered(count, dim, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    return centers[labels] + 0.3 * rng.standard_normal((count, dim)).astype(np.float32)
+
+
+@unittest.skipIf(np is None, "numpy not available")
+class ANNIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.root = os.path.join(self.tempdir.name, "vector")
+
+    def test_ivf_trains_incrementally_and_matches_exact_search(self):
+        vectors = _clustered(600, 32, 12, seed=3)
+        shard = IVFShard(VectorIndex(self.root, 32, "float16", "m1"), nlist=64, nprobe=6, min_rows=200)
+        for row, vec in enumerate(vectors[:199]):
+            shard.add(f"r{row:04d}", vec, None)
+        self.assertIsNone(shard.centroids)
+        for row, vec in enumerate(vectors[199:], start=199):
+            shard.add(f"r{row:04d}", vec, None)
+        self.assertEqual(shard.trained_rows, 400)  # trained at 200, retrained on doubling
+        self.assertEqual(len(shard.centroids), 20)
+        found = 0
+        for query in vectors[::20] + 0.05:
+            exact = {record_id for record_id, _ in shard.vectors.top_k(query, 5)}
+            found += len(exact & {record_id for record_id, _ in shard.top_k(query, 5)})
+        self.assertGreaterEqual(found / (5 * len(vectors[::20])), 0.9)
+        shard.close()
+
+        reopened = IVFShard(VectorIndex(self.root, 32, "float16", "m1"), nlist=64, nprobe=6, min_rows=200)
+        np.testing.assert_array_equal(reopened.centroids, shard.centroids)
+        self.assertEqual(reopened.top_k(vectors[7], 1)[0][0], "r0007")
+
+    def test_time_windows_prune_month_shards(self):
+        index = ShardedIndex(self.root, 16, "int8", "m1", min_rows=None)
+        vectors = _clustered(3, 16, 3, seed=1)
+        index.add("jan", vectors[0], "2026-01-31T23:00:00Z")
+        index.add("feb", vectors[1], "2026-02-10T00:00:00Z")
+        index.add("undated", vectors[2], None)
+        self.assertEqual(sorted(index.shards), ["2026-01", "2026-02", "undated"])
+        window = {"start": "2026-02-01T00:00:00+00:00", "end": "2026-02-28T00:00:00+00:00"}
+        covering = index._covering(window)
+        self.assertEqual([shard.vectors.root for shard, _partial in covering], [index.shards["2026-02"].vectors.root])
+        self.assertEqual([record_id for record_id, _ in index.top_k(vectors[0], 3, window)], ["feb"])
+        self.assertEqual(len(index.top_k(vectors[0], 3)), 3)
+        index.close()
+        reopened = ShardedIndex(self.root, 16, "int8", "m1", min_rows=None)
+        self.assertIn("jan", reopened)
+        self.assertEqual(reopened.ts_for("feb"), "2026-02-10T00:00:00Z")
+
+
+@unittest.skipIf(np is None, "numpy not available")
+class ANNBenchmarkTests(unittest.TestCase):
+    def test_reports_recall_and_latency_against_exact(self):
+        from tools.benchmarks.vector_ann import run
+
+        result = run(rows=800, dim=32, clusters=20, months=2, queries=10, k=5, nlist=64, nprobe=8, min_rows=100)
+        self.assertEqual(result["shards"], 2)
+        self.assertGreater(result["trained_lists"], 0)
+        for scope in ("all", "one_month"):
+            self.assertGreaterEqual(result[scope]["recall_at_k"], 0.8)
+            self.assertEqual(result[scope]["ann_ms"]["count"], 10)
+            self.assertIn("p90", result[scope]["exact_ms"])
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self, dim):
+        super().__init__(dim)
+        self.batches = []
+
+    def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return super().embed_batch(texts)
+
+
+class EmbeddingCacheTests(unittest.TestCase):
+    def test_lru_bound_and_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "embeddings.jsonl")
+            cache = EmbeddingCache(path, max_entries=2)
+            keys = [EmbeddingCache.key("m", text) for text in ("a", "b", "c")]
+            self.assertNotEqual(keys[0], EmbeddingCache.key("other", "a"))
+            cache.put(keys[0], b"\x00" * 4)
+            cache.put(keys[1], b"\x01" * 4)
+            cache.flush()
+            self.assertEqual(cache.get(keys[0]), b"\x00" * 4)  # a is now most recent
+            cache.put(keys[2], b"\x02" * 4)
+            cache.flush()
+            self.assertIsNone(cache.get(keys[1]))
+            self.assertEqual(cache.stats(), {"entries": 2, "hits": 1, "misses": 1})
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write('{"k": "torn')
+            reloaded = EmbeddingCache(path, max_entries=2)
+            self.assertEqual(reloaded.get(keys[2]), b"\x02" * 4)
+            self.assertEqual(len(reloaded), 2)
+
+    def test_encrypted_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            keyring = KeyRing.load(os.path.join(tmp, "keyring.json"))
+            path = os.path.join(tmp, "embeddings.jsonl")
+            cache = EmbeddingCache(path, 10, IndexCipher(keyring, "embedding_cache"))
+            key = EmbeddingCache.key("m", "secret title")
+            cache.put(key, b"vec!")
+            cache.flush()
+            self.assertNotIn(key, Path(path).read_text(encoding="utf-8"))
+            self.assertEqual(EmbeddingCache(path, 10, IndexCipher(keyring, "embedding_cache")).get(key), b"vec!")
+
+
+@unittest.skipIf(np is None, "numpy not available")
+class VectorRetrievalTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.store = StubStore()
+        self.store.put("a", {"text": "Paid the electricity invoice", "ts_utc": "2026-01-24T10:00:00Z"})
+        self.store.put("b", {"text": "Three invoices overdue from ACME", "ts_utc": "2026-01-24T11:00:00Z"})
+        self.store.put("c", {"text": "Weather forecast: sunny", "ts_utc": "2026-01-24T12:00:00Z"})
+        self.store.put("d", {"ts_utc": "2026-01-24T13:00:00Z"})
+        config = {
+            "storage": {"data_dir": self.tempdir.name, "encryption_required": False},
+            "retrieval": {"vector": {"embedder": "stand_in", "dim": 256, "dtype": "float16", "top_k": 5}},
+        }
+        caps = {"storage.metadata": self.store}
+        ctx = PluginContext(config=config, get_capability=caps.get, logger=lambda _m: None)
+        caps["retrieval.strategy"] = RetrievalStrategy("lexical", ctx)
+        self.retriever = VectorRetrieval("vector", ctx)
+        self.addCleanup(self.retriever.close)
+
+    def test_fuses_vector_hits_with_lexical_matches(self):
+        self.assertEqual(self.retriever.index_pending(), 3)
+        self.assertEqual(self.retriever.index_pending(), 0)
+        results = self.retriever.search("invoices")
+        ids = [r["record_id"] for r in results]
+        self.assertEqual(ids[0], "b")
+        self.assertIn("a", ids)  # no substring match, found by similarity
+        self.assertNotIn("c", ids)
+        self.assertEqual(results[0]["lexical_score"], 1.0)
+        by_id = {r["record_id"]: r for r in results}
+        self.assertEqual(by_id["a"]["lexical_score"], 0.0)
+        self.assertGreater(by_id["a"]["vector_score"], 0.0)
+
+    def test_batches_distinct_texts_and_reuses_cache(self):
+        embedder = CountingEmbedder(256)
+        self.retriever._resolve()
+        self.retriever._embedder = embedder
+        vectors = self.retriever.embed_batch(["title one", "title two", "title one"])
+        self.assertEqual(vectors.shape, (3, 256))
+        self.assertTrue(vectors.flags["C_CONTIGUOUS"])
+        np.testing.assert_array_equal(vectors[0], vectors[2])
+        self.assertEqual(embedder.batches, [["title one", "title two"]])
+        self.retriever.embed_batch(["title two", "title three"])
+        self.assertEqual(embedder.batches[-1], ["title three"])
+        self.assertEqual(self.retriever.stats()["cache"]["entries"], 3)
+
+        self.retriever.close()
+        embedder.batches.clear()
+        self.retriever._resolve()
+        self.retriever._embedder = embedder
+        self.retriever.embed_batch(["title one", "title three"])
+        self.assertEqual(embedder.batches, [])
+
+    def test_time_window_applies_to_vector_hits(self):
+        self.retriever.index_pending()
+        window = {"start": "2026-01-24T09:00:00Z", "end": "2026-01-24T10:30:00Z"}
+        results = self.retriever.search("invoices", time_window=window)
+        self.assertEqual([r["record_id"] for r in results], ["a"])
+
+    def test_write_time_indexing_persists(self):
+        self.assertTrue(self.retriever.index_record("d", {"text": "invoice reminder", "ts_utc": "2026-01-24T13:00:00Z"}))
+        self.assertFalse(self.retriever.index_record("e", {"ts_utc": "2026-01-24T13:00:00Z"}))
+        self.retriever.close()
+        shard = Path(self.tempdir.name, "vector", "shards", "2026-01")
+        header = json.loads((shard / "ids.json").read_text(encoding="utf-8"))
+        self.assertEqual(header["ids"], ["d"])
+        self.assertEqual(header["model_id"], "stand_in_hash_v1_256")
+
+
+@unittest.skipIf(np is None, "numpy not available")
+class VectorQueryTests(unittest.TestCase):
+    def test_run_query_uses_hybrid_retrieval(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            safe_tmp = tmp.replace("\\", "/")
+            override = {
+                "storage": {
+                    "data_dir": safe_tmp,
+                    "crypto": {
+                        "keyring_path": f"{safe_tmp}/keyring.json",
+                        "root_key_path": f"{safe_tmp}/root.key",
+                    },
+                },
+                "retrieval": {"vector": {"embedder": "stand_in"}},
+            }
+            (root / "user.json").write_text(json.dumps(override), encoding="utf-8")
+            paths = ConfigPaths(
+                default_path=Path("config") / "default.json",
+                user_path=root / "user.json",
+                schema_path=Path("contracts") / "config_schema.json",
+                backup_dir=root / "backup",
+            )
+            system = Kernel(paths, safe_mode=False).boot()
+            try:
+                metadata = system.get("storage.metadata")
+                metadata.put("seg1", {"text": "Quarterly invoices reviewed", "ts_utc": "2026-01-24T10:00:00Z"})
+                system.get("retrieval.vector").index_pending()
+                result = run_query(system, "invoice")
+                self.assertEqual(result["results"][0]["record_id"], "seg1")
+                self.assertGreater(result["results"][0]["vector_score"], 0)
+                # encryption_required keeps the index out of plaintext files
+                self.assertEqual(sorted(os.listdir(root / "vector")), ["embeddings.jsonl", "shards"])
+                self.assertEqual(os.listdir(root / "vector" / "shards" / "2026-01"), ["index.00000000.enc.json"])
+                self.assertNotIn("invoice", (root / "vector" / "embeddings.jsonl").read_text(encoding="utf-8"))
+            finally:
+                for plugin in system.plugins:
+                    getattr(plugin.instance, "close", lambda: None)()
+
+
+if __name__ == "__main__":
+    unittest.main()
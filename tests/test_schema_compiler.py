@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from autocapture_nx.kernel.config import SchemaLiteValidator
+from autocapture_nx.kernel.errors import ConfigError
+from autocapture_nx.kernel.schema import compile_schema, load_compiled_schema
+
+
+SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["name", "count"],
+    "properties": {
+        "name": {"type": "string"},
+        "count": {"type": "integer", "minimum": 0},
+        "mode": {"enum": ["a", "b"]},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "ref": {"type": ["string", "null"]},
+    },
+}
+
+
+class SchemaCompilerTests(unittest.TestCase):
+    def test_valid_document_has_no_errors(self):
+        compiled = compile_schema(SCHEMA)
+        self.assertEqual(compiled.errors({"name": "x", "count": 1, "tags": ["t"], "ref": None}), [])
+
+    def test_errors_are_structured_and_complete(self):
+        compiled = compile_schema(SCHEMA)
+        issues = compiled.errors({"count": True, "mode": "c", "tags": ["ok", 3], "extra": 1})
+        rendered = {str(issue) for issue in issues}
+        self.assertIn("$: missing required field name", rendered)
+        self.assertIn("$.count: expected integer, got boolean", rendered)
+        self.assertIn("$.mode: value 'c' not in enum ['a', 'b']", rendered)
+        self.assertIn("$.tags[1]: expected string, got int", rendered)
+        self.assertIn("$: unexpected field extra", rendered)
+
+    def test_validate_raises_first_issue(self):
+        with self.assertRaises(ConfigError) as ctx:
+            SchemaLiteValidator().validate(SCHEMA, {"name": "x", "count": -1})
+        self.assertIn("below minimum", str(ctx.exception))
+
+    def test_lite_validator_sees_in_place_schema_edits(self):
+        schema = {"type": "object", "properties": {"name": {"type": "string"}}}
+        validator = SchemaLiteValidator()
+        validator.validate(schema, {"name": "x"})
+        schema["properties"]["name"]["type"] = "integer"
+        self.assertEqual(len(validator.errors(schema, {"name": "x"})), 1)
+        self.assertFalse(hasattr(validator, "_compiled"))
+
+    def test_file_cache_reuses_and_invalidates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "schema.json"
+            path.write_text(json.dumps(SCHEMA), encoding="utf-8")
+            first = load_compiled_schema(path)
+            self.assertIs(load_compiled_schema(path), first)
+            changed = dict(SCHEMA, required=["name"])
+            path.write_text(json.dumps(changed), encoding="utf-8")
+            os.utime(path, ns=(0, 0))
+            second = load_compiled_schema(path)
+            self.assertIsNot(second, first)
+            self.assertTrue(second.is_valid({"name": "x"}))
+
+    def test_default_config_is_valid(self):
+        with open("config/default.json", "r", encoding="utf-8") as handle:
+            config = json.load(handle)
+        self.assertEqual(load_compiled_schema("contracts/config_schema.json").errors(config), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,6 +28,32 @@ class SQLCipherStoreTests(unittest.TestCase):
                 # Dependency missing; acceptable for non-Windows test env
                 return
 
+    def test_sqlcipher_put_many_or_skip(self):
+        try:
+            import sqlcipher3  # noqa: F401
+        except Exception:
+            self.skipTest("sqlcipher3 not available")
+        with tempfile.TemporaryDirectory() as tmp:
+            config = {
+                "storage": {
+                    "data_dir": tmp,
+                    "crypto": {
+                        "root_key_path": os.path.join(tmp, "vault", "root.key"),
+                        "keyring_path": os.path.join(tmp, "vault", "keyring.json"),
+                    },
+                }
+            }
+            ctx = PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None)
+            store = SQLCipherStoragePlugin("sql", ctx).capabilities()["storage.metadata"]
+            store.put_many({f"k{idx}": {"v": idx} for idx in range(600)})
+            self.assertEqual(store.version(), 600)
+            found = store.get_many(["k0", "k599", "missing"], {})
+            self.assertEqual(found, {"k0": {"v": 0}, "k599": {"v": 599}, "missing": {}})
+            with self.assertRaises(TypeError):
+                store.put_many({"k0": {"v": -1}, "bad": {"v": object()}})
+            self.assertEqual(store.get("k0"), {"v": 0})
+            self.assertIsNone(store.get("bad"))
+
 
 if __name__ == "__main__":
     unittest.main()
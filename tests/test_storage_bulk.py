@@ -0,0 +1,41 @@
+import unittest
+
+from autocapture_nx.kernel.storage_bulk import chunks, get_many, put_many
+from plugins.builtin.storage_memory.plugin import InMemoryStore
+
+
+class _PlainStore:
+    def __init__(self):
+        self.data = {}
+        self.puts = 0
+
+    def put(self, key, value):
+        self.puts += 1
+        self.data[key] = value
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+
+class StorageBulkTests(unittest.TestCase):
+    def test_falls_back_to_per_record_calls(self):
+        store = _PlainStore()
+        self.assertEqual(put_many(store, [("a", 1), ("b", 2)]), 2)
+        self.assertEqual(store.puts, 2)
+        self.assertEqual(get_many(store, ["b", "a", "b", "z"], 0), {"b": 2, "a": 1, "z": 0})
+        self.assertEqual(put_many(store, {}), 0)
+
+    def test_memory_store_bumps_a_version_per_record(self):
+        store = InMemoryStore()
+        store.put("a", 0)
+        self.assertEqual(put_many(store, {"a": 1, "b": 2}), 2)
+        self.assertEqual(store.version(), 3)
+        self.assertEqual(store.changes_since(1), ["a", "b"])
+        self.assertEqual(get_many(store, ["a", "b"]), {"a": 1, "b": 2})
+
+    def test_chunks(self):
+        self.assertEqual(list(chunks(iter("abcde"), 2)), [["a", "b"], ["c", "d"], ["e"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
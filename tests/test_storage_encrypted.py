@@ -5,7 +5,7 @@ import unittest
 from pathlib import Path
 
 from autocapture_nx.plugin_system.api import PluginContext
-from plugins.builtin.storage_encrypted.plugin import EncryptedStoragePlugin
+from plugins.builtin.storage_encrypted.plugin import EncryptedStoragePlugin, _EncryptedFileStore
 
 
 class EncryptedStorageTests(unittest.TestCase):
@@ -31,6 +31,72 @@ class EncryptedStorageTests(unittest.TestCase):
             self.assertNotIn("value", content)
             self.assertEqual(store.get("record1")["secret"], "value")
 
+    def test_file_store_base_needs_a_codec(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(TypeError):
+                _EncryptedFileStore(tmp, key_provider=None)
+
+    def test_get_many_reads_across_key_rotation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = {
+                "storage": {
+                    "data_dir": tmp,
+                    "crypto": {
+                        "root_key_path": os.path.join(tmp, "vault", "root.key"),
+                        "keyring_path": os.path.join(tmp, "vault", "keyring.json"),
+                    },
+                }
+            }
+            ctx = PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None)
+            plugin = EncryptedStoragePlugin("test", ctx)
+            store = plugin.capabilities()["storage.metadata"]
+            for idx in range(20):
+                store.put(f"r{idx}", {"n": idx})
+            plugin._keyring.rotate()
+            store.put("r20", {"n": 20})
+            ids = [f"r{idx}" for idx in range(21)] + ["missing", "r3"]
+            found = store.get_many(ids, default={})
+            self.assertEqual(list(found), ids[:-1])
+            self.assertEqual([found[f"r{idx}"]["n"] for idx in range(21)], list(range(21)))
+            self.assertEqual(found["missing"], {})
+            self.assertEqual(store.get_many(["r1", "r2"]), {"r1": {"n": 1}, "r2": {"n": 2}})
+
+    def test_put_many_is_all_or_nothing_and_rotation_reseals(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = {
+                "storage": {
+                    "data_dir": tmp,
+                    "crypto": {
+                        "root_key_path": os.path.join(tmp, "vault", "root.key"),
+                        "keyring_path": os.path.join(tmp, "vault", "keyring.json"),
+                    },
+                }
+            }
+            ctx = PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None)
+            plugin = EncryptedStoragePlugin("test", ctx)
+            metadata = plugin.capabilities()["storage.metadata"]
+            media = plugin.capabilities()["storage.media"]
+            metadata.put_many({f"m{idx}": {"n": idx} for idx in range(70)})
+            self.assertEqual(metadata.version(), 70)
+            with self.assertRaises(TypeError):
+                metadata.put_many({"m0": {"n": -1}, "bad": {"n": object()}})
+            self.assertEqual(metadata.get("m0"), {"n": 0})
+            self.assertIsNone(metadata.get("bad"))
+            self.assertEqual(sorted(os.listdir(os.path.join(tmp, "metadata")))[:2], ["m0.json", "m1.json"])
+            self.assertFalse([name for name in os.listdir(os.path.join(tmp, "metadata")) if name.endswith(".tmp")])
+
+            media.put_many({"a": b"alpha", "b": b"beta"})
+            self.assertEqual(media.get_many(["a", "b", "c"]), {"a": b"alpha", "b": b"beta", "c": None})
+
+            old_id = plugin._keyring.active_key_id
+            plugin._keyring.rotate()
+            self.assertEqual(metadata.rotate(), 70)
+            self.assertEqual(media.rotate(), 2)
+            with open(os.path.join(tmp, "metadata", "m69.json"), "r", encoding="utf-8") as handle:
+                self.assertNotEqual(json.load(handle)["key_id"], old_id)
+            self.assertEqual(metadata.get("m69"), {"n": 69})
+            self.assertEqual(media.get("b"), b"beta")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from datetime import datetime, timezone
+
+from autocapture_nx.kernel.time_window import parse_ts, within_window
+
+
+class TimeWindowTests(unittest.TestCase):
+    def test_parse_ts_accepts_z_suffix_and_rejects_garbage(self):
+        self.assertEqual(parse_ts("2026-01-24T10:00:00Z"), datetime(2026, 1, 24, 10, tzinfo=timezone.utc))
+        self.assertIsNone(parse_ts("yesterday"))
+        self.assertIsNone(parse_ts(None))
+
+    def test_within_window_bounds_are_inclusive_and_undated_records_excluded(self):
+        window = {"start": "2026-01-24T10:00:00Z", "end": "2026-01-24T11:00:00Z"}
+        self.assertTrue(within_window("2026-01-24T10:00:00Z", window))
+        self.assertTrue(within_window("2026-01-24T11:00:00Z", window))
+        self.assertFalse(within_window("2026-01-24T11:00:01Z", window))
+        self.assertFalse(within_window(None, window))
+        self.assertTrue(within_window(None, None))
+        self.assertTrue(within_window("2020-01-01T00:00:00Z", {"end": "2026-01-24T11:00:00Z"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from autocapture_nx.kernel.config import ConfigPaths
+from autocapture_nx.kernel.errors import PluginError
+from autocapture_nx.kernel.loader import Kernel
+from autocapture_nx.kernel.query import trace_query
+from autocapture_nx.kernel.tracing import Tracer, chrome_trace, get_tracer, write_chrome_trace
+
+
+class TracerTests(unittest.TestCase):
+    def test_nested_spans_form_a_tree(self):
+        tracer = Tracer(enabled=True)
+        with tracer.span("root") as root:
+            with tracer.span("child", stage="a") as child:
+                pass
+        spans = {span["name"]: span for span in tracer.spans(root.trace_id)}
+        self.assertIsNone(spans["root"]["parent_id"])
+        self.assertEqual(spans["child"]["parent_id"], root.span_id)
+        self.assertEqual(spans["child"]["span_id"], child.span_id)
+        self.assertEqual(spans["child"]["attrs"], {"stage": "a"})
+        self.assertGreaterEqual(spans["root"]["duration_ns"], spans["child"]["duration_ns"])
+
+    def test_disabled_tracer_records_only_forced_roots(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span("ignored"):
+            pass
+        self.assertEqual(tracer.spans(), [])
+        with tracer.span("forced", force=True):
+            with tracer.span("child"):
+                pass
+        self.assertEqual(sorted(span["name"] for span in tracer.spans()), ["child", "forced"])
+
+    def test_ring_buffer_is_bounded(self):
+        tracer = Tracer(enabled=True, ring_size=3)
+        for idx in range(10):
+            with tracer.span(f"s{idx}"):
+                pass
+        self.assertEqual([span["name"] for span in tracer.spans()], ["s7", "s8", "s9"])
+
+    def test_chrome_trace_export(self):
+        tracer = Tracer(enabled=True)
+        with tracer.span("root"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_chrome_trace(Path(tmp) / "trace.json", tracer.spans())
+            data = json.loads(path.read_text(encoding="utf-8"))
+        event = data["traceEvents"][0]
+        self.assertEqual((event["name"], event["ph"]), ("root", "X"))
+        self.assertEqual(chrome_trace([])["traceEvents"], [])
+
+
+class QueryTracingTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        root = Path(self.tempdir.name)
+        user_path = root / "user.json"
+        safe_tmp = self.tempdir.name.replace("\\", "/")
+        override = {
+            "storage": {
+                "data_dir": safe_tmp,
+                "crypto": {
+                    "keyring_path": f"{safe_tmp}/keyring.json",
+                    "root_key_path": f"{safe_tmp}/root.key",
+                },
+            }
+        }
+        user_path.write_text(json.dumps(override), encoding="utf-8")
+        paths = ConfigPaths(
+            default_path=Path("config") / "default.json",
+            user_path=user_path,
+            schema_path=Path("contracts") / "config_schema.json",
+            backup_dir=root / "backup",
+        )
+        self.system = Kernel(paths, safe_mode=False).boot()
+        self.addCleanup(lambda: [getattr(p.instance, "close", lambda: None)() for p in self.system.plugins])
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_query_produces_stage_spans(self):
+        _result, spans = trace_query(self.system, "what happened today")
+        names = [span["name"] for span in spans]
+        for stage in ("query", "query.parse", "query.retrieve", "query.answer"):
+            self.assertIn(stage, names)
+        self.assertEqual(len({span["trace_id"] for span in spans}), 1)
+
+    def test_spans_cross_subprocess_ipc(self):
+        ocr = self.system.get("ocr.engine")
+        tracer = get_tracer()
+        with tracer.span("test.ocr", force=True) as root:
+            with self.assertRaises(PluginError):
+                ocr.extract(b"not an image")
+        spans = tracer.spans(root.trace_id)
+        ipc = [span for span in spans if span["name"] == "ipc:ocr.engine.extract"]
+        hosted = [span for span in spans if span["name"] == "host:ocr.engine.extract"]
+        self.assertEqual(len(ipc), 1)
+        self.assertEqual(len(hosted), 1)
+        self.assertEqual(ipc[0]["parent_id"], root.span_id)
+        self.assertEqual(hosted[0]["parent_id"], ipc[0]["span_id"])
+        self.assertNotEqual(hosted[0]["pid"], os.getpid())
+        self.assertIn("error", hosted[0]["attrs"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import io
+import threading
+import unittest
+
+from autocapture_nx.kernel.model_manager import BatchQueue, ModelManager, notify_mode
+from autocapture_nx.kernel.query import vlm_frames
+from autocapture_nx.plugin_system.api import PluginContext
+from plugins.builtin.vlm_stub.plugin import VLMStub
+
+
+def _png(text: str) -> bytes:
+    from PIL import Image
+    from PIL.PngImagePlugin import PngInfo
+
+    meta = PngInfo()
+    meta.add_text("ocr_text", text)
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 32), (255, 255, 255)).save(buf, format="PNG", pnginfo=meta)
+    return buf.getvalue()
+
+
+def _plugin(batch_size=8, wait_ms=20, release=True, deadline_ms=50):
+    config = {
+        "runtime": {"gpu": {"release_vram_on_active": release, "release_vram_deadline_ms": deadline_ms}},
+        "processing": {"vlm": {"backend": "stand_in", "batch_size": batch_size, "batch_wait_ms": wait_ms, "max_new_tokens": 32}},
+    }
+    return VLMStub("vlm", PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None))
+
+
+class _FakeModel:
+    def __init__(self, log):
+        self.log = log
+        log.append("load")
+
+    def unload(self):
+        self.log.append("unload")
+
+
+class ModelManagerTests(unittest.TestCase):
+    def test_loads_lazily_and_releases_on_active(self):
+        log = []
+        manager = ModelManager(lambda: _FakeModel(log), lambda model: model.unload())
+        self.assertFalse(manager.loaded)
+        with manager.use():
+            pass
+        with manager.use():
+            pass
+        self.assertEqual(log, ["load"])
+        manager.set_mode("USER_QUERY")
+        self.assertTrue(manager.loaded)
+        status = manager.set_mode("ACTIVE_CAPTURE_ONLY")
+        self.assertFalse(status["loaded"])
+        self.assertEqual(log, ["load", "unload"])
+        with manager.use():
+            pass
+        self.assertEqual(log, ["load", "unload", "load"])
+
+    def test_release_can_be_disabled(self):
+        log = []
+        manager = ModelManager(lambda: _FakeModel(log), lambda model: model.unload(), release_on_active=False)
+        with manager.use():
+            pass
+        manager.set_mode("ACTIVE_CAPTURE_ONLY")
+        self.assertTrue(manager.loaded)
+
+    def test_overrun_defers_unload_until_call_returns(self):
+        log = []
+        manager = ModelManager(lambda: _FakeModel(log), lambda model: model.unload(), release_deadline_ms=20)
+        entered, finish = threading.Event(), threading.Event()
+
+        def call():
+            with manager.use():
+                entered.set()
+                finish.wait(5)
+
+        worker = threading.Thread(target=call)
+        worker.start()
+        entered.wait(5)
+        self.assertFalse(manager.release())
+        self.assertTrue(manager.loaded)
+        self.assertEqual(manager.stats["release_overruns"], 1)
+        finish.set()
+        worker.join()
+        self.assertFalse(manager.loaded)
+        self.assertEqual(log, ["load", "unload"])
+
+
+class BatchQueueTests(unittest.TestCase):
+    def test_concurrent_callers_are_coalesced(self):
+        batches = []
+        queue = BatchQueue(lambda items: batches.append(list(items)) or [item * 2 for item in items], max_batch=8, wait_ms=100)
+        self.addCleanup(queue.close)
+        results = {}
+        threads = [threading.Thread(target=lambda n=n: results.__setitem__(n, queue.submit([n]))) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {n: [n * 2] for n in range(4)})
+        self.assertLess(len(batches), 4)
+        self.assertEqual(sorted(item for batch in batches for item in batch), [0, 1, 2, 3])
+
+    def test_batches_are_capped_and_errors_propagate(self):
+        queue = BatchQueue(lambda items: [len(items)] * len(items), max_batch=3, wait_ms=0)
+        self.addCleanup(queue.close)
+        self.assertEqual(queue.submit(list(range(7))), [3, 3, 3, 3, 3, 3, 1])
+
+        def boom(items):
+            raise RuntimeError("model missing")
+
+        failing = BatchQueue(boom, wait_ms=0)
+        self.addCleanup(failing.close)
+        with self.assertRaises(RuntimeError):
+            failing.submit([1, 2])
+
+
+class VLMPluginTests(unittest.TestCase):
+    def test_extract_batch_with_stand_in_model(self):
+        plugin = _plugin()
+        self.addCleanup(plugin.close)
+        result = plugin.extract_batch([_png("editor main.py"), b"garbage", _png("")])
+        texts = [r["text"] for r in result["results"]]
+        self.assertEqual(texts, ["editor main.py", "", "screen 64x32"])
+        self.assertIn("error", result["results"][1])
+        self.assertEqual(result["model"], plugin.model_id())
+        with self.assertRaises(RuntimeError):
+            plugin.extract(b"garbage")
+
+    def test_concurrent_extract_calls_share_a_generate(self):
+        plugin = _plugin(wait_ms=100)
+        self.addCleanup(plugin.close)
+        out = []
+        threads = [threading.Thread(target=lambda n=n: out.append(plugin.extract(_png(f"frame {n}"))["text"])) for n in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(out), ["frame 0", "frame 1", "frame 2"])
+        self.assertLess(plugin.status()["batches"], 3)
+
+    def test_mode_transitions_release_and_reload(self):
+        plugin = _plugin(wait_ms=0)
+        self.addCleanup(plugin.close)
+        plugin.extract(_png("x"))
+        self.assertTrue(plugin.status()["loaded"])
+        status = notify_mode(plugin, "ACTIVE_CAPTURE_ONLY")
+        self.assertFalse(status["loaded"])
+        self.assertEqual(status["unloads"], 1)
+        plugin.extract(_png("y"))
+        self.assertEqual(plugin.status()["loads"], 2)
+
+    def test_notify_mode_skips_unstarted_hosts(self):
+        class _Host:
+            started = False
+
+        class _Remote:
+            host = _Host()
+
+            def set_mode(self, mode):
+                raise AssertionError("host should not be started")
+
+        self.assertIsNone(notify_mode(_Remote(), "ACTIVE_CAPTURE_ONLY"))
+        self.assertIsNone(notify_mode(object(), "ACTIVE_CAPTURE_ONLY"))
+
+
+class VLMFramesTests(unittest.TestCase):
+    def test_failed_frames_are_left_for_ocr(self):
+        plugin = _plugin(wait_ms=0)
+        self.addCleanup(plugin.close)
+        frame = _png("terminal")
+        self.assertEqual(vlm_frames(plugin, [frame, b"garbage", frame]), ["terminal", None, "terminal"])
+
+    def test_batch_failure_falls_back_for_every_frame(self):
+        class _Broken:
+            def extract_batch(self, images):
+                raise RuntimeError("Missing VLM dependency")
+
+        self.assertEqual(vlm_frames(_Broken(), [b"a", b"b"]), [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1 @@
+"""Micro-benchmarks for kernel and plugin hot paths."""
@@ -0,0 +1,357 @@
+"""Performance budget suite: boot, query, ingestion and sanitizer throughput.
+
+Results are checked against ``performance.*`` in the effective config and
+appended to a JSONL history so runs can be compared over time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from autocapture_nx.kernel.canonical_json import dumps
+from autocapture_nx.kernel.config import ConfigPaths
+from autocapture_nx.kernel.hashing import sha256_text
+from autocapture_nx.kernel.loader import Kernel
+from autocapture_nx.kernel.query import run_query
+
+DEFAULT_HISTORY = Path("tools") / "hypervisor" / "runs" / "bench_history.jsonl"
+
+_WORDS = [
+    "invoice", "meeting", "budget", "deploy", "roadmap", "standup", "review", "kernel",
+    "capture", "ledger", "journal", "vault", "anchor", "segment", "retrieval", "citation",
+]
+_SANITIZER_TEXT = (
+    "Call Jane Doe at 555-867-5309 or jane.doe@example.com about invoice 4111 1111 1111 1111; "
+    "the report is at C:\\Users\\jane\\reports\\q3.xlsx and http://intranet.local/q3 from 10.0.0.12. "
+)
+
+
+def percentiles(samples_ms: list[float]) -> dict[str, float]:
+    """Nearest-rank percentiles over a (small) list of millisecond samples."""
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+
+    def rank(pct: float) -> float:
+        idx = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+        return round(ordered[idx], 3)
+
+    return {
+        "count": len(ordered),
+        "min": round(ordered[0], 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": rank(50),
+        "p90": rank(90),
+        "p99": rank(99),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def bench_config_paths(root: Path) -> ConfigPaths:
+    """Config paths whose user override confines all state to ``root``.
+
+    The query cache is off so query latencies measure the full pipeline.
+    """
+    safe_root = str(root).replace("\\", "/")
+    override = {
+        "storage": {
+            "data_dir": f"{safe_root}/data",
+            "crypto": {
+                "keyring_path": f"{safe_root}/data/vault/keyring.json",
+                "root_key_path": f"{safe_root}/data/vault/root.key",
+            },
+            "anchor": {"path": f"{safe_root}/anchor/anchors.ndjson", "use_dpapi": False},
+        },
+        "retrieval": {"query_cache": {"enabled": False}},
+    }
+    user_path = root / "user.json"
+    if not user_path.exists():
+        user_path.write_text(json.dumps(override), encoding="utf-8")
+    return ConfigPaths(
+        default_path=Path("config") / "default.json",
+        user_path=user_path,
+        schema_path=Path("contracts") / "config_schema.json",
+        backup_dir=root / "backup",
+        snapshot_path=root / "cache" / "boot_snapshot.json",
+    )
+
+
+def _close(system) -> None:
+    for plugin in system.plugins:
+        getattr(plugin.instance, "close", lambda: None)()
+
+
+def _boot_once_ms(root: Path) -> float:
+    started = time.perf_counter()
+    system = Kernel(bench_config_paths(root), safe_mode=False).boot()
+    elapsed = (time.perf_counter() - started) * 1000
+    _close(system)
+    return elapsed
+
+
+def bench_boot(root: Path, runs: int) -> dict[str, Any]:
+    """Boot in fresh interpreters; the first run is cold, later runs use the boot snapshot."""
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-m", "tools.benchmarks.budget", "--boot-once", str(root)],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": os.environ.get("PYTHONPATH", ".")},
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"boot benchmark failed: {proc.stderr.strip()}")
+        samples.append(float(proc.stdout.strip().splitlines()[-1]))
+    warm = samples[1:] or samples
+    return {"cold_ms": round(samples[0], 3), "warm_ms": percentiles(warm)}
+
+
+def _seed_corpus(system, records: int) -> None:
+    metadata = system.get("storage.metadata")
+    base = datetime.now(timezone.utc)
+    for idx in range(records):
+        words = [_WORDS[(idx * 7 + k) % len(_WORDS)] for k in range(3)]
+        metadata.put(
+            f"bench_{idx:06d}",
+            {
+                "ts_utc": (base - timedelta(minutes=idx)).isoformat(),
+                "text": f"{' '.join(words)} note {idx}",
+                "segment_id": f"bench_{idx:06d}",
+            },
+        )
+
+
+def bench_query(system, records: int, queries: int) -> dict[str, Any]:
+    _seed_corpus(system, records)
+    samples = []
+    for idx in range(queries):
+        # Distinct text per iteration, so no iteration is served from a cache keyed on the query.
+        text = f"{_WORDS[idx % len(_WORDS)]} note {idx}"
+        started = time.perf_counter()
+        run_query(system, text)
+        samples.append((time.perf_counter() - started) * 1000)
+    cache = system.get("query.cache") if system.has("query.cache") else None
+    hits = cache.stats()["hits"] if cache is not None else 0
+    return {"records": records, "latency_ms": percentiles(samples), "query_cache_hits": hits}
+
+
+def bench_ingestion(system, segments: int, segment_bytes: int) -> dict[str, Any]:
+    """Write segments the way capture does: media blob, metadata, journal, ledger, anchor."""
+    media = system.get("storage.media")
+    metadata = system.get("storage.metadata")
+    journal = system.get("journal.writer")
+    ledger = system.get("ledger.writer")
+    anchor = system.get("anchor.writer")
+    policy_hash = sha256_text(dumps(system.config))
+    blob = os.urandom(segment_bytes)
+    samples = []
+    started = time.perf_counter()
+    for sequence in range(segments):
+        segment_id = f"bench_segment_{sequence}"
+        ts = datetime.now(timezone.utc).isoformat()
+        record = {"segment_id": segment_id, "ts_utc": ts, "frame_count": 1, "width": 1, "height": 1}
+        seg_started = time.perf_counter()
+        media.put(segment_id, blob)
+        metadata.put(segment_id, record)
+        journal.append(
+            {
+                "schema_version": 1,
+                "event_id": segment_id,
+                "sequence": sequence,
+                "ts_utc": ts,
+                "tzid": "UTC",
+                "offset_minutes": 0,
+                "event_type": "capture.segment",
+                "payload": record,
+            }
+        )
+        ledger_hash = ledger.append(
+            {
+                "schema_version": 1,
+                "entry_id": segment_id,
+                "ts_utc": ts,
+                "stage": "capture",
+                "inputs": [],
+                "outputs": [segment_id],
+                "policy_snapshot_hash": policy_hash,
+                "payload": record,
+            }
+        )
+        anchor.anchor(ledger_hash)
+        samples.append((time.perf_counter() - seg_started) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        "segments": segments,
+        "segment_bytes": segment_bytes,
+        "mb_s": round(segments * segment_bytes / (1024 * 1024) / elapsed, 3),
+        "segment_ms": percentiles(samples),
+    }
+
+
+def bench_sanitizer(system, iterations: int) -> dict[str, Any]:
+    sanitizer = system.get("privacy.egress_sanitizer")
+    text = _SANITIZER_TEXT * 8
+    samples = []
+    started = time.perf_counter()
+    for idx in range(iterations):
+        call_started = time.perf_counter()
+        sanitizer.sanitize_text(text, scope=f"bench{idx % 4}")
+        samples.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        "text_bytes": len(text.encode("utf-8")),
+        "mb_s": round(iterations * len(text.encode("utf-8")) / (1024 * 1024) / elapsed, 3),
+        "call_ms": percentiles(samples),
+    }
+
+
+def check_budgets(results: dict[str, Any], performance: dict[str, Any]) -> list[dict[str, Any]]:
+    """Compare results with ``performance.*``; every entry carries ``ok``."""
+    checks = []
+    boot = results.get("boot")
+    if boot and "startup_ms" in performance:
+        actual = boot["warm_ms"]["p50"]
+        checks.append({"metric": "boot.warm_ms.p50", "budget": performance["startup_ms"], "actual": actual, "ok": actual <= performance["startup_ms"]})
+    query = results.get("query")
+    if query and "query_latency_ms" in performance:
+        actual = query["latency_ms"]["p90"]
+        checks.append({"metric": "query.latency_ms.p90", "budget": performance["query_latency_ms"], "actual": actual, "ok": actual <= performance["query_latency_ms"]})
+    ingestion = results.get("ingestion")
+    if ingestion and "ingestion_mb_s" in performance:
+        actual = ingestion["mb_s"]
+        checks.append({"metric": "ingestion.mb_s", "budget": performance["ingestion_mb_s"], "actual": actual, "ok": actual >= performance["ingestion_mb_s"]})
+    return checks
+
+
+# Metric path -> True when larger is better.
+_TREND_METRICS = {
+    "boot.warm_ms.p50": False,
+    "query.latency_ms.p50": False,
+    "query.latency_ms.p90": False,
+    "ingestion.mb_s": True,
+    "sanitizer.mb_s": True,
+}
+
+
+def _lookup(results: dict[str, Any], path: str) -> float | None:
+    value: Any = results
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value if isinstance(value, (int, float)) else None
+
+
+def load_history(path: str | Path) -> list[dict[str, Any]]:
+    target = Path(path)
+    if not target.exists():
+        return []
+    entries = []
+    with target.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    return entries
+
+
+def compare(results: dict[str, Any], previous: dict[str, Any] | None) -> dict[str, Any]:
+    """Percent change of headline metrics versus a previous result (positive = better)."""
+    if previous is None:
+        return {}
+    trend = {}
+    for path, higher_is_better in _TREND_METRICS.items():
+        current = _lookup(results, path)
+        before = _lookup(previous, path)
+        if current is None or not before:
+            continue
+        change = (current - before) / before * 100
+        trend[path] = {"previous": before, "current": current, "improvement_pct": round(change if higher_is_better else -change, 2)}
+    return trend
+
+
+def append_history(path: str | Path, entry: dict[str, Any]) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with target.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry, sort_keys=True, separators=(",", ":")) + "\n")
+
+
+def run(
+    records: int = 500,
+    queries: int = 20,
+    segments: int = 20,
+    segment_bytes: int = 1024 * 1024,
+    sanitizer_iterations: int = 200,
+    boot_runs: int = 5,
+) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        results: dict[str, Any] = {}
+        if boot_runs > 0:
+            boot_root = root / "boot"
+            boot_root.mkdir()
+            results["boot"] = bench_boot(boot_root, boot_runs)
+        system = Kernel(bench_config_paths(root), safe_mode=False).boot()
+        try:
+            results["query"] = bench_query(system, records, queries)
+            results["ingestion"] = bench_ingestion(system, segments, segment_bytes)
+            results["sanitizer"] = bench_sanitizer(system, sanitizer_iterations)
+            performance = dict(system.config.get("performance", {}))
+        finally:
+            _close(system)
+    checks = check_budgets(results, performance)
+    return {
+        "ts_utc": datetime.now(timezone.utc).isoformat(),
+        "results": results,
+        "budgets": checks,
+        "budgets_ok": all(check["ok"] for check in checks),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--segments", type=int, default=20)
+    parser.add_argument("--segment-bytes", type=int, default=1024 * 1024)
+    parser.add_argument("--sanitizer-iterations", type=int, default=200)
+    parser.add_argument("--boot-runs", type=int, default=5)
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="JSONL history file ('' to skip)")
+    parser.add_argument("--boot-once", metavar="DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.boot_once:
+        print(round(_boot_once_ms(Path(args.boot_once)), 3))
+        return
+    report = run(
+        records=args.records,
+        queries=args.queries,
+        segments=args.segments,
+        segment_bytes=args.segment_bytes,
+        sanitizer_iterations=args.sanitizer_iterations,
+        boot_runs=args.boot_runs,
+    )
+    if args.history:
+        history = load_history(args.history)
+        report["trend"] = compare(report["results"], history[-1]["results"] if history else None)
+        append_history(args.history, {"ts_utc": report["ts_utc"], "results": report["results"], "budgets_ok": report["budgets_ok"]})
+    print(json.dumps(report, indent=2, sort_keys=True))
+    if not report["budgets_ok"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Micro-benchmark for guarded plugin call overhead."""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import socket
+import time
+from typing import Any, Callable
+
+from autocapture_nx.plugin_system.registry import CapabilityProxy
+from autocapture_nx.plugin_system.runtime import network_guard
+
+
+def _time_per_call_ns(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000_000
+
+
+@contextlib.contextmanager
+def _socket_patch_guard():
+    """Reference: the previous guard, swapping socket module attributes per call."""
+    original_socket = socket.socket
+    original_create_connection = socket.create_connection
+
+    def _blocked(*_args, **_kwargs):
+        raise OSError("blocked")
+
+    socket.socket = _blocked  # type: ignore[assignment]
+    socket.create_connection = _blocked  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        socket.socket = original_socket  # type: ignore[assignment]
+        socket.create_connection = original_create_connection  # type: ignore[assignment]
+
+
+class _Target:
+    def ping(self) -> int:
+        return 1
+
+
+def run(iterations: int = 200_000) -> dict[str, Any]:
+    target = _Target()
+    denied_proxy = CapabilityProxy(target, network_allowed=False)
+    allowed_proxy = CapabilityProxy(target, network_allowed=True)
+
+    def guarded_denied() -> None:
+        with network_guard(False):
+            target.ping()
+
+    def guarded_allowed() -> None:
+        with network_guard(True):
+            target.ping()
+
+    def socket_patch() -> None:
+        with _socket_patch_guard():
+            target.ping()
+
+    direct = _time_per_call_ns(target.ping, iterations)
+    return {
+        "iterations": iterations,
+        "direct_call_ns": direct,
+        "guard_denied_ns": _time_per_call_ns(guarded_denied, iterations),
+        "guard_allowed_ns": _time_per_call_ns(guarded_allowed, iterations),
+        "socket_patch_guard_ns": _time_per_call_ns(socket_patch, iterations),
+        "proxy_denied_ns": _time_per_call_ns(lambda: denied_proxy.ping(), iterations),
+        "proxy_allowed_ns": _time_per_call_ns(lambda: allowed_proxy.ping(), iterations),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
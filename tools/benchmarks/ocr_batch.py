@@ -0,0 +1,99 @@
+"""Per-image ``extract`` versus pooled ``extract_batch`` for the OCR plugin.
+
+Uses the stand-in engine, so the timings cover decoding, grayscale
+conversion and downsizing of synthetic full-HD screenshots (the part of OCR
+that runs in the worker pool besides the engine itself). A fraction of the
+frames repeat, as static screens do within a capture segment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import time
+from typing import Any
+
+from autocapture_nx.plugin_system.api import PluginContext
+from plugins.builtin.ocr_stub.plugin import OCRLocal
+
+
+def synthetic_frames(count: int, width: int, height: int, repeat_pct: int, seed: int = 0) -> list[bytes]:
+    import random
+
+    from PIL import Image, ImageDraw
+    from PIL.PngImagePlugin import PngInfo
+
+    rng = random.Random(seed)
+    unique = max(1, count - count * repeat_pct // 100)
+    frames = []
+    for idx in range(unique):
+        image = Image.new("RGB", (width, height), (240, 240, 240))
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x, y = rng.randrange(max(1, width - 200)), rng.randrange(max(1, height - 20))
+            draw.rectangle([x, y, x + rng.randrange(40, 200), y + 12], fill=(rng.randrange(80), 0, 0))
+        meta = PngInfo()
+        meta.add_text("ocr_text", f"frame {idx} window title")
+        buf = io.BytesIO()
+        image.save(buf, format="PNG", pnginfo=meta, compress_level=1)
+        frames.append(buf.getvalue())
+    return [frames[idx % unique] for idx in range(count)]
+
+
+def _plugin(workers: int, max_side_px: int) -> OCRLocal:
+    config = {
+        "processing": {
+            "idle": {"max_concurrency_cpu": workers},
+            "ocr": {"engine": "stand_in", "max_side_px": max_side_px, "cache_entries": 4096},
+        }
+    }
+    return OCRLocal("bench.ocr", PluginContext(config=config, get_capability=lambda _k: None, logger=lambda _m: None))
+
+
+def run(
+    images: int = 32, width: int = 1920, height: int = 1080, workers: int = 4, repeat_pct: int = 25, max_side_px: int = 1600
+) -> dict[str, Any]:
+    frames = synthetic_frames(images, width, height, repeat_pct)
+
+    serial = _plugin(1, max_side_px)
+    start = time.perf_counter()
+    serial_texts = [serial.extract(frame)["text"] for frame in frames]
+    serial_s = time.perf_counter() - start
+
+    batched = _plugin(workers, max_side_px)
+    try:
+        # Warm the pool so process start-up is not billed to the batch.
+        batched.extract_batch(synthetic_frames(workers, 320, 240, 0, seed=1))
+        start = time.perf_counter()
+        batch_texts = [result["text"] for result in batched.extract_batch(frames)["results"]]
+        batch_s = time.perf_counter() - start
+    finally:
+        batched.close()
+    return {
+        "images": images,
+        "unique_images": len(set(frames)),
+        "workers": workers,
+        "max_side_px": max_side_px,
+        "serial_s": round(serial_s, 4),
+        "batch_s": round(batch_s, 4),
+        "speedup": round(serial_s / batch_s, 2) if batch_s else None,
+        "identical_text": serial_texts == batch_texts,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat-pct", type=int, default=25)
+    parser.add_argument("--max-side-px", type=int, default=1600)
+    args = parser.parse_args()
+    result = run(args.images, args.width, args.height, args.workers, args.repeat_pct, args.max_side_px)
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Micro-benchmark for compiled schema validation."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from autocapture_nx.kernel.schema import clear_schema_cache, compile_schema, load_compiled_schema
+
+
+def _time_per_call_us(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def run(iterations: int = 200) -> dict[str, Any]:
+    config_schema_path = Path("contracts/config_schema.json")
+    manifest_schema_path = Path("contracts/plugin_manifest.schema.json")
+    with open("config/default.json", "r", encoding="utf-8") as handle:
+        config = json.load(handle)
+    config_schema = json.loads(config_schema_path.read_text(encoding="utf-8"))
+    manifests = [
+        json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted(Path("plugins").rglob("plugin.json"))
+    ]
+
+    clear_schema_cache()
+    compiled_config = load_compiled_schema(config_schema_path)
+    compiled_manifest = load_compiled_schema(manifest_schema_path)
+
+    def recompile_each_call() -> None:
+        compile_schema(config_schema).validate(config)
+
+    def manifests_loaded_each_call() -> None:
+        schema = json.loads(manifest_schema_path.read_text(encoding="utf-8"))
+        for manifest in manifests:
+            compile_schema(schema).validate(manifest)
+
+    def manifests_cached() -> None:
+        for manifest in manifests:
+            load_compiled_schema(manifest_schema_path).validate(manifest)
+
+    return {
+        "iterations": iterations,
+        "manifests": len(manifests),
+        "config_compile_and_validate_us": _time_per_call_us(recompile_each_call, iterations),
+        "config_compiled_validate_us": _time_per_call_us(lambda: compiled_config.validate(config), iterations),
+        "manifests_uncached_us": _time_per_call_us(manifests_loaded_each_call, iterations),
+        "manifests_cached_us": _time_per_call_us(manifests_cached, iterations),
+        "manifest_compiled_validate_us": _time_per_call_us(
+            lambda: compiled_manifest.validate(manifests[0]), iterations
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Recall and latency of the IVF vector index against exact search.
+
+Builds month-sharded indexes over synthetic clustered embeddings (a stand-in
+for many near-duplicate window titles and OCR frames), then times the same
+queries with the ANN path and with exact per-shard scans.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from typing import Any
+
+from plugins.builtin.retrieval_vector.plugin import ShardedIndex
+from tools.benchmarks.budget import percentiles
+
+
+def synthetic_corpus(rows: int, dim: int, clusters: int, months: int, seed: int = 0) -> tuple[Any, list[str]]:
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((rows, dim)).astype(np.float32)
+    stamps = [f"2026-{1 + row % months:02d}-15T12:00:00Z" for row in range(rows)]
+    return vectors, stamps
+
+
+def _time_queries(
+    index: ShardedIndex, queries: Any, k: int, window: dict[str, Any] | None
+) -> tuple[list[float], list[set[str]]]:
+    timings: list[float] = []
+    found: list[set[str]] = []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.top_k(query, k, window)
+        timings.append((time.perf_counter() - start) * 1000)
+        found.append({record_id for record_id, _ in hits})
+    return timings, found
+
+
+def run(
+    rows: int = 50000,
+    dim: int = 256,
+    clusters: int = 500,
+    months: int = 12,
+    queries: int = 100,
+    k: int = 20,
+    nlist: int = 1024,
+    nprobe: int = 16,
+    min_rows: int = 4096,
+    dtype: str = "float16",
+) -> dict[str, Any]:
+    import numpy as np
+
+    vectors, stamps = synthetic_corpus(rows, dim, clusters, months)
+    rng = np.random.default_rng(1)
+    picks = rng.choice(rows, size=queries, replace=False)
+    query_vecs = vectors[picks] + 0.1 * rng.standard_normal((queries, dim)).astype(np.float32)
+    month = min(3, months)
+    window = {"start": f"2026-{month:02d}-01T00:00:00+00:00", "end": f"2026-{month:02d}-28T23:59:59+00:00"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ann = ShardedIndex(f"{tmp}/ann", dim, dtype, "bench", nlist=nlist, nprobe=nprobe, min_rows=min_rows)
+        exact = ShardedIndex(f"{tmp}/exact", dim, dtype, "bench", min_rows=None)
+        start = time.perf_counter()
+        for row in range(rows):
+            ann.add(f"r{row}", vectors[row], stamps[row])
+        ann.flush()
+        build_s = time.perf_counter() - start
+        for row in range(rows):
+            exact.add(f"r{row}", vectors[row], stamps[row])
+        exact.flush()
+
+        result: dict[str, Any] = {
+            "rows": rows,
+            "dim": dim,
+            "dtype": dtype,
+            "k": k,
+            "nlist": nlist,
+            "nprobe": nprobe,
+            "shards": len(ann.shards),
+            "trained_lists": sum(len(s.centroids) for s in ann.shards.values() if s.centroids is not None),
+            "ann_build_s": round(build_s, 3),
+        }
+        for label, scope in (("all", None), ("one_month", window)):
+            exact_ms, truth = _time_queries(exact, query_vecs, k, scope)
+            ann_ms, found = _time_queries(ann, query_vecs, k, scope)
+            recall = sum(len(t & f) for t, f in zip(truth, found)) / max(1, sum(len(t) for t in truth))
+            result[label] = {
+                "recall_at_k": round(recall, 4),
+                "exact_ms": percentiles(exact_ms),
+                "ann_ms": percentiles(ann_ms),
+            }
+        ann.close()
+        exact.close()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=20)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--min-rows", type=int, default=4096)
+    parser.add_argument("--dtype", choices=["float16", "int8"], default="float16")
+    args = parser.parse_args()
+    result = run(
+        args.rows,
+        args.dim,
+        args.clusters,
+        args.months,
+        args.queries,
+        args.k,
+        args.nlist,
+        args.nprobe,
+        args.min_rows,
+        args.dtype,
+    )
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
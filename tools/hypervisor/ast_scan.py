@@ -0,0 +1,62 @@
+"""Per-file Python AST summaries for the AST/IR devtool.
+
+Lives in an importable module (not the plugin file) so process pools can
+pickle ``summarize_job`` under the spawn start method used on Windows.
+"""
+
+from __future__ import annotations
+
+import ast
+from typing import Any
+
+# Bump when the per-file summary shape changes so cached entries are rebuilt.
+SUMMARY_VERSION = 1
+
+
+def _module_name(rel_path: str) -> str:
+    parts = rel_path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def summarize_source(rel_path: str, source: bytes) -> dict[str, Any]:
+    """Single-pass summary: definition counts and resolved import targets."""
+    node = ast.parse(source, filename=rel_path)
+    module = _module_name(rel_path)
+    package = module if rel_path.endswith("__init__.py") else module.rpartition(".")[0]
+    functions = async_functions = classes = 0
+    imports: set[str] = set()
+    from_imports: set[str] = set()
+    for item in ast.walk(node):
+        if isinstance(item, ast.FunctionDef):
+            functions += 1
+        elif isinstance(item, ast.AsyncFunctionDef):
+            async_functions += 1
+        elif isinstance(item, ast.ClassDef):
+            classes += 1
+        elif isinstance(item, ast.Import):
+            imports.update(alias.name for alias in item.names)
+        elif isinstance(item, ast.ImportFrom):
+            base = item.module or ""
+            if item.level:
+                anchor = package.split(".") if package else []
+                anchor = anchor[: len(anchor) - (item.level - 1)] if item.level > 1 else anchor
+                base = ".".join(part for part in (*anchor, base) if part)
+            if base:
+                imports.add(base)
+                # "from pkg import mod" may name a submodule; the graph keeps it if it resolves.
+                from_imports.update(f"{base}.{alias.name}" for alias in item.names if alias.name != "*")
+    return {
+        "module": module,
+        "lines": source.count(b"\n") + (1 if source and not source.endswith(b"\n") else 0),
+        "functions": functions,
+        "async_functions": async_functions,
+        "classes": classes,
+        "imports": sorted(imports),
+        "from_imports": sorted(from_imports),
+    }
+
+
+def summarize_job(job: tuple[str, bytes]) -> dict[str, Any]:
+    return summarize_source(*job)
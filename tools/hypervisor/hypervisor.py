@@ -2,15 +2,20 @@
 
 from __future__ import annotations
 
+import contextlib
 import json
 import os
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from tools.benchmarks.budget import DEFAULT_HISTORY, append_history, compare, load_history
+
 
 @dataclass
 class VariantScorecard:
@@ -21,11 +26,62 @@ class VariantScorecard:
     p3_security_passed: bool
     p4_artifacts_complete: bool
     notes: str
+    p5_budgets_passed: bool = False
+    benchmarks: dict[str, Any] | None = None
+
+
+class _PhaseGate:
+    """Readers-writer gate between the scoring phases of concurrent variants.
+
+    Correctness phases (doctor, unit tests) hold it shared and run alongside
+    each other. A timing phase (startup latency, benchmarks) holds it
+    exclusively, so nothing else is scored while it measures. A waiting
+    timing phase stops new correctness phases from starting, so it is not
+    starved.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @contextlib.contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive or self._waiting:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                self._cond.notify_all()
 
+    @contextlib.contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            while self._exclusive or self._shared:
+                self._cond.wait()
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
 
-def _run_cmd(cmd: list[str], cwd: str | None = None) -> tuple[int, str]:
+
+_PHASES = _PhaseGate()
+
+
+def _run_cmd(cmd: list[str], cwd: str | None = None, env_overrides: dict[str, str] | None = None) -> tuple[int, str]:
     env = os.environ.copy()
     env.setdefault("PYTHONPATH", ".")
+    env.update(env_overrides or {})
     result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, env=env)
     output = (result.stdout or "") + (result.stderr or "")
     return result.returncode, output.strip()
@@ -44,7 +100,22 @@ def _create_variant(variant_id: str, axis: str, dry_run: bool) -> Path | None:
     return variant_path
 
 
-def _measure_startup_ms(cwd: str | None) -> float | None:
+def _cpu_budget(max_parallel: int) -> int:
+    """Variants scored at once; 0 means half the CPUs so the suites do not thrash."""
+    if max_parallel > 0:
+        return max_parallel
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def _scratch_env(scratch: Path | None) -> dict[str, str]:
+    if scratch is None:
+        return {}
+    path = str(scratch.resolve())
+    os.makedirs(path, exist_ok=True)
+    return {"TMPDIR": path, "TEMP": path, "TMP": path}
+
+
+def _measure_startup_ms(cwd: str | None, env: dict[str, str] | None = None) -> float | None:
     code, output = _run_cmd(
         [
             sys.executable,
@@ -54,6 +125,7 @@ def _measure_startup_ms(cwd: str | None) -> float | None:
             "print(int((time.perf_counter()-t0)*1000))",
         ],
         cwd=cwd,
+        env_overrides=env,
     )
     if code != 0:
         return None
@@ -63,12 +135,26 @@ def _measure_startup_ms(cwd: str | None) -> float | None:
         return None
 
 
-def _run_doctor(cwd: str | None) -> bool:
-    code, _output = _run_cmd([sys.executable, "-m", "autocapture_nx", "doctor"], cwd=cwd)
+def _run_benchmarks(cwd: str | None, env: dict[str, str] | None = None) -> dict[str, Any] | None:
+    """Run the performance budget suite; history is kept by the caller, not the variant."""
+    _code, output = _run_cmd(
+        [sys.executable, "-m", "tools.benchmarks.budget", "--history", ""], cwd=cwd, env_overrides=env
+    )
+    start = output.find("{")
+    if start < 0:
+        return None
+    try:
+        return json.loads(output[start:])
+    except ValueError:
+        return None
+
+
+def _run_doctor(cwd: str | None, env: dict[str, str] | None = None) -> bool:
+    code, _output = _run_cmd([sys.executable, "-m", "autocapture_nx", "doctor"], cwd=cwd, env_overrides=env)
     return code == 0
 
 
-def _score_variant(dry_run: bool, cwd: str | None = None) -> VariantScorecard:
+def _score_variant(dry_run: bool, cwd: str | None = None, scratch: Path | None = None) -> VariantScorecard:
     if dry_run:
         return VariantScorecard(
             variant_id="",
@@ -79,32 +165,43 @@ def _score_variant(dry_run: bool, cwd: str | None = None) -> VariantScorecard:
             p4_artifacts_complete=True,
             notes="dry run: no checks executed",
         )
-    p1_latency = _measure_startup_ms(cwd)
-    p3_ok = _run_doctor(cwd)
-    code, output = _run_cmd(
-        [sys.executable, "-m", "unittest", "discover", "-s", "tests", "-q"], cwd=cwd
-    )
+    env = _scratch_env(scratch)
+    # Correctness checks run concurrently with other variants' correctness
+    # checks; timing runs with nothing else being scored.
+    with _PHASES.shared():
+        p3_ok = _run_doctor(cwd, env)
+        code, output = _run_cmd(
+            [sys.executable, "-m", "unittest", "discover", "-s", "tests", "-q"], cwd=cwd, env_overrides=env
+        )
+    with _PHASES.exclusive():
+        p1_latency = _measure_startup_ms(cwd, env)
+        benchmarks = _run_benchmarks(cwd, env)
+    p5_ok = bool(benchmarks and benchmarks.get("budgets_ok"))
     return VariantScorecard(
         variant_id="",
-        status="passed" if code == 0 else "failed",
+        status="passed" if code == 0 and p5_ok else "failed",
         p1_latency_ms=p1_latency,
         p2_tests_passed=(code == 0),
         p3_security_passed=p3_ok,
         p4_artifacts_complete=True,
         notes=output,
+        p5_budgets_passed=p5_ok,
+        benchmarks=benchmarks,
     )
 
 
-def run_diffusion(axis: str, k_variants: int, dry_run: bool) -> dict[str, Any]:
+def run_diffusion(axis: str, k_variants: int, dry_run: bool, max_parallel: int = 0) -> dict[str, Any]:
     run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     run_dir = Path("tools") / "hypervisor" / "runs" / run_id
     os.makedirs(run_dir, exist_ok=True)
 
+    workers = min(_cpu_budget(max_parallel), max(1, k_variants))
     meta = {
         "run_id": run_id,
         "axis": axis,
         "k_variants": k_variants,
         "dry_run": dry_run,
+        "max_parallel": workers,
         "started_at": datetime.now(timezone.utc).isoformat(),
         "noise_schedule": [
             {"step": 1, "scope": "architecture/files/ports"},
@@ -116,14 +213,41 @@ def run_diffusion(axis: str, k_variants: int, dry_run: bool) -> dict[str, Any]:
     with open(run_dir / "run.json", "w", encoding="utf-8") as handle:
         json.dump(meta, handle, indent=2, sort_keys=True)
 
-    variants = []
+    # Worktrees are created one at a time (git serializes on its own locks);
+    # each variant is then scored in its own worktree and scratch dir.
+    variants = [f"v{idx + 1}" for idx in range(k_variants)]
+    variant_paths = [_create_variant(variant_id, axis, dry_run) for variant_id in variants]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hv-score") as pool:
+        futures = [
+            pool.submit(
+                _score_variant,
+                dry_run,
+                str(variant_path) if variant_path else None,
+                run_dir / "scratch" / variant_id if variant_path else None,
+            )
+            for variant_id, variant_path in zip(variants, variant_paths)
+        ]
+        results = [future.result() for future in futures]
+
     scorecards = []
-    for idx in range(k_variants):
-        variant_id = f"v{idx + 1}"
-        variants.append(variant_id)
-        variant_path = _create_variant(variant_id, axis, dry_run)
-        scorecard = _score_variant(dry_run, cwd=str(variant_path) if variant_path else None)
+    for variant_id, scorecard in zip(variants, results):
         scorecard.variant_id = variant_id
+        if scorecard.benchmarks:
+            history = load_history(DEFAULT_HISTORY)
+            scorecard.benchmarks["trend"] = compare(
+                scorecard.benchmarks["results"], history[-1]["results"] if history else None
+            )
+            append_history(
+                DEFAULT_HISTORY,
+                {
+                    "ts_utc": scorecard.benchmarks["ts_utc"],
+                    "run_id": run_id,
+                    "variant_id": variant_id,
+                    "axis": axis,
+                    "results": scorecard.benchmarks["results"],
+                    "budgets_ok": scorecard.benchmarks["budgets_ok"],
+                },
+            )
         score_path = run_dir / f"scorecard_{variant_id}.json"
         with open(score_path, "w", encoding="utf-8") as handle:
             json.dump(scorecard.__dict__, handle, indent=2, sort_keys=True)